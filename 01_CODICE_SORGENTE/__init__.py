@@ -0,0 +1,70 @@
+# === __init__.py ===
+# Pacchetto phi_risonanza: simulatori, motori a ensemble ed esecutori degli
+# esperimenti Φ-risonanza.
+#
+# Importare il pacchetto non carica nessun sottomodulo: i nomi qui sotto
+# vengono risolti al primo accesso (PEP 562), così un worker che usa solo
+# parallelo/ensemble non paga numpy + scipy + matplotlib degli altri moduli.
+# Nessun modulo scrive su disco o stampa all'import; gli script si lanciano
+# con i comandi phi-* (vedi pyproject.toml) o con python -m phi_risonanza.<modulo>.
+
+import importlib
+
+__version__ = "0.2.0"
+
+_ESPORTATI = {
+    # simulatori
+    'SistemaPhiAvanzato': 'test_50_repliche',
+    'SistemaMisto': 'sistemi_misti',
+    'SistemaPhiRobustezza': 'test_robustezza',
+    'SistemaKuramoto': 'kuramoto',
+    'SistemaKuramotoRete': 'reti',
+    'EnsemblePhiAvanzato': 'ensemble',
+    'EnsembleMisto': 'ensemble',
+    'ParametroOrdine': 'ordine',
+    'calcola_phi': 'ordine',
+    'FlussiRNG': 'flussi_rng',
+    'valida_precisione': 'precisione',
+    'verifica_equivalenza': 'verifica_ensemble',
+    # esecutori
+    'esegui_test_completo': 'test_50_repliche',
+    'esegui_esperimenti_misti': 'sistemi_misti',
+    'esegui_griglia': 'parallelo',
+    'cerca_transizione': 'transizione',
+    'scrivi_manifesto': 'campagna',
+    'esegui_shard': 'campagna',
+    'unisci_campagna': 'campagna',
+    'esegui_benchmark': 'benchmark',
+    'esegui_diagramma': 'diagramma_fase',
+    'DiagrammaFase': 'diagramma_fase',
+    'esegui_scaling': 'dimensione_finita',
+    'Adattivo': 'integratori',
+    'crea_integratore': 'integratori',
+    'Surrogato': 'surrogato',
+    # risultati e statistiche
+    'ArchivioColonnare': 'archivio',
+    'ScrittoreAsincrono': 'scrittura',
+    'carica_indice': 'indice_risultati',
+    'CacheRisultati': 'cache_risultati',
+    'Checkpoint': 'checkpoint',
+    'RegistratoreTraiettorie': 'traiettorie',
+    'apri_traiettorie': 'traiettorie',
+    'StatisticheOnline': 'aggregatore',
+    'Strumentazione': 'strumentazione',
+    'intervallo_bootstrap': 'ricampionamento',
+    'test_permutazione': 'ricampionamento',
+}
+
+__all__ = sorted(_ESPORTATI)
+
+
+def __getattr__(nome):
+    if nome not in _ESPORTATI:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valore = getattr(importlib.import_module(f".{_ESPORTATI[nome]}", __name__), nome)
+    globals()[nome] = valore
+    return valore
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,248 @@
+# === aggregatore.py ===
+# Statistiche in streaming a memoria costante: ogni replica aggiorna media,
+# varianza (Welford), minimo/massimo e uno sketch dei quantili appena finisce,
+# senza tenere liste di valori. Gli aggregati parziali (blocchi, worker) si
+# uniscono con unisci(): formula di Chan per media e M2, somma dei conteggi
+# per lo sketch, quindi l'unione è esatta come se i valori fossero stati
+# aggiunti tutti a un solo aggregatore (a meno dell'arrotondamento).
+#
+# Sketch dei quantili: istogramma logaritmico (DDSketch) con errore relativo
+# garantito `errore_relativo` su ogni quantile e numero di bucket che cresce
+# solo con log(max/min), non con il numero di valori.
+
+import math
+
+import numpy as np
+
+ERRORE_QUANTILI = 0.001
+MINIMO_POSITIVO = 1e-12  # sotto questo modulo un valore conta come zero
+QUANTILI = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class SketchQuantili:
+    """Quantili approssimati con errore relativo limitato, unibili esattamente"""
+
+    def __init__(self, errore_relativo=ERRORE_QUANTILI):
+        self.errore_relativo = errore_relativo
+        self.gamma = (1 + errore_relativo) / (1 - errore_relativo)
+        self._log_gamma = math.log(self.gamma)
+        self.positivi = {}  # indice del bucket -> conteggio
+        self.negativi = {}
+        self.zeri = 0
+        self.n = 0
+
+    def _indici(self, moduli):
+        return np.ceil(np.log(moduli) / self._log_gamma).astype(np.int64)
+
+    @staticmethod
+    def _conta(bucket, indici):
+        valori, conteggi = np.unique(indici, return_counts=True)
+        for i, c in zip(valori.tolist(), conteggi.tolist()):
+            bucket[i] = bucket.get(i, 0) + c
+
+    def aggiungi_molti(self, valori):
+        valori = np.asarray(valori, dtype=float).ravel()
+        positivi = valori > MINIMO_POSITIVO
+        negativi = valori < -MINIMO_POSITIVO
+        if positivi.any():
+            self._conta(self.positivi, self._indici(valori[positivi]))
+        if negativi.any():
+            self._conta(self.negativi, self._indici(-valori[negativi]))
+        self.zeri += int(valori.size - positivi.sum() - negativi.sum())
+        self.n += int(valori.size)
+
+    def aggiungi(self, valore):
+        self.aggiungi_molti([valore])
+
+    def unisci(self, altro):
+        if altro.errore_relativo != self.errore_relativo:
+            raise ValueError("Sketch con errore relativo diverso: non unibili")
+        for bucket, altri in ((self.positivi, altro.positivi), (self.negativi, altro.negativi)):
+            for i, c in altri.items():
+                bucket[i] = bucket.get(i, 0) + c
+        self.zeri += altro.zeri
+        self.n += altro.n
+        return self
+
+    def _valore(self, indice):
+        # Punto del bucket (γ^(i-1), γ^i] con errore relativo ≤ errore_relativo
+        return 2 * self.gamma ** indice / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.n == 0:
+            return math.nan
+        rango = q * (self.n - 1)
+        cumulato = 0
+        for i in sorted(self.negativi, reverse=True):
+            cumulato += self.negativi[i]
+            if cumulato > rango:
+                return -self._valore(i)
+        cumulato += self.zeri
+        if cumulato > rango:
+            return 0.0
+        for i in sorted(self.positivi):
+            cumulato += self.positivi[i]
+            if cumulato > rango:
+                return self._valore(i)
+        return self._valore(max(self.positivi))
+
+    def stato(self):
+        """Dizionario serializzabile in JSON"""
+        return {
+            'errore_relativo': self.errore_relativo,
+            'positivi': {str(i): c for i, c in self.positivi.items()},
+            'negativi': {str(i): c for i, c in self.negativi.items()},
+            'zeri': self.zeri,
+            'n': self.n,
+        }
+
+    @classmethod
+    def da_stato(cls, stato):
+        sketch = cls(stato['errore_relativo'])
+        sketch.positivi = {int(i): c for i, c in stato['positivi'].items()}
+        sketch.negativi = {int(i): c for i, c in stato['negativi'].items()}
+        sketch.zeri = stato['zeri']
+        sketch.n = stato['n']
+        return sketch
+
+
+class StatisticheOnline:
+    """Media, varianza, min/max e quantili di una grandezza, aggiornati valore per valore"""
+
+    def __init__(self, errore_quantili=ERRORE_QUANTILI, valori_grezzi=False):
+        """valori_grezzi: se True conserva anche la lista dei valori (solo su richiesta)"""
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.massimo = -math.inf
+        self.sketch = SketchQuantili(errore_quantili)
+        self.valori = [] if valori_grezzi else None
+
+    def aggiungi(self, x):
+        """Un passo di Welford"""
+        x = float(x)
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+        self.minimo = min(self.minimo, x)
+        self.massimo = max(self.massimo, x)
+        self.sketch.aggiungi(x)
+        if self.valori is not None:
+            self.valori.append(x)
+
+    def aggiungi_molti(self, valori):
+        """Un blocco di valori: statistiche del blocco con numpy, poi unione di Chan"""
+        valori = np.asarray(valori, dtype=float).ravel()
+        if valori.size == 0:
+            return
+        blocco = StatisticheOnline(self.sketch.errore_relativo)
+        blocco.n = int(valori.size)
+        blocco.media = float(np.mean(valori))
+        blocco.m2 = float(np.sum((valori - blocco.media) ** 2))
+        blocco.minimo = float(np.min(valori))
+        blocco.massimo = float(np.max(valori))
+        blocco.sketch.aggiungi_molti(valori)
+        self.unisci(blocco)
+        if self.valori is not None:
+            self.valori.extend(valori.tolist())
+
+    def unisci(self, altro):
+        """Aggiunge un aggregato parziale (formula parallela di Chan)"""
+        if altro.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.media, self.m2 = altro.n, altro.media, altro.m2
+        else:
+            n = self.n + altro.n
+            delta = altro.media - self.media
+            self.media += delta * altro.n / n
+            self.m2 += altro.m2 + delta * delta * self.n * altro.n / n
+            self.n = n
+        self.minimo = min(self.minimo, altro.minimo)
+        self.massimo = max(self.massimo, altro.massimo)
+        self.sketch.unisci(altro.sketch)
+        if self.valori is not None and altro.valori is not None:
+            self.valori.extend(altro.valori)
+        return self
+
+    # --- statistiche derivate ---
+    @property
+    def varianza(self):
+        """Varianza di popolazione (come np.var)"""
+        return self.m2 / self.n if self.n else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.varianza) if self.n else math.nan
+
+    @property
+    def cv(self):
+        """Coefficiente di variazione in %"""
+        return self.std / self.media * 100 if self.n else math.nan
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def quantili(self, livelli=QUANTILI):
+        return {f"q{round(q * 100):02d}": float(self.quantile(q)) for q in livelli}
+
+    def stato(self):
+        """Stato completo serializzabile (per unire aggregati salvati da processi diversi)"""
+        return {
+            'n': self.n,
+            'media': self.media,
+            'm2': self.m2,
+            'minimo': self.minimo,
+            'massimo': self.massimo,
+            'sketch': self.sketch.stato(),
+        }
+
+    @classmethod
+    def da_stato(cls, stato):
+        aggregato = cls()
+        aggregato.n = stato['n']
+        aggregato.media = stato['media']
+        aggregato.m2 = stato['m2']
+        aggregato.minimo = stato['minimo']
+        aggregato.massimo = stato['massimo']
+        aggregato.sketch = SketchQuantili.da_stato(stato['sketch'])
+        return aggregato
+
+
+def rapporto_varianze(numeratore, denominatore):
+    """Rapporto tra le varianze di due aggregati (es. extractive / equity)"""
+    if denominatore.varianza == 0:
+        return math.inf
+    return numeratore.varianza / denominatore.varianza
+
+
+# TEST
+def main():
+    print("🧮 AGGREGATORE IN STREAMING")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    valori = rng.pareto(1.5, 10**6) + 1
+
+    completo = StatisticheOnline()
+    completo.aggiungi_molti(valori)
+    parziali = [StatisticheOnline() for _ in range(8)]
+    for i, pezzo in enumerate(np.array_split(valori, 8)):
+        parziali[i].aggiungi_molti(pezzo)
+    unito = StatisticheOnline()
+    for parziale in parziali:
+        unito.unisci(parziale)
+
+    print(f"{'':<10} {'numpy':<14} {'streaming':<14} {'unito (8)':<14}")
+    print(f"{'media':<10} {np.mean(valori):<14.8f} {completo.media:<14.8f} {unito.media:<14.8f}")
+    print(f"{'std':<10} {np.std(valori):<14.8f} {completo.std:<14.8f} {unito.std:<14.8f}")
+    for q in QUANTILI:
+        print(f"{'q' + str(q):<10} {np.quantile(valori, q):<14.6f} {completo.quantile(q):<14.6f} "
+              f"{unito.quantile(q):<14.6f}")
+    print(f"\nBucket dello sketch: {len(completo.sketch.positivi)} per {completo.n} valori")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,121 +1,289 @@
 # === analisi_grafici.py ===
-print("📊 ANALISI GRAFICA RISULTATI 50 REPLICHE")
-print("=" * 50)
+# Analisi grafica dell'ultima esecuzione di test_50_repliche (o di quella
+# indicata). L'esecuzione si sceglie dall'indice INDICE_RISULTATI.json e i
+# dati si leggono dall'archivio colonnare una parte alla volta, solo le
+# colonne tipo, phi_finale e tempo_collasso: la memoria resta quella di un
+# blocco anche con milioni di repliche.
+#
+# Due passaggi sull'archivio: il primo accumula statistiche in streaming
+# (media, varianza, min/max, quantili), il secondo conta i valori su bordi
+# fissi. I grafici disegnano solo questi aggregati: istogrammi a bin,
+# boxplot dai quantili e densità 2D tempo × Φ al posto dello scatter dei
+# singoli punti. Il rendering è senza finestra (backend Agg).
+#
+# I bordi sono di ciascun sistema, dal suo minimo e massimo: con bordi comuni
+# su [0.05, 1] l'equity (Φ tra 0.99 e 1) cadrebbe in un solo bin. Un sistema
+# molto più stretto degli altri ha anche un riquadro ingrandito.
+#
+# Uso:
+#   phi-grafici [--cartella RISULTATI_50_...] [--radice .] [--elenco]
 
+import argparse
 import json
-import numpy as np
-import matplotlib.pyplot as plt
 import os
 
-# Trova l'ultima cartella risultati
-cartelle = [d for d in os.listdir('.') if d.startswith('RISULTATI_50_')]
-if not cartelle:
-    print("❌ Nessuna cartella risultati trovata!")
-    exit()
-
-ultima_cartella = max(cartelle)  # Prende la più recente
-print(f"📁 Analisi cartella: {ultima_cartella}")
-
-# Carica risultati completi
-with open(f"{ultima_cartella}/RISULTATI_COMPLETI.json", 'r') as f:
-    dati = json.load(f)
-
-# Estrai dati
-eq_phi = dati['statistiche']['equity']['phi_valori']
-ex_phi = dati['statistiche']['extractive']['phi_valori']
-eq_tempo = dati['statistiche']['equity']['tempo_valori']
-ex_tempo = dati['statistiche']['extractive']['tempo_valori']
-
-print(f"\n📈 DATI CARICATI:")
-print(f"   Equity: {len(eq_phi)} valori Φ")
-print(f"   Extractive: {len(ex_phi)} valori Φ")
-
-# === CREA GRAFICI ===
-plt.figure(figsize=(15, 10))
-
-# 1. Istogramma distribuzione Φ
-plt.subplot(2, 3, 1)
-plt.hist(eq_phi, alpha=0.7, bins=15, label='Equity', color='blue', density=True)
-plt.hist(ex_phi, alpha=0.7, bins=15, label='Extractive', color='red', density=True)
-plt.xlabel('Valore Φ finale')
-plt.ylabel('Densità')
-plt.title('Distribuzione Φ (50 repliche)')
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# 2. Boxplot comparativo
-plt.subplot(2, 3, 2)
-data = [eq_phi, ex_phi]
-plt.boxplot(data, labels=['Equity', 'Extractive'])
-plt.ylabel('Valore Φ')
-plt.title('Boxplot: Equity vs Extractive')
-plt.grid(True, alpha=0.3)
-
-# 3. Scatter plot Φ vs Tempo
-plt.subplot(2, 3, 3)
-plt.scatter(eq_tempo, eq_phi, alpha=0.6, label='Equity', color='blue', s=30)
-plt.scatter(ex_tempo, ex_phi, alpha=0.6, label='Extractive', color='red', s=30)
-plt.xlabel('Tempo collasso (s)')
-plt.ylabel('Φ finale')
-plt.title('Φ vs Tempo di collasso')
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# 4. Grafico a barre medie
-plt.subplot(2, 3, 4)
-categorie = ['Equity', 'Extractive']
-medie = [np.mean(eq_phi), np.mean(ex_phi)]
-errori = [np.std(eq_phi), np.std(ex_phi)]
-bars = plt.bar(categorie, medie, yerr=errori, capsize=10, 
-               color=['blue', 'red'], alpha=0.7)
-plt.ylabel('Φ medio')
-plt.title('Φ medio ± deviazione standard')
-plt.grid(True, alpha=0.3, axis='y')
-
-# Aggiungi valori sulle barre
-for bar, val in zip(bars, medie):
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2., height + 0.01,
-             f'{val:.3f}', ha='center', va='bottom')
-
-# 5. Coefficiente di variazione
-plt.subplot(2, 3, 5)
-cv_eq = np.std(eq_phi) / np.mean(eq_phi) * 100
-cv_ex = np.std(ex_phi) / np.mean(ex_phi) * 100
-plt.bar(['Equity', 'Extractive'], [cv_eq, cv_ex], color=['blue', 'red'])
-plt.ylabel('Coefficiente di variazione (%)')
-plt.title('CV = (σ/μ) × 100%')
-plt.grid(True, alpha=0.3, axis='y')
-
-# 6. Rapporto varianze
-plt.subplot(2, 3, 6)
-var_ratio = (np.std(ex_phi)**2) / (np.std(eq_phi)**2)
-plt.bar(['Rapporto varianze'], [var_ratio], color='purple')
-plt.ylabel('Extractive var / Equity var')
-plt.title(f'Rapporto varianze: {var_ratio:.1f}x')
-plt.grid(True, alpha=0.3, axis='y')
-
-plt.tight_layout()
-
-# Salva grafico
-nome_file = f"{ultima_cartella}/analisi_grafica.png"
-plt.savefig(nome_file, dpi=150)
-print(f"\n💾 Grafico salvato: {nome_file}")
-
-# === TABELLA RIASSUNTIVA ===
-print(f"\n{'='*60}")
-print("📋 RIEPILOGO STATISTICO COMPLETO")
-print(f"{'='*60}")
-
-print(f"\n{'Metrica':<25} {'Equity':<15} {'Extractive':<15} {'Rapporto':<10}")
-print(f"{'-'*25} {'-'*15} {'-'*15} {'-'*10}")
-
-print(f"{'Φ medio':<25} {np.mean(eq_phi):<15.4f} {np.mean(ex_phi):<15.4f} {'':<10}")
-print(f"{'Φ dev.std.':<25} {np.std(eq_phi):<15.4f} {np.std(ex_phi):<15.4f} {np.std(ex_phi)/np.std(eq_phi):<10.1f}x")
-print(f"{'Φ varianza':<25} {np.var(eq_phi):<15.6f} {np.var(ex_phi):<15.6f} {np.var(ex_phi)/np.var(eq_phi):<10.1f}x")
-print(f"{'CV (%)':<25} {cv_eq:<15.2f} {cv_ex:<15.2f} {cv_ex/cv_eq:<10.1f}x")
-print(f"{'Tempo medio (s)':<25} {np.mean(eq_tempo):<15.2f} {np.mean(ex_tempo):<15.2f} {'':<10}")
-print(f"{'ΔΦ (E - Ex)':<25} {'':<15} {'':<15} {np.mean(eq_phi)-np.mean(ex_phi):<10.4f}")
-
-print(f"\n✅ Analisi completata!")
-print(f"📊 Guarda il grafico in: {nome_file}")
\ No newline at end of file
+import numpy as np
+
+from .aggregatore import StatisticheOnline
+from .archivio import ArchivioColonnare
+from .indice_risultati import FILE_COMPLETI, carica_indice
+
+SISTEMI = ('equity', 'extractive')
+NOMI = {'equity': 'Equity', 'extractive': 'Extractive'}
+COLORI = {'equity': 'blue', 'extractive': 'red'}
+MAPPE = {'equity': 'Blues', 'extractive': 'Reds'}
+COLONNE = ['tipo', 'phi_finale', 'tempo_collasso']
+BIN_ISTOGRAMMA = (15, 60)  # bin minimi e massimi: √n tra i due
+BIN_DENSITA = (10, 120)    # per lato dell'istogramma 2D
+ZOOM = 0.1                 # riquadro ingrandito sotto questa frazione dell'intervallo totale
+
+
+# === LETTURA ===
+def blocchi_colonne(cartella):
+    """Blocchi {colonna: array} di un'esecuzione: dall'archivio, o dal JSON per le cartelle senza"""
+    archivio = ArchivioColonnare(os.path.join(cartella, 'archivio'))
+    if archivio.schema is not None:
+        yield from archivio.blocchi(COLONNE)
+        return
+    # Cartelle senza archivio: le liste complete sono nel JSON solo con --valori-grezzi
+    with open(os.path.join(cartella, FILE_COMPLETI)) as f:
+        statistiche = json.load(f)['statistiche']
+    for sistema in SISTEMI:
+        if 'phi_valori' not in statistiche[sistema]:
+            raise ValueError(f"{cartella}: né archivio né valori grezzi da analizzare")
+        phi = np.asarray(statistiche[sistema]['phi_valori'], dtype=float)
+        yield {'tipo': np.full(len(phi), sistema),
+               'phi_finale': phi,
+               'tempo_collasso': np.asarray(statistiche[sistema]['tempo_valori'], dtype=float)}
+
+
+def _per_sistema(blocco):
+    """(sistema, Φ, tempo) per sistema, senza le righe con valori non finiti"""
+    for sistema in SISTEMI:
+        maschera = blocco['tipo'] == sistema
+        phi = blocco['phi_finale'][maschera]
+        tempo = blocco['tempo_collasso'][maschera]
+        finiti = np.isfinite(phi) & np.isfinite(tempo)
+        yield sistema, phi[finiti], tempo[finiti]
+
+
+def riassunti(cartella):
+    """Primo passaggio: statistiche in streaming di Φ e tempo per sistema"""
+    statistiche = {s: {'phi': StatisticheOnline(), 'tempo': StatisticheOnline()} for s in SISTEMI}
+    for blocco in blocchi_colonne(cartella):
+        for sistema, phi, tempo in _per_sistema(blocco):
+            statistiche[sistema]['phi'].aggiungi_molti(phi)
+            statistiche[sistema]['tempo'].aggiungi_molti(tempo)
+    return statistiche
+
+
+def _bordi(statistiche, numero):
+    """Bordi dal minimo al massimo di un solo sistema"""
+    if not statistiche.n:  # sistema assente: bordi qualsiasi, i conteggi restano a zero
+        return np.linspace(0.0, 1.0, numero + 1)
+    minimo, massimo = statistiche.minimo, statistiche.massimo
+    if not massimo > minimo:  # tutti i valori uguali: un intervallo minimo attorno
+        minimo, massimo = minimo - 0.5e-3, massimo + 0.5e-3
+    return np.linspace(minimo, massimo, numero + 1)
+
+
+def numero_bin(n, limiti):
+    """√n bin, entro i limiti (minimo, massimo)"""
+    return int(np.clip(np.sqrt(n), *limiti))
+
+
+def istogrammi(cartella, statistiche, bin_istogramma=None, bin_densita=None):
+    """
+    Secondo passaggio: conteggi su bordi propri di ciascun sistema, accumulati blocco per blocco.
+    Ritorna (bordi_phi, conteggi_phi, bordi_tempo, bordi_phi_2d, densita), tutti dizionari
+    per sistema: conteggi_phi[s] di forma (bin_istogramma,) e densita[s] di forma
+    (bin_densita, bin_densita); senza numero di bin esplicito si usa numero_bin() sul
+    sistema più numeroso
+    """
+    n = max(statistiche[s]['phi'].n for s in SISTEMI)
+    bin_istogramma = bin_istogramma or numero_bin(n, BIN_ISTOGRAMMA)
+    bin_densita = bin_densita or numero_bin(n, BIN_DENSITA)
+    bordi_phi = {s: _bordi(statistiche[s]['phi'], bin_istogramma) for s in SISTEMI}
+    bordi_tempo = {s: _bordi(statistiche[s]['tempo'], bin_densita) for s in SISTEMI}
+    bordi_phi_2d = {s: _bordi(statistiche[s]['phi'], bin_densita) for s in SISTEMI}
+    conteggi = {s: np.zeros(bin_istogramma, dtype=np.int64) for s in SISTEMI}
+    densita = {s: np.zeros((bin_densita, bin_densita), dtype=np.int64) for s in SISTEMI}
+    for blocco in blocchi_colonne(cartella):
+        for sistema, phi, tempo in _per_sistema(blocco):
+            conteggi[sistema] += np.histogram(phi, bordi_phi[sistema])[0]
+            densita[sistema] += np.histogram2d(tempo, phi, [bordi_tempo[sistema], bordi_phi_2d[sistema]])[0].astype(np.int64)
+    return bordi_phi, conteggi, bordi_tempo, bordi_phi_2d, densita
+
+
+def statistiche_boxplot(statistiche, etichetta):
+    """Dizionario per Axes.bxp dai quantili dello sketch (baffi a 1.5 IQR, senza outlier)"""
+    q1, mediana, q3 = (statistiche.quantile(q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    return {'label': etichetta, 'med': mediana, 'q1': q1, 'q3': q3,
+            'whislo': max(statistiche.minimo, q1 - 1.5 * iqr),
+            'whishi': min(statistiche.massimo, q3 + 1.5 * iqr),
+            'fliers': []}
+
+
+# === GRAFICI ===
+def disegna(cartella, statistiche, nome_file):
+    """Figura a sei pannelli dagli aggregati; ritorna il percorso del PNG"""
+    # matplotlib solo qui, e senza display: importare il modulo resta leggero
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+    from matplotlib.patches import Patch
+
+    bordi_phi, conteggi, bordi_tempo, bordi_phi_2d, densita = istogrammi(cartella, statistiche)
+    phi = {s: statistiche[s]['phi'] for s in SISTEMI}
+    n_repliche = max(phi[s].n for s in SISTEMI)
+
+    fig, assi = plt.subplots(2, 3, figsize=(15, 10))
+
+    # 1. Istogramma distribuzione Φ (densità, bin di ciascun sistema)
+    ax = assi[0, 0]
+    presenti = [s for s in SISTEMI if phi[s].n]
+    valori_densita = {s: conteggi[s] / (phi[s].n * np.diff(bordi_phi[s])) for s in presenti}
+    for s in presenti:
+        ax.stairs(valori_densita[s], bordi_phi[s], fill=True, alpha=0.7, label=NOMI[s], color=COLORI[s])
+    ax.set_xlabel('Valore Φ finale')
+    ax.set_ylabel('Densità')
+    ax.set_title(f'Distribuzione Φ ({n_repliche} repliche)')
+    ax.legend(loc='upper left')
+    ax.grid(True, alpha=0.3)
+    # Un sistema molto più stretto degli altri è un picco alto e sottile: l'asse y
+    # segue gli altri e la sua forma va in un riquadro ingrandito
+    totale = max(phi[s].massimo for s in presenti) - min(phi[s].minimo for s in presenti) if presenti else 0
+    stretti = [s for s in presenti if phi[s].massimo - phi[s].minimo < ZOOM * totale]
+    larghi = [s for s in presenti if s not in stretti]
+    if stretti and larghi:
+        # metà alta libera per i riquadri, la legenda resta a sinistra
+        ax.set_ylim(0, 2 * max(valori_densita[s].max() for s in larghi))
+        larghezza = 0.5 / len(stretti)
+        for i, s in enumerate(stretti):
+            riquadro = ax.inset_axes([0.47 + i * larghezza, 0.56, larghezza - 0.04, 0.36])
+            riquadro.stairs(valori_densita[s], bordi_phi[s], fill=True, alpha=0.7, color=COLORI[s])
+            riquadro.set_title(f'{NOMI[s]} (ingrandito)', fontsize=8)
+            riquadro.tick_params(labelsize=7)
+            riquadro.grid(True, alpha=0.3)
+
+    # 2. Boxplot comparativo dai quantili
+    ax = assi[0, 1]
+    ax.bxp([statistiche_boxplot(phi[s], NOMI[s]) for s in SISTEMI], showfliers=False)
+    ax.set_ylabel('Valore Φ')
+    ax.set_title('Boxplot: Equity vs Extractive')
+    ax.grid(True, alpha=0.3)
+
+    # 3. Densità Φ vs Tempo (istogramma 2D, scala logaritmica)
+    ax = assi[0, 2]
+    for s in SISTEMI:
+        if densita[s].any():
+            # vmin sotto 1: anche le celle con un solo valore restano visibili
+            ax.pcolormesh(bordi_tempo[s], bordi_phi_2d[s], np.ma.masked_equal(densita[s], 0).T,
+                          cmap=MAPPE[s], norm=LogNorm(vmin=0.2, vmax=max(densita[s].max(), 1)),
+                          alpha=0.8, shading='flat')
+    ax.set_xlabel('Tempo collasso (s)')
+    ax.set_ylabel('Φ finale')
+    ax.set_title('Φ vs Tempo di collasso (densità)')
+    ax.legend(handles=[Patch(color=COLORI[s], alpha=0.6, label=NOMI[s]) for s in SISTEMI])
+    ax.grid(True, alpha=0.3)
+
+    # 4. Grafico a barre medie
+    ax = assi[1, 0]
+    categorie = [NOMI[s] for s in SISTEMI]
+    medie = [phi[s].media for s in SISTEMI]
+    errori = [phi[s].std for s in SISTEMI]
+    bars = ax.bar(categorie, medie, yerr=errori, capsize=10,
+                  color=[COLORI[s] for s in SISTEMI], alpha=0.7)
+    ax.set_ylabel('Φ medio')
+    ax.set_title('Φ medio ± deviazione standard')
+    ax.grid(True, alpha=0.3, axis='y')
+    for bar, val in zip(bars, medie):
+        ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height() + 0.01,
+                f'{val:.3f}', ha='center', va='bottom')
+
+    # 5. Coefficiente di variazione
+    ax = assi[1, 1]
+    ax.bar(categorie, [phi[s].cv for s in SISTEMI], color=[COLORI[s] for s in SISTEMI])
+    ax.set_ylabel('Coefficiente di variazione (%)')
+    ax.set_title('CV = (σ/μ) × 100%')
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # 6. Rapporto varianze
+    ax = assi[1, 2]
+    var_ratio = phi['extractive'].varianza / phi['equity'].varianza
+    ax.bar(['Rapporto varianze'], [var_ratio], color='purple')
+    ax.set_ylabel('Extractive var / Equity var')
+    ax.set_title(f'Rapporto varianze: {var_ratio:.1f}x')
+    ax.grid(True, alpha=0.3, axis='y')
+
+    fig.tight_layout()
+    fig.savefig(nome_file, dpi=150)
+    plt.close(fig)
+    return nome_file
+
+
+def stampa_riepilogo(statistiche):
+    eq, ex = statistiche['equity'], statistiche['extractive']
+    print(f"\n{'='*60}")
+    print("📋 RIEPILOGO STATISTICO COMPLETO")
+    print(f"{'='*60}")
+
+    print(f"\n{'Metrica':<25} {'Equity':<15} {'Extractive':<15} {'Rapporto':<10}")
+    print(f"{'-'*25} {'-'*15} {'-'*15} {'-'*10}")
+
+    print(f"{'Φ medio':<25} {eq['phi'].media:<15.4f} {ex['phi'].media:<15.4f} {'':<10}")
+    print(f"{'Φ dev.std.':<25} {eq['phi'].std:<15.4f} {ex['phi'].std:<15.4f} {ex['phi'].std/eq['phi'].std:<10.1f}x")
+    print(f"{'Φ varianza':<25} {eq['phi'].varianza:<15.6f} {ex['phi'].varianza:<15.6f} "
+          f"{ex['phi'].varianza/eq['phi'].varianza:<10.1f}x")
+    print(f"{'CV (%)':<25} {eq['phi'].cv:<15.2f} {ex['phi'].cv:<15.2f} {ex['phi'].cv/eq['phi'].cv:<10.1f}x")
+    print(f"{'Tempo medio (s)':<25} {eq['tempo'].media:<15.2f} {ex['tempo'].media:<15.2f} {'':<10}")
+    print(f"{'ΔΦ (E - Ex)':<25} {'':<15} {'':<15} {eq['phi'].media-ex['phi'].media:<10.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisi grafica dei risultati di test_50_repliche")
+    parser.add_argument("--cartella", default=None,
+                        help="esecuzione da analizzare (default: la più recente nell'indice)")
+    parser.add_argument("--radice", default='.', help="cartella che contiene le esecuzioni")
+    parser.add_argument("--elenco", action="store_true", help="elenca le esecuzioni indicizzate ed esce")
+    args = parser.parse_args()
+
+    print("📊 ANALISI GRAFICA RISULTATI 50 REPLICHE")
+    print("=" * 50)
+
+    esecuzioni = carica_indice(args.radice)
+    if args.elenco:
+        for voce in esecuzioni:
+            repliche = voce['repliche'] if voce['repliche'] is not None else '?'
+            print(f"   {voce['cartella']}  {repliche} repliche  "
+                  f"{'archivio' if voce['archivio'] else 'solo JSON'}")
+        return
+
+    if args.cartella is not None:
+        cartella = args.cartella
+    elif esecuzioni:
+        cartella = os.path.join(args.radice, esecuzioni[-1]['cartella'])  # la più recente
+    else:
+        print("❌ Nessuna cartella risultati trovata!")
+        return
+    print(f"📁 Analisi cartella: {cartella}")
+
+    statistiche = riassunti(cartella)
+
+    print(f"\n📈 DATI CARICATI:")
+    print(f"   Equity: {statistiche['equity']['phi'].n} valori Φ")
+    print(f"   Extractive: {statistiche['extractive']['phi'].n} valori Φ")
+
+    nome_file = disegna(cartella, statistiche, os.path.join(cartella, 'analisi_grafica.png'))
+    print(f"\n💾 Grafico salvato: {nome_file}")
+
+    stampa_riepilogo(statistiche)
+
+    print(f"\n✅ Analisi completata!")
+    print(f"📊 Guarda il grafico in: {nome_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# === archivio.py ===
+# Archivio colonnare dei risultati per replica: una riga per replica, una
+# colonna per campo (i dizionari annidati come 'parametri' diventano colonne
+# 'parametri.N', 'parametri.seed', ...). Le righe si accumulano in memoria e
+# vengono scritte a blocchi in file .npz numerati: poche scritture per sweep
+# invece di un file JSON per replica.
+#
+#   archivio/
+#     schema.json         campi, tipi e ordine delle chiavi
+#     parte_00000.npz     un blocco di righe (una array per colonna)
+#     parte_00001.npz
+#
+# Le parti hanno una data fissa nelle voci zip (np.savez usa l'ora corrente):
+# gli stessi risultati scritti di nuovo producono gli stessi byte.
+#
+# Uso da riga di comando (conversione di cartelle esistenti):
+#   python archivio.py importa RISULTATI_50_... [destinazione]
+
+import glob
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+DIMENSIONE_BLOCCO = 10000  # righe per file .npz
+SEPARATORE = '.'
+DATA_ZIP = (1980, 1, 1, 0, 0, 0)  # la data minima del formato zip
+
+
+def salva_npz(f, colonne):
+    """Come np.savez (non compresso), ma con una data fissa: stesso contenuto, stessi byte"""
+    with zipfile.ZipFile(f, 'w', allowZip64=True) as archivio_zip:
+        for nome, valori in colonne.items():
+            voce = zipfile.ZipInfo(nome + '.npy', date_time=DATA_ZIP)
+            with archivio_zip.open(voce, 'w', force_zip64=True) as g:
+                np.lib.format.write_array(g, np.asanyarray(valori))
+
+
+def _appiattisci(risultato, prefisso=''):
+    """{'a': 1, 'p': {'N': 100}} -> [('a', 1), ('p.N', 100)] nell'ordine delle chiavi"""
+    campi = []
+    for chiave, valore in risultato.items():
+        percorso = f"{prefisso}{chiave}"
+        if isinstance(valore, dict):
+            campi.extend(_appiattisci(valore, percorso + SEPARATORE))
+        else:
+            campi.append((percorso, valore))
+    return campi
+
+
+def _tipo_valore(valore):
+    if valore is None:
+        return None
+    if isinstance(valore, (bool, np.bool_)):
+        return 'bool'
+    if isinstance(valore, (int, np.integer)):
+        return 'int'
+    if isinstance(valore, (float, np.floating)):
+        return 'float'
+    if isinstance(valore, str):
+        return 'str'
+    raise TypeError(f"Valore non archiviabile in colonna: {valore!r}")
+
+
+def _ricostruisci(campi):
+    """Inverso di _appiattisci: [('p.N', 100)] -> {'p': {'N': 100}}"""
+    risultato = {}
+    for percorso, valore in campi:
+        nodo = risultato
+        *genitori, foglia = percorso.split(SEPARATORE)
+        for chiave in genitori:
+            nodo = nodo.setdefault(chiave, {})
+        nodo[foglia] = valore
+    return risultato
+
+
+class ArchivioColonnare:
+    """Scrittura a blocchi e lettura per colonne dei risultati per replica"""
+
+    def __init__(self, cartella, dimensione_blocco=DIMENSIONE_BLOCCO, scrittore=None):
+        """scrittore: ScrittoreAsincrono opzionale; chiudi() aspetta che le parti siano su disco"""
+        self.cartella = cartella
+        self.dimensione_blocco = dimensione_blocco
+        self.scrittore = scrittore
+        self.schema = None
+        self._righe = []
+        self._parti = 0
+
+        percorso_schema = os.path.join(cartella, 'schema.json')
+        if os.path.exists(percorso_schema):
+            with open(percorso_schema) as f:
+                self.schema = json.load(f)
+            self._parti = len(self._file_parti())
+
+    # === SCRITTURA ===
+    def aggiungi(self, risultato):
+        """Accoda il dizionario di una replica; scrive un blocco ogni dimensione_blocco righe"""
+        campi = _appiattisci(risultato)
+        if self.schema is None:
+            self._crea_schema(campi)
+        else:
+            self._verifica_schema(campi)
+        self._righe.append([valore for _, valore in campi])
+        if len(self._righe) >= self.dimensione_blocco:
+            self.scrivi_blocco()
+
+    def aggiungi_molti(self, risultati):
+        for risultato in risultati:
+            self.aggiungi(risultato)
+
+    def scrivi_blocco(self):
+        """Scrive le righe in attesa in un nuovo file parte_XXXXX.npz"""
+        if not self._righe:
+            return
+        os.makedirs(self.cartella, exist_ok=True)
+        colonne = {}
+        for j, (nome, tipo) in enumerate(self.schema['campi']):
+            valori = [riga[j] for riga in self._righe]
+            colonne[nome] = self._colonna(valori, tipo)
+
+        nome_file = os.path.join(self.cartella, f"parte_{self._parti:05d}.npz")
+        if self.scrittore is not None:
+            self.scrittore.scrivi_npz(nome_file, colonne)
+        else:
+            temporaneo = nome_file + '.tmp'
+            with open(temporaneo, 'wb') as f:
+                salva_npz(f, colonne)
+            os.replace(temporaneo, nome_file)  # mai una parte scritta a metà
+
+        self._parti += 1
+        self._righe = []
+
+    def chiudi(self):
+        self.scrivi_blocco()
+        if self.scrittore is not None:
+            self.scrittore.svuota()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.chiudi()
+
+    def _crea_schema(self, campi):
+        tipi = [_tipo_valore(valore) for _, valore in campi]
+        self.schema = {
+            'versione': 1,
+            'campi': [[nome, tipo or 'float'] for (nome, _), tipo in zip(campi, tipi)],
+        }
+        os.makedirs(self.cartella, exist_ok=True)
+        with open(os.path.join(self.cartella, 'schema.json'), 'w') as f:
+            json.dump(self.schema, f, indent=2)
+
+    def _verifica_schema(self, campi):
+        nomi = [nome for nome, _ in self.schema['campi']]
+        if [nome for nome, _ in campi] != nomi:
+            raise ValueError(f"Campi diversi dallo schema dell'archivio {self.cartella}: "
+                             f"{[nome for nome, _ in campi]} invece di {nomi}")
+        # Stesso tipo della colonna, altrimenti np.array convertirebbe in silenzio
+        # (None resta ammesso nelle colonne float, dove diventa NaN)
+        for (nome, valore), (_, tipo) in zip(campi, self.schema['campi']):
+            tipo_valore = _tipo_valore(valore)
+            if tipo_valore != tipo and not (tipo_valore is None and tipo == 'float'):
+                raise ValueError(f"Campo {nome} di tipo {tipo_valore or 'None'} nella colonna {tipo} "
+                                 f"dell'archivio {self.cartella}: {valore!r}")
+
+    @staticmethod
+    def _colonna(valori, tipo):
+        # None è ammesso solo nelle colonne float, dove diventa NaN
+        if tipo == 'float':
+            return np.array([np.nan if v is None else v for v in valori], dtype=np.float64)
+        if tipo == 'int':
+            return np.array(valori, dtype=np.int64)
+        if tipo == 'bool':
+            return np.array(valori, dtype=bool)
+        return np.array(valori, dtype=str)
+
+    # === LETTURA ===
+    def _file_parti(self):
+        return sorted(glob.glob(os.path.join(self.cartella, 'parte_*.npz')))
+
+    def colonne(self):
+        return [nome for nome, _ in self.schema['campi']] if self.schema else []
+
+    def __len__(self):
+        totale = len(self._righe)
+        for nome_file in self._file_parti():
+            with np.load(nome_file) as parte:
+                totale += len(parte[self.schema['campi'][0][0]])
+        return totale
+
+    def blocchi(self, colonne=None):
+        """
+        Genera un dizionario {colonna: array} per ogni parte, leggendo solo le
+        colonne richieste: la memoria resta quella di un blocco, per archivi
+        più grandi della RAM
+        """
+        if self.schema is None:
+            return
+        if colonne is None:
+            colonne = self.colonne()
+        for nome_file in self._file_parti():
+            with np.load(nome_file) as parte:
+                yield {nome: parte[nome] for nome in colonne}
+        if self._righe:
+            indici = {nome: j for j, (nome, _) in enumerate(self.schema['campi'])}
+            tipi = dict(self.schema['campi'])
+            yield {nome: self._colonna([riga[indici[nome]] for riga in self._righe], tipi[nome])
+                   for nome in colonne}
+
+    def leggi(self, colonne=None):
+        """Dizionario {colonna: array} con tutte le righe; carica solo le colonne richieste"""
+        if self.schema is None:
+            return {}
+        if colonne is None:
+            colonne = self.colonne()
+        pezzi = {nome: [] for nome in colonne}
+        for blocco in self.blocchi(colonne):
+            for nome in colonne:
+                pezzi[nome].append(blocco[nome])
+        return {nome: np.concatenate(p) if p else np.array([]) for nome, p in pezzi.items()}
+
+    def righe(self):
+        """Ricostruisce i dizionari originali, nello stesso ordine e con gli stessi tipi"""
+        dati = self.leggi()
+        campi = self.schema['campi'] if self.schema else []
+        n = len(dati[campi[0][0]]) if campi else 0
+        convertitori = {'int': int, 'float': float, 'bool': bool, 'str': str}
+        for i in range(n):
+            valori = []
+            for nome, tipo in campi:
+                valore = convertitori[tipo](dati[nome][i])
+                if tipo == 'float' and np.isnan(valore):
+                    valore = None
+                valori.append((nome, valore))
+            yield _ricostruisci(valori)
+
+
+# === CONVERSIONE DI CARTELLE ESISTENTI ===
+SCHEMI_FILE = ('*_rep_*.json', 'mix_*_rep_*.json', '*_replica_*.json')
+
+
+def importa_cartella(origine, destinazione=None, dimensione_blocco=DIMENSIONE_BLOCCO):
+    """
+    Importa i JSON per replica di una cartella (raw/ di test_50_repliche,
+    cartella di sistemi_misti, ...) in un archivio colonnare.
+    Un archivio già presente in destinazione viene ricostruito (come
+    campagna._archivio_nuovo): importare due volte non accoda duplicati.
+    Ritorna l'archivio; i file originali non vengono toccati.
+    """
+    if os.path.isdir(os.path.join(origine, 'raw')):
+        origine = os.path.join(origine, 'raw')
+    file_json = set()
+    for schema_file in SCHEMI_FILE:
+        file_json.update(glob.glob(os.path.join(origine, schema_file)))
+    if not file_json:
+        raise FileNotFoundError(f"Nessun JSON per replica in {origine}")
+
+    if destinazione is None:
+        destinazione = os.path.join(origine, 'archivio')
+    # Solo i file dell'archivio: la destinazione può contenere altro
+    for nome_file in glob.glob(os.path.join(destinazione, 'parte_*.npz')) + [os.path.join(destinazione, 'schema.json')]:
+        if os.path.exists(nome_file):
+            os.remove(nome_file)
+    archivio = ArchivioColonnare(destinazione, dimensione_blocco=dimensione_blocco)
+    for nome_file in sorted(file_json):
+        with open(nome_file) as f:
+            archivio.aggiungi(json.load(f))
+    archivio.chiudi()
+    return archivio
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != 'importa':
+        print("Uso: python archivio.py importa CARTELLA [DESTINAZIONE]")
+        sys.exit(1)
+    archivio = importa_cartella(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"✅ Importate {len(archivio)} repliche in {archivio.cartella}")
+    print(f"   Colonne: {', '.join(archivio.colonne())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# === benchmark.py ===
+# Benchmark dei percorsi caldi: kernel di Φ, singolo passo, evolve completo
+# e sweep completi per ogni classe di simulatore, su una matrice di N e di
+# numero di repliche. Per ogni caso riporta il throughput in passi-replica
+# al secondo (passi nominali t_max/dt: le repliche che convergono prima ne
+# eseguono meno) e il picco di memoria allocata (tracemalloc, che vede
+# anche i buffer numpy). I risultati si salvano in JSON e si confrontano
+# con un riferimento salvato per segnalare le regressioni.
+#
+# Uso:
+#   phi-benchmark [--rapido] [--N 100 1000 ...] [--repliche 1 10 ...]
+#                 [--salva FILE] [--riferimento FILE] [--tolleranza 0.2]
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from .ensemble import EnsembleMisto, EnsemblePhiAvanzato, _Lavoro, griglia_tempi
+from .kuramoto import SistemaKuramoto
+from .ordine import ParametroOrdine
+from .parallelo import esegui_griglia
+from .reti import SistemaKuramotoRete, rete_erdos_renyi
+from .sistemi_misti import MIX_PROPORZIONI, SistemaMisto
+from .test_50_repliche import SistemaPhiAvanzato
+from .test_robustezza import SistemaPhiRobustezza
+
+N_DEFAULT = (10**2, 10**3, 10**4, 10**5, 10**6)
+REPLICHE_DEFAULT = (1, 10, 100)
+N_RAPIDO = (10**2, 10**3, 10**4)
+REPLICHE_RAPIDO = (1, 10)
+TEMPO_MINIMO = 0.2      # secondi di misura per caso (ripete le esecuzioni brevi)
+RIPETIZIONI_MAX = 50    # lotti cronometrati al massimo per caso
+DURATA_LOTTO = 0.01     # secondi minimi di un lotto di chiamate
+TOLLERANZA = 0.20       # calo di throughput (o aumento di memoria) oltre cui è regressione
+MEMORIA_MINIMA_MB = 1.0 # aumenti di memoria più piccoli di così non contano
+N_FISSO = 100           # i simulatori degli script hanno N = 100 nel costruttore
+
+
+# === CASI ===
+# Ogni caso prepara lo stato per (N, R) e ritorna (esegui, passi_replica):
+# esegui() è la funzione cronometrata, passi_replica i passi-replica che svolge.
+
+def _caso_calcola_phi(N, R):
+    rng = np.random.default_rng(0)
+    A = rng.random((R, N))
+    A /= A.sum(axis=1, keepdims=True)
+    theta = rng.uniform(0, 2 * np.pi, (R, N))
+    ordine = ParametroOrdine(A)
+    return (lambda: ordine.phi(theta)), R
+
+
+def _caso_passo_ensemble(N, R):
+    ensemble = EnsembleMisto(0.5, range(1, R + 1), N=N)
+    theta = ensemble.theta.copy()
+    rumore = np.random.default_rng(0).standard_normal((R, N))
+    lavoro = _Lavoro(theta.shape, theta.dtype, ensemble.buffer_passo)
+    costanti = ensemble._costanti(ensemble.A)
+    return (lambda: ensemble._passo(theta, ensemble.A, costanti, rumore, 1.0, lavoro)), R
+
+
+def _caso_passo_kuramoto(N, R):
+    sistema = SistemaKuramoto(N=N, rumore=0.1)
+    return sistema.passo, 1
+
+
+def _caso_passo_rete(N, R):
+    rete = rete_erdos_renyi(N, 10, np.random.default_rng(0))
+    sistema = SistemaKuramotoRete(rete, rumore=0.1)
+    return sistema.passo, 1
+
+
+def _caso_evolve_ensemble_misto(N, R):
+    passi = len(griglia_tempi(EnsembleMisto.dt, EnsembleMisto.t_max))
+    return (lambda: EnsembleMisto(0.5, range(1, R + 1), N=N).evolve()), R * passi
+
+
+def _caso_evolve_ensemble_misto_float32(N, R):
+    passi = len(griglia_tempi(EnsembleMisto.dt, EnsembleMisto.t_max))
+    return (lambda: EnsembleMisto(0.5, range(1, R + 1), N=N, precisione='float32').evolve()), R * passi
+
+
+def _caso_evolve_ensemble_phi(N, R):
+    passi = len(griglia_tempi(EnsemblePhiAvanzato.dt, EnsemblePhiAvanzato.t_max))
+    return (lambda: EnsemblePhiAvanzato('extractive', range(1, R + 1), N=N).evolve()), R * passi
+
+
+def _caso_evolve_kuramoto(N, R):
+    passi = int(round(5.0 / 0.05))
+    return (lambda: SistemaKuramoto(N=N, rumore=0.1).evolve()), passi
+
+
+def _caso_evolve_phi_avanzato(N, R):
+    passi = len(griglia_tempi(0.05, 5.0))
+    return (lambda: SistemaPhiAvanzato('extractive', 1).evolve()), passi
+
+
+def _caso_evolve_misto(N, R):
+    passi = len(griglia_tempi(0.05, 5.0))
+    return (lambda: SistemaMisto(0.5, 1).evolve()), passi
+
+
+def _caso_evolve_robustezza(N, R):
+    passi = len(griglia_tempi(0.1, 5.0))
+    return (lambda: SistemaPhiRobustezza('extractive').evolve()), passi
+
+
+def _caso_sweep_test50(N, R):
+    """Il lavoro di esegui_test_completo senza I/O: due sistemi × R repliche"""
+    passi = len(griglia_tempi(EnsemblePhiAvanzato.dt, EnsemblePhiAvanzato.t_max))
+
+    def esegui():
+        for sistema in ('equity', 'extractive'):
+            EnsemblePhiAvanzato(sistema, range(1, R + 1)).evolve()
+    return esegui, 2 * R * passi
+
+
+def _caso_sweep_misti(N, R):
+    """Il lavoro di esegui_esperimenti_misti senza I/O: griglia dei mix × R repliche"""
+    passi = len(griglia_tempi(EnsembleMisto.dt, EnsembleMisto.t_max))
+
+    def esegui():
+        for _ in esegui_griglia(MIX_PROPORZIONI, R):  # generatore: i blocchi vanno consumati
+            pass
+    return esegui, len(MIX_PROPORZIONI) * R * passi
+
+
+def _caso_sweep_robustezza(N, R):
+    passi = len(griglia_tempi(0.1, 5.0))
+
+    def esegui():
+        for sistema in ('equity', 'extractive'):
+            for replica in range(R):
+                SistemaPhiRobustezza(sistema, seed=42 + replica * 100).evolve()
+    return esegui, 2 * R * passi
+
+
+def _caso_sweep_kuramoto(N, R):
+    passi = int(round(5.0 / 0.05))
+
+    def esegui():
+        for replica in range(1, R + 1):
+            SistemaKuramoto(N=N, rumore=0.1, replica_id=replica).evolve()
+    return esegui, R * passi
+
+
+def _caso_sweep_rete(N, R):
+    passi = int(round(5.0 / 0.05))
+
+    def esegui():
+        for replica in range(1, R + 1):
+            rete = rete_erdos_renyi(N, 10, np.random.default_rng(replica))
+            SistemaKuramotoRete(rete, rumore=0.1, replica_id=replica).evolve()
+    return esegui, R * passi
+
+
+# nome: (preparazione, usa N, usa R, massimo R × N)
+# Il limite evita i casi che non stanno in memoria: l'ensemble tiene un blocco
+# di rumore (R, BLOCCO_PASSI, N), 160 byte per elemento R × N.
+CASI = {
+    'calcola_phi': (_caso_calcola_phi, True, True, 10**7),
+    'passo_ensemble': (_caso_passo_ensemble, True, True, 10**7),
+    'passo_kuramoto': (_caso_passo_kuramoto, True, False, 10**7),
+    'passo_rete': (_caso_passo_rete, True, False, 10**6),
+    'evolve_ensemble_misto': (_caso_evolve_ensemble_misto, True, True, 2 * 10**6),
+    'evolve_ensemble_misto_float32': (_caso_evolve_ensemble_misto_float32, True, True, 4 * 10**6),
+    'evolve_ensemble_phi': (_caso_evolve_ensemble_phi, True, True, 2 * 10**6),
+    'evolve_kuramoto': (_caso_evolve_kuramoto, True, False, 10**7),
+    'evolve_SistemaPhiAvanzato': (_caso_evolve_phi_avanzato, False, False, None),
+    'evolve_SistemaMisto': (_caso_evolve_misto, False, False, None),
+    'evolve_SistemaPhiRobustezza': (_caso_evolve_robustezza, False, False, None),
+    'sweep_test50': (_caso_sweep_test50, False, True, None),
+    'sweep_misti': (_caso_sweep_misti, False, True, None),
+    'sweep_robustezza': (_caso_sweep_robustezza, False, True, None),
+    'sweep_kuramoto': (_caso_sweep_kuramoto, True, True, 10**7),
+    'sweep_rete': (_caso_sweep_rete, True, True, 10**6),
+}
+
+
+def combinazioni(casi, valori_N, valori_R):
+    """(caso, N, R) da misurare: i casi a N fisso o senza repliche non si ripetono"""
+    for nome in casi:
+        _, usa_N, usa_R, massimo = CASI[nome]
+        for N in (valori_N if usa_N else [N_FISSO]):
+            for R in (valori_R if usa_R else [1]):
+                if massimo is None or N * R <= massimo:
+                    yield nome, N, R
+
+
+# === MISURA ===
+def _cronometra(esegui, chiamate):
+    inizio = time.perf_counter()
+    for _ in range(chiamate):
+        esegui()
+    return time.perf_counter() - inizio
+
+
+def misura(nome, N, R, tempo_minimo=TEMPO_MINIMO, ripetizioni_max=RIPETIZIONI_MAX):
+    """Tempo migliore di esegui(), throughput e picco di memoria di un caso"""
+    preparazione = CASI[nome][0]
+
+    # Memoria: preparazione + una esecuzione sotto tracemalloc (rallenta, quindi a parte)
+    tracemalloc.start()
+    esegui, passi_replica = preparazione(N, R)
+    esegui()
+    _, picco = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    esegui, passi_replica = preparazione(N, R)
+
+    # Le chiamate brevi si cronometrano a lotti (come timeit.autorange), così il
+    # tempo misurato non è dominato dalla risoluzione del timer e dal rumore
+    chiamate = 1
+    while True:
+        durata = _cronometra(esegui, chiamate)
+        if durata >= DURATA_LOTTO:
+            break
+        chiamate *= 2
+    tempi = [durata]
+    while len(tempi) < ripetizioni_max and sum(tempi) < tempo_minimo:
+        tempi.append(_cronometra(esegui, chiamate))
+
+    migliore = min(tempi) / chiamate
+    return {
+        'caso': nome,
+        'N': N,
+        'repliche': R,
+        'passi_replica': passi_replica,
+        'ripetizioni': len(tempi) * chiamate,
+        'secondi': migliore,
+        'passi_replica_al_secondo': passi_replica / migliore,
+        'picco_memoria_mb': picco / 1024**2,
+    }
+
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'piattaforma': platform.platform(),
+        'processore': platform.processor() or platform.machine(),
+        'core': os.cpu_count(),
+    }
+
+
+def esegui_benchmark(casi=None, valori_N=N_DEFAULT, valori_R=REPLICHE_DEFAULT,
+                     tempo_minimo=TEMPO_MINIMO, verboso=False):
+    """Misura tutte le combinazioni; ritorna il dizionario da salvare in JSON"""
+    casi = list(CASI) if casi is None else casi
+    risultati = []
+    for nome, N, R in combinazioni(casi, valori_N, valori_R):
+        misurato = misura(nome, N, R, tempo_minimo)
+        risultati.append(misurato)
+        if verboso:
+            print(f"   {nome:<28} N={N:<8} R={R:<4} {misurato['passi_replica_al_secondo']:>14,.0f} passi/s  "
+                  f"{misurato['picco_memoria_mb']:>9.1f} MB")
+    return {
+        'timestamp': datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+        'ambiente': ambiente(),
+        'risultati': risultati,
+    }
+
+
+def confronta(attuale, riferimento, tolleranza=TOLLERANZA):
+    """
+    Confronta due esecuzioni sui casi comuni (caso, N, repliche).
+    Ritorna una voce per caso con il rapporto di throughput e di memoria
+    (attuale / riferimento) e il flag 'regressione'.
+    """
+    base = {(r['caso'], r['N'], r['repliche']): r for r in riferimento['risultati']}
+    confronti = []
+    for r in attuale['risultati']:
+        chiave = (r['caso'], r['N'], r['repliche'])
+        if chiave not in base:
+            continue
+        velocita = r['passi_replica_al_secondo'] / base[chiave]['passi_replica_al_secondo']
+        memoria = (r['picco_memoria_mb'] + 1e-9) / (base[chiave]['picco_memoria_mb'] + 1e-9)
+        crescita = r['picco_memoria_mb'] - base[chiave]['picco_memoria_mb']
+        confronti.append({
+            'caso': r['caso'],
+            'N': r['N'],
+            'repliche': r['repliche'],
+            'rapporto_velocita': velocita,
+            'rapporto_memoria': memoria,
+            'regressione': (velocita < 1 - tolleranza
+                            or (memoria > 1 + tolleranza and crescita > MEMORIA_MINIMA_MB)),
+        })
+    return confronti
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei simulatori Φ-risonanza")
+    parser.add_argument("--rapido", action="store_true", help=f"N {N_RAPIDO}, repliche {REPLICHE_RAPIDO}")
+    parser.add_argument("--N", type=int, nargs="+", default=None)
+    parser.add_argument("--repliche", type=int, nargs="+", default=None)
+    parser.add_argument("--casi", nargs="+", default=None, choices=list(CASI))
+    parser.add_argument("--tempo-minimo", type=float, default=TEMPO_MINIMO)
+    parser.add_argument("--salva", default=None, metavar="FILE",
+                        help="file JSON dei risultati (default BENCHMARK_<data_ora>.json)")
+    parser.add_argument("--riferimento", default=None, metavar="FILE",
+                        help="risultati salvati con cui confrontare (uscita 1 se ci sono regressioni)")
+    parser.add_argument("--tolleranza", type=float, default=TOLLERANZA)
+    args = parser.parse_args()
+
+    valori_N = args.N or (N_RAPIDO if args.rapido else N_DEFAULT)
+    valori_R = args.repliche or (REPLICHE_RAPIDO if args.rapido else REPLICHE_DEFAULT)
+
+    print("⏱️  BENCHMARK Φ-RISONANZA")
+    print("=" * 60)
+    print(f"N: {list(valori_N)}  repliche: {list(valori_R)}")
+    risultati = esegui_benchmark(args.casi, valori_N, valori_R, args.tempo_minimo, verboso=True)
+
+    percorso = args.salva or f"BENCHMARK_{risultati['timestamp']}.json"
+    with open(percorso, 'w') as f:
+        json.dump(risultati, f, indent=2)
+    print(f"\n💾 Risultati salvati in: {percorso}")
+
+    if args.riferimento is None:
+        return 0
+    with open(args.riferimento) as f:
+        riferimento = json.load(f)
+    confronti = confronta(risultati, riferimento, args.tolleranza)
+    regressioni = [c for c in confronti if c['regressione']]
+    print(f"\n📊 Confronto con {args.riferimento}: {len(confronti)} casi comuni")
+    for c in confronti:
+        segno = "❌" if c['regressione'] else "✅"
+        print(f"   {segno} {c['caso']:<28} N={c['N']:<8} R={c['repliche']:<4} "
+              f"velocità ×{c['rapporto_velocita']:.2f}  memoria ×{c['rapporto_memoria']:.2f}")
+    if regressioni:
+        print(f"\n⚠️  {len(regressioni)} regressioni oltre il {args.tolleranza*100:.0f}%")
+        return 1
+    print("\n✅ Nessuna regressione")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
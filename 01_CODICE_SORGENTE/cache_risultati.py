@@ -0,0 +1,218 @@
+# === cache_risultati.py ===
+# Cache persistente dei risultati di simulazione, indirizzata per contenuto.
+#
+# La chiave è l'hash SHA-256 di (modello, versione del codice, parametri,
+# seed/flussi, repliche): se nulla di tutto questo cambia, rieseguire uno
+# sweep restituisce i risultati salvati invece di simulare. La versione del
+# codice è l'hash dei sorgenti che definiscono la dinamica: modificare un
+# modello cambia le chiavi e i vecchi risultati non vengono più letti.
+#
+#   <cartella>/<modello>/<ab>/<hash>.json
+#
+# Le liste di risultati si possono anche scrivere e produrre un blocco alla
+# volta (ottieni_a_blocchi): chi consuma non deve tenere in memoria l'intera
+# voce mentre la calcola.
+#
+# La dimensione totale è limitata: oltre max_byte si eliminano le voci usate
+# meno di recente (LRU, sul tempo di modifica aggiornato a ogni lettura).
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+from .flussi_rng import FlussiRNG
+
+CARTELLA_CACHE = os.environ.get('PHI_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'phi_risonanza'))
+MAX_BYTE = 2 * 1024**3
+# Moduli che entrano nella dinamica di ogni modello (oltre al modulo del modello stesso)
+MODULI_DINAMICA = ('ensemble', 'ordine', 'flussi_rng')
+
+
+def versione_codice(modello):
+    """Hash dei sorgenti del modulo del modello e dei moduli della dinamica"""
+    h = hashlib.sha256()
+    moduli = [inspect.getmodule(modello)] + [sys.modules.get(f"{__package__}.{nome}") for nome in MODULI_DINAMICA]
+    for modulo in moduli:
+        if modulo is None:
+            continue
+        try:
+            sorgente = inspect.getsource(modulo)
+        except (OSError, TypeError):
+            continue
+        h.update(modulo.__name__.encode())
+        h.update(sorgente.encode())
+    return h.hexdigest()[:16]
+
+
+def _normalizza(valore):
+    """Rende serializzabili in JSON canonico i parametri (FlussiRNG, range, tuple, numpy)"""
+    if isinstance(valore, FlussiRNG):
+        return {'FlussiRNG': valore.seed}
+    if isinstance(valore, dict):
+        return {str(k): _normalizza(v) for k, v in valore.items()}
+    if isinstance(valore, (list, tuple, range)):
+        return [_normalizza(v) for v in valore]
+    if hasattr(valore, 'item'):
+        return valore.item()
+    return valore
+
+
+class CacheRisultati:
+    def __init__(self, cartella=CARTELLA_CACHE, max_byte=MAX_BYTE):
+        self.cartella = cartella
+        self.max_byte = max_byte
+        self.letture = 0
+        self.mancate = 0
+        self._versioni = {}
+
+    def _nome_modello(self, modello):
+        # Serve la classe: da un nome non si ricava la versione del codice
+        if isinstance(modello, str):
+            raise TypeError(f"Modello della cache come stringa ({modello!r}): passare la classe")
+        return modello.__qualname__
+
+    def chiave(self, modello, parametri):
+        """Hash di (modello, versione del codice, parametri normalizzati)"""
+        nome = self._nome_modello(modello)
+        if nome not in self._versioni:
+            self._versioni[nome] = versione_codice(modello)
+        contenuto = json.dumps({
+            'modello': nome,
+            'versione': self._versioni[nome],
+            'parametri': _normalizza(parametri),
+        }, sort_keys=True)
+        return hashlib.sha256(contenuto.encode()).hexdigest()
+
+    def _percorso(self, modello, chiave):
+        return os.path.join(self.cartella, self._nome_modello(modello), chiave[:2], chiave + '.json')
+
+    def contiene(self, modello, chiave):
+        return os.path.exists(self._percorso(modello, chiave))
+
+    def leggi(self, modello, chiave):
+        """Valore salvato o None; una lettura riuscita rinfresca la voce per l'LRU"""
+        percorso = self._percorso(modello, chiave)
+        try:
+            with open(percorso) as f:
+                valore = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.mancate += 1
+            return None
+        os.utime(percorso)
+        self.letture += 1
+        return valore
+
+    def scrivi(self, modello, chiave, valore):
+        percorso = self._percorso(modello, chiave)
+        os.makedirs(os.path.dirname(percorso), exist_ok=True)
+        temporaneo = f"{percorso}.{os.getpid()}.tmp"
+        with open(temporaneo, 'w') as f:
+            json.dump(valore, f)
+        os.replace(temporaneo, percorso)
+
+    def ottieni(self, modello, parametri, calcola):
+        """Ritorna il risultato in cache per (modello, parametri) o lo calcola e lo salva"""
+        chiave = self.chiave(modello, parametri)
+        valore = self.leggi(modello, chiave)
+        if valore is None:
+            valore = calcola()
+            self.scrivi(modello, chiave, valore)
+            self.pulisci()
+        return valore
+
+    def scrivi_a_blocchi(self, modello, chiave):
+        """Voce (lista JSON) scritta un blocco alla volta: vedi VoceInScrittura"""
+        return VoceInScrittura(self._percorso(modello, chiave))
+
+    def ottieni_a_blocchi(self, modello, parametri, calcola):
+        """
+        Come ottieni() per una lista prodotta a blocchi: calcola() è un iterabile di
+        liste. Produce i blocchi (la voce in cache come un unico blocco) e, se li
+        calcola, li scrive man mano; la voce compare solo a calcolo completato.
+        """
+        chiave = self.chiave(modello, parametri)
+        valore = self.leggi(modello, chiave)
+        if valore is not None:
+            yield valore
+            return
+        voce = self.scrivi_a_blocchi(modello, chiave)
+        try:
+            for blocco in calcola():
+                voce.aggiungi(blocco)
+                yield blocco
+        except BaseException:
+            voce.annulla()
+            raise
+        voce.chiudi()
+        self.pulisci()
+
+    def _voci(self):
+        voci = []
+        for radice, _, file in os.walk(self.cartella):
+            for nome in file:
+                if nome.endswith('.json'):
+                    percorso = os.path.join(radice, nome)
+                    stat = os.stat(percorso)
+                    voci.append((stat.st_mtime, stat.st_size, percorso))
+        return voci
+
+    def dimensione(self):
+        return sum(dim for _, dim, _ in self._voci())
+
+    def pulisci(self):
+        """Elimina le voci usate meno di recente finché la cache sta in max_byte"""
+        voci = self._voci()
+        totale = sum(dim for _, dim, _ in voci)
+        if totale <= self.max_byte:
+            return 0
+        eliminate = 0
+        for _, dim, percorso in sorted(voci):
+            if totale <= self.max_byte:
+                break
+            os.remove(percorso)
+            totale -= dim
+            eliminate += 1
+        return eliminate
+
+    def invalida(self, modello=None):
+        """Cancella le voci di un modello (o tutta la cache): da usare dopo modifiche alla dinamica"""
+        bersaglio = self.cartella if modello is None else os.path.join(self.cartella, self._nome_modello(modello))
+        eliminate = 0
+        for radice, _, file in os.walk(bersaglio, topdown=False):
+            for nome in file:
+                os.remove(os.path.join(radice, nome))
+                eliminate += 1
+            if radice != self.cartella:
+                os.rmdir(radice)
+        return eliminate
+
+
+class VoceInScrittura:
+    """Lista JSON scritta elemento per elemento in un .tmp, pubblicata da chiudi()"""
+
+    def __init__(self, percorso):
+        self.percorso = percorso
+        self._temporaneo = f"{percorso}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(percorso), exist_ok=True)
+        self._file = open(self._temporaneo, 'w')
+        self._file.write('[')
+        self._elementi = 0
+
+    def aggiungi(self, elementi):
+        for elemento in elementi:
+            if self._elementi:
+                self._file.write(', ')  # stessi separatori di json.dump
+            json.dump(elemento, self._file)
+            self._elementi += 1
+
+    def chiudi(self):
+        self._file.write(']')
+        self._file.close()
+        os.replace(self._temporaneo, self.percorso)
+
+    def annulla(self):
+        """Calcolo interrotto: niente voce parziale in cache"""
+        self._file.close()
+        os.remove(self._temporaneo)
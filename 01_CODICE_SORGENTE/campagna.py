@@ -0,0 +1,415 @@
+# === campagna.py ===
+# Campagne di simulazione dichiarative, divisibili su più macchine.
+# Una specifica (sistemi, mix, N, ε, repliche, seed) si espande in un
+# manifesto deterministico di compiti, ciascuno un blocco di repliche di una
+# cella (sistema, N, ε, mix). Il manifesto si divide in K shard che girano
+# in modo indipendente, su nodi diversi o come processi locali separati,
+# senza coordinamento: ogni shard scrive i propri blocchi in un Checkpoint
+# (ripresa automatica dopo un'interruzione) e il passo di unione ricompone
+# le cartelle dei risultati degli script, con il loro codice di aggregazione:
+#
+#   CAMPAGNA/
+#     manifesto.json            specifica, impronta, data e compiti
+#     shard_000_di_004/         checkpoint dello shard 0 di 4
+#     ...
+#     RISULTATI_50_<data>_N100/                 equity ed extractive, come test_50_repliche:
+#       RISULTATI_COMPLETI.json, dati_analisi.csv, archivio/
+#     SISTEMI_MISTI_<data>_N100_eps0.05/        misto, come sistemi_misti:
+#       RISULTATI_MISTI.json, archivio/
+#
+# Una cartella per N (e per ε nel misto). La data è quella del manifesto e
+# l'unione legge gli shard un compito alla volta: unire di nuovo riscrive gli
+# stessi byte. Le repliche di default sono quelle degli script (config.py).
+#
+# Ogni replica dipende solo dal proprio seed/flusso: il risultato unito è
+# identico qualunque sia il numero di shard o di nodi.
+#
+# Uso:
+#   phi-campagna manifesto CAMPAGNA [--specifica SPEC.json] [--shard K]
+#   phi-campagna esegui CAMPAGNA --shard I/K      (uno per nodo o processo)
+#   phi-campagna unisci CAMPAGNA
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from itertools import groupby
+
+from .aggregatore import StatisticheOnline
+from .archivio import ArchivioColonnare
+from .checkpoint import Checkpoint
+from .config import specifica_default
+from .ensemble import EnsembleMisto, EnsemblePhiAvanzato
+from .flussi_rng import FlussiRNG
+from .parallelo import REPLICHE_PER_UNITA, aggrega
+from .precisione import tipo_reale
+from .sistemi_misti import risultati_misti, statistiche_del_mix
+from .test_50_repliche import (INTESTAZIONE_CSV, intervalli_robustezza, riga_csv, risultati_robustezza,
+                               statistiche_sistema)
+
+SISTEMI_NOTI = ('equity', 'extractive', 'misto')
+EPSILON_MODELLI = 0.05  # ε è fisso in equity/extractive: lì la specifica può solo ripeterlo
+
+
+# === SPECIFICA E MANIFESTO ===
+def carica_specifica(percorso=None):
+    """Specifica di default (config.py) aggiornata con i campi del file JSON dato"""
+    specifica = specifica_default()
+    if percorso is not None:
+        with open(percorso) as f:
+            specifica.update(json.load(f))
+    valida_specifica(specifica)
+    return specifica
+
+
+def valida_specifica(specifica):
+    sconosciuti = set(specifica['sistemi']) - set(SISTEMI_NOTI)
+    if sconosciuti:
+        raise ValueError(f"Sistemi sconosciuti: {sorted(sconosciuti)} (ammessi: {SISTEMI_NOTI})")
+    if 'misto' in specifica['sistemi'] and not specifica['mix']:
+        raise ValueError("Il sistema 'misto' richiede almeno un valore di mix")
+    fissi = [s for s in specifica['sistemi'] if s != 'misto']  # solo il misto ha ε come parametro
+    if fissi and any(eps != EPSILON_MODELLI for eps in specifica['epsilon']):
+        raise ValueError(f"{fissi} usano ε = {EPSILON_MODELLI} fisso: epsilon {specifica['epsilon']} "
+                         "non sarebbe simulato davvero")
+    mancanti = set(specifica['sistemi']) - set(specifica['seed_base'])
+    if specifica['philox'] is None and mancanti:
+        raise ValueError(f"seed_base mancante per: {sorted(mancanti)}")
+    if ('equity' in specifica['sistemi']) != ('extractive' in specifica['sistemi']):
+        raise ValueError("equity ed extractive vanno insieme: l'unione scrive il loro confronto "
+                         "come test_50_repliche")
+    if isinstance(specifica['repliche'], dict):
+        mancanti = set(specifica['sistemi']) - set(specifica['repliche'])
+        if mancanti:
+            raise ValueError(f"repliche mancanti per: {sorted(mancanti)}")
+    if any(repliche_sistema(specifica, s) < 1 for s in specifica['sistemi']) or specifica['blocco'] < 1:
+        raise ValueError("repliche e blocco devono essere positivi")
+    tipo_reale(specifica.get('precisione', 'float64'))
+
+
+def repliche_sistema(specifica, sistema):
+    """Repliche di un sistema: 'repliche' è un numero unico o {sistema: repliche}"""
+    repliche = specifica['repliche']
+    return repliche[sistema] if isinstance(repliche, dict) else repliche
+
+
+def impronta(specifica):
+    """Identificativo stabile della specifica (JSON canonico → SHA-256)"""
+    testo = json.dumps(specifica, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(testo.encode('utf-8')).hexdigest()[:16]
+
+
+def espandi(specifica):
+    """
+    Compiti in ordine deterministico: sistema → N → ε → mix → blocco di repliche.
+    Ogni compito è {'id', 'sistema', 'mix', 'N', 'epsilon', 'repliche': [prima, ultima]}.
+    """
+    compiti = []
+    for sistema in specifica['sistemi']:
+        mix_list = specifica['mix'] if sistema == 'misto' else [None]
+        for N in specifica['N']:
+            for epsilon in specifica['epsilon']:
+                for mix in mix_list:
+                    repliche = repliche_sistema(specifica, sistema)
+                    for inizio in range(1, repliche + 1, specifica['blocco']):
+                        fine = min(inizio + specifica['blocco'] - 1, repliche)
+                        compiti.append({'id': len(compiti), 'sistema': sistema, 'mix': mix,
+                                        'N': N, 'epsilon': epsilon, 'repliche': [inizio, fine]})
+    return compiti
+
+
+def assegna_shard(compiti, totale):
+    """
+    Divide i compiti in `totale` shard di costo simile (repliche × N), in modo
+    deterministico: il più costoso va allo shard meno carico. Ogni shard
+    mantiene l'ordine del manifesto.
+    """
+    carichi = [0] * totale
+    shard = [[] for _ in range(totale)]
+    for compito in sorted(compiti, key=lambda c: (-_costo(c), c['id'])):
+        indice = min(range(totale), key=lambda i: (carichi[i], i))
+        carichi[indice] += _costo(compito)
+        shard[indice].append(compito)
+    return [sorted(s, key=lambda c: c['id']) for s in shard]
+
+
+def _costo(compito):
+    prima, ultima = compito['repliche']
+    return (ultima - prima + 1) * compito['N']
+
+
+def scrivi_manifesto(cartella, specifica):
+    """
+    Scrive CAMPAGNA/manifesto.json; rifiuta di sovrascriverne uno con specifica diversa.
+    La data di creazione (fuori dall'impronta) dà il nome alle cartelle dei risultati.
+    """
+    valida_specifica(specifica)
+    manifesto = {'specifica': specifica, 'impronta': impronta(specifica),
+                 'timestamp': datetime.now().strftime("%Y-%m-%d_%H-%M-%S"), 'compiti': espandi(specifica)}
+    percorso = os.path.join(cartella, 'manifesto.json')
+    if os.path.exists(percorso):
+        esistente = leggi_manifesto(cartella)
+        if esistente['impronta'] != manifesto['impronta']:
+            raise ValueError(f"{percorso} contiene già una campagna diversa "
+                             f"({esistente['impronta']} invece di {manifesto['impronta']})")
+        return esistente
+    os.makedirs(cartella, exist_ok=True)
+    Checkpoint._scrivi_atomico(percorso, manifesto)
+    return manifesto
+
+
+def leggi_manifesto(cartella):
+    with open(os.path.join(cartella, 'manifesto.json')) as f:
+        return json.load(f)
+
+
+# === ESECUZIONE DI UNO SHARD ===
+def etichetta(compito):
+    """Chiave 'sistema' dei risultati nel checkpoint: una per cella (sistema, N, ε)"""
+    return f"{compito['sistema']}/N={compito['N']}/eps={compito['epsilon']}"
+
+
+def esegui_compito(compito, specifica, replica_ids=None):
+    """Simula le repliche di un compito (tutte, o solo `replica_ids`) come un unico ensemble"""
+    if replica_ids is None:
+        prima, ultima = compito['repliche']
+        replica_ids = range(prima, ultima + 1)
+    flussi = FlussiRNG(specifica['philox']) if specifica['philox'] is not None else None
+    seed_base = specifica['seed_base'].get(compito['sistema'])
+    precisione = specifica.get('precisione', 'float64')  # campo facoltativo della specifica
+    if compito['sistema'] == 'misto':
+        ensemble = EnsembleMisto(compito['mix'], replica_ids, seed_base=seed_base, N=compito['N'],
+                                 flussi=flussi, precisione=precisione, epsilon=compito['epsilon'])
+    else:
+        ensemble = EnsemblePhiAvanzato(compito['sistema'], replica_ids, seed_base=seed_base,
+                                       N=compito['N'], flussi=flussi, precisione=precisione)
+    return ensemble.evolve()
+
+
+def cartella_shard(cartella, indice, totale):
+    return os.path.join(cartella, f"shard_{indice:03d}_di_{totale:03d}")
+
+
+def esegui_shard(cartella, indice, totale, verboso=False):
+    """
+    Esegue lo shard `indice` di `totale` del manifesto in `cartella`.
+    Rilanciato dopo un'interruzione simula solo le repliche mancanti.
+    Ritorna il numero di repliche simulate.
+    """
+    if not 0 <= indice < totale:
+        raise ValueError(f"Shard {indice} fuori da 0..{totale - 1}")
+    manifesto = leggi_manifesto(cartella)
+    specifica = manifesto['specifica']
+    checkpoint = Checkpoint(cartella_shard(cartella, indice, totale), configurazione={
+        'impronta': manifesto['impronta'],
+        'shard': indice,
+        'shard_totali': totale,
+    })
+
+    compiti = assegna_shard(manifesto['compiti'], totale)[indice]
+    simulate = 0
+    for numero, compito in enumerate(compiti, start=1):
+        prima, ultima = compito['repliche']
+        mancanti = checkpoint.mancanti(etichetta(compito), compito['mix'], range(prima, ultima + 1))
+        if mancanti:
+            checkpoint.salva(etichetta(compito), compito['mix'], esegui_compito(compito, specifica, mancanti))
+            simulate += len(mancanti)
+        if verboso:
+            print(f"   [{numero}/{len(compiti)}] compito {compito['id']}: {etichetta(compito)} "
+                  f"mix={compito['mix']} repliche {prima}-{ultima}"
+                  f"{'' if mancanti else ' (già completato)'}")
+    return simulate
+
+
+# === UNIONE ===
+def _checkpoint_shard(cartella, manifesto):
+    """Checkpoint di tutti gli shard della campagna (qualunque K), verificando l'impronta"""
+    checkpoint = []
+    for percorso in sorted(glob.glob(os.path.join(cartella, 'shard_*_di_*'))):
+        with open(os.path.join(percorso, 'configurazione.json')) as f:
+            configurazione = json.load(f)
+        if configurazione['impronta'] != manifesto['impronta']:
+            raise ValueError(f"{percorso} appartiene a un'altra campagna ({configurazione['impronta']})")
+        checkpoint.append(Checkpoint(percorso))
+    return checkpoint
+
+
+def _risultati_compito(compito, checkpoint):
+    """Risultati del compito in ordine di replica, riletti dagli shard; None per le repliche non trovate"""
+    prima, ultima = compito['repliche']
+    trovati = {}
+    for cp in checkpoint:
+        replica_ids = [r for r in range(prima, ultima + 1)
+                       if r not in trovati and cp.completato(etichetta(compito), compito['mix'], r)]
+        trovati.update(zip(replica_ids, cp.leggi(etichetta(compito), compito['mix'], replica_ids)))
+    return [trovati.get(r) for r in range(prima, ultima + 1)]
+
+
+def _completo(compito, checkpoint):
+    """Tutte le repliche del compito sono in qualche shard (controlla solo l'indice, non legge)"""
+    prima, ultima = compito['repliche']
+    return all(any(cp.completato(etichetta(compito), compito['mix'], r) for cp in checkpoint)
+               for r in range(prima, ultima + 1))
+
+
+def cartelle_risultati(manifesto):
+    """
+    {nome cartella: compiti} nell'ordine del manifesto: RISULTATI_50_<data>_N<N> per
+    equity ed extractive, SISTEMI_MISTI_<data>_N<N>_eps<ε> per il misto
+    """
+    data = manifesto.get('timestamp', manifesto['impronta'])  # manifesti senza data: l'impronta
+    cartelle = {}
+    for compito in manifesto['compiti']:
+        if compito['sistema'] == 'misto':
+            nome = f"SISTEMI_MISTI_{data}_N{compito['N']}_eps{compito['epsilon']}"
+        else:
+            nome = f"RISULTATI_50_{data}_N{compito['N']}"
+        cartelle.setdefault(nome, []).append(compito)
+    return cartelle
+
+
+def _archivio_nuovo(percorso):
+    """L'archivio si ricostruisce: rieseguire l'unione non accoda duplicati"""
+    shutil.rmtree(os.path.join(percorso, 'archivio'), ignore_errors=True)
+    return ArchivioColonnare(os.path.join(percorso, 'archivio'))
+
+
+def _unisci_robustezza(percorso, compiti, checkpoint, specifica, data):
+    """RISULTATI_COMPLETI.json, dati_analisi.csv e archivio come test_50_repliche"""
+    archivio = _archivio_nuovo(percorso)
+    phi_stat = {'equity': StatisticheOnline(), 'extractive': StatisticheOnline()}
+    tempo_stat = {'equity': StatisticheOnline(), 'extractive': StatisticheOnline()}
+    with open(os.path.join(percorso, 'dati_analisi.csv'), 'w') as csv:
+        csv.write(INTESTAZIONE_CSV)
+        for compito in compiti:
+            sistema = compito['sistema']
+            risultati = _risultati_compito(compito, checkpoint)
+            phi_stat[sistema].aggiungi_molti([res['phi_finale'] for res in risultati])
+            tempo_stat[sistema].aggiungi_molti([res['tempo_collasso'] for res in risultati])
+            for res in risultati:
+                archivio.aggiungi(res)
+                csv.write(riga_csv(sistema, res))
+    archivio.chiudi()
+
+    repliche = repliche_sistema(specifica, 'equity')
+    statistiche = {sistema: statistiche_sistema(phi_stat[sistema], tempo_stat[sistema],
+                                                repliche_sistema(specifica, sistema))
+                   for sistema in ('equity', 'extractive')}
+    # Il tempo di esecuzione è dei singoli shard, non dell'unione
+    risultati = risultati_robustezza(statistiche, phi_stat, data, None, repliche)
+    risultati['intervalli_confidenza'] = intervalli_robustezza(archivio)
+    with open(os.path.join(percorso, 'RISULTATI_COMPLETI.json'), 'w') as f:
+        json.dump(risultati, f, indent=2)
+    return risultati
+
+
+def _unisci_misti(percorso, compiti, checkpoint, specifica, data):
+    """
+    RISULTATI_MISTI.json e archivio come sistemi_misti: statistiche unite per le
+    stesse unità di parallelo, non per compito, quindi identiche bit per bit
+    qualunque sia la dimensione dei compiti
+    """
+    archivio = _archivio_nuovo(percorso)
+    phi_stat, tempo_stat = {}, {}
+    righe = ((compito['mix'], res) for compito in compiti for res in _risultati_compito(compito, checkpoint))
+    for (mix, _), unita in groupby(righe, key=lambda riga: (riga[0], (riga[1]['replica_id'] - 1) // REPLICHE_PER_UNITA)):
+        risultati = [res for _, res in unita]
+        stati = aggrega(risultati)
+        phi_stat.setdefault(mix, StatisticheOnline()).unisci(StatisticheOnline.da_stato(stati['phi_finale']))
+        tempo_stat.setdefault(mix, StatisticheOnline()).unisci(StatisticheOnline.da_stato(stati['tempo_collasso']))
+        archivio.aggiungi_molti(risultati)
+    archivio.chiudi()
+
+    repliche = repliche_sistema(specifica, 'misto')
+    statistiche = {mix: statistiche_del_mix(mix, phi_stat[mix], tempo_stat[mix], repliche) for mix in phi_stat}
+    risultati = risultati_misti(statistiche, data, repliche, specifica['mix'],
+                                N=compiti[0]['N'], epsilon=compiti[0]['epsilon'])
+    with open(os.path.join(percorso, 'RISULTATI_MISTI.json'), 'w') as f:
+        json.dump(risultati, f, indent=2)
+    return risultati
+
+
+def unisci_campagna(cartella):
+    """
+    Ricompone gli shard completati nelle cartelle dei risultati degli script
+    (vedi cartelle_risultati), leggendo un compito alla volta. Solleva ValueError
+    se mancano compiti. Ritorna {nome cartella: dizionario dei risultati}.
+    """
+    manifesto = leggi_manifesto(cartella)
+    checkpoint = _checkpoint_shard(cartella, manifesto)
+
+    incompleti = [compito['id'] for compito in manifesto['compiti'] if not _completo(compito, checkpoint)]
+    if incompleti:
+        raise ValueError(f"Compiti incompleti: {incompleti[:20]}{' ...' if len(incompleti) > 20 else ''} "
+                         f"({len(incompleti)} su {len(manifesto['compiti'])})")
+
+    data = manifesto.get('timestamp', manifesto['impronta'])
+    uniti = {}
+    for nome, compiti in cartelle_risultati(manifesto).items():
+        percorso = os.path.join(cartella, nome)
+        os.makedirs(percorso, exist_ok=True)
+        unisci = _unisci_misti if compiti[0]['sistema'] == 'misto' else _unisci_robustezza
+        uniti[nome] = unisci(percorso, compiti, checkpoint, manifesto['specifica'], data)
+    return uniti
+
+
+# === RIGA DI COMANDO ===
+def _leggi_shard(testo):
+    """'I/K' -> (I, K)"""
+    try:
+        indice, totale = (int(x) for x in testo.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard nel formato I/K, non {testo!r}")
+    return indice, totale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Campagne Φ-risonanza divise in shard")
+    comandi = parser.add_subparsers(dest="comando", required=True)
+
+    p = comandi.add_parser("manifesto", help="espande la specifica nel manifesto dei compiti")
+    p.add_argument("cartella")
+    p.add_argument("--specifica", default=None, metavar="SPEC.json",
+                   help="campi che sovrascrivono i default di config.py")
+    p.add_argument("--shard", type=int, default=1, metavar="K", help="mostra la divisione in K shard")
+
+    p = comandi.add_parser("esegui", help="esegue uno shard (riprende se interrotto)")
+    p.add_argument("cartella")
+    p.add_argument("--shard", type=_leggi_shard, default=(0, 1), metavar="I/K")
+
+    p = comandi.add_parser("unisci", help="unisce gli shard completati")
+    p.add_argument("cartella")
+
+    args = parser.parse_args()
+
+    if args.comando == "manifesto":
+        manifesto = scrivi_manifesto(args.cartella, carica_specifica(args.specifica))
+        compiti = manifesto['compiti']
+        print(f"📋 Manifesto {manifesto['impronta']}: {len(compiti)} compiti, "
+              f"{sum(c['repliche'][1] - c['repliche'][0] + 1 for c in compiti)} repliche")
+        for indice, shard in enumerate(assegna_shard(compiti, args.shard)):
+            print(f"   shard {indice}/{args.shard}: {len(shard)} compiti, costo {sum(map(_costo, shard))}"
+                  f"  →  phi-campagna esegui {args.cartella} --shard {indice}/{args.shard}")
+
+    elif args.comando == "esegui":
+        indice, totale = args.shard
+        print(f"🚀 Shard {indice}/{totale} di {args.cartella}")
+        simulate = esegui_shard(args.cartella, indice, totale, verboso=True)
+        print(f"✅ Shard completato: {simulate} repliche simulate")
+
+    else:
+        uniti = unisci_campagna(args.cartella)
+        print(f"🔗 Campagna unita: {len(uniti)} cartelle di risultati")
+        for nome, risultati in uniti.items():
+            print(f"   📁 {args.cartella}/{nome}")
+            for chiave, stat in risultati['statistiche'].items():
+                etichetta_stat = f"mix={chiave:.2f}" if isinstance(chiave, float) else chiave
+                print(f"      {etichetta_stat:<11} Φ = {stat['phi_medio']:.4f} ± {stat['phi_std']:.4f} "
+                      f"({stat['num_repliche']} repliche)")
+
+
+if __name__ == "__main__":
+    main()
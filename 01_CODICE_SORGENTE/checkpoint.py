@@ -0,0 +1,128 @@
+# === checkpoint.py ===
+# Checkpoint incrementali dei risultati per replica durante uno sweep.
+# Ogni blocco di repliche completato viene scritto subito in un file JSON
+# numerato (scrittura atomica: .tmp + os.replace), così un crash o un Ctrl-C
+# perde al massimo il blocco in corso. Riaprendo la stessa cartella si
+# ritrovano le repliche completate e si eseguono solo quelle mancanti.
+#
+#   checkpoint/
+#     configurazione.json    parametri dello sweep (verificati alla ripresa)
+#     parte_00000.json       {'sistema', 'mix', 'risultati': [...]}
+#     parte_00001.json
+#
+# In memoria resta solo l'indice replica → parte, non i risultati: chi ha
+# bisogno delle repliche già completate le rilegge dal disco con leggi(),
+# un blocco alla volta.
+#
+# Ogni replica dipende solo dal proprio seed/flusso, non dal blocco in cui
+# è stata simulata: i risultati ripresi sono identici a una corsa continua.
+#
+# Con uno ScrittoreAsincrono (scrittura.py) i blocchi sono scritti in un
+# thread separato: salva() ritorna subito e il blocco è già tra i completati.
+
+import glob
+import json
+import os
+
+
+class Checkpoint:
+    def __init__(self, cartella, configurazione=None, scrittore=None):
+        """
+        cartella: dove scrivere i blocchi (di solito <cartella_risultati>/checkpoint)
+        configurazione: dizionario JSON dei parametri dello sweep; se la cartella
+        contiene già un checkpoint con una configurazione diversa si solleva ValueError
+        scrittore: ScrittoreAsincrono opzionale per scrivere i blocchi fuori dal ciclo
+        """
+        self.cartella = cartella
+        self.scrittore = scrittore
+        self._completati = {}  # (sistema, mix, replica_id) -> numero della parte che la contiene
+        self._parti = 0
+        os.makedirs(cartella, exist_ok=True)
+
+        percorso_config = os.path.join(cartella, 'configurazione.json')
+        if configurazione is not None:
+            configurazione = json.loads(json.dumps(configurazione))
+            if os.path.exists(percorso_config):
+                with open(percorso_config) as f:
+                    salvata = json.load(f)
+                if salvata != configurazione:
+                    raise ValueError(f"Checkpoint in {cartella} con configurazione diversa: "
+                                     f"{salvata} invece di {configurazione}")
+            else:
+                self._scrivi_atomico(percorso_config, configurazione)
+
+        for nome_file in sorted(glob.glob(os.path.join(cartella, 'parte_*.json'))):
+            with open(nome_file) as f:
+                parte = json.load(f)
+            numero = int(os.path.basename(nome_file)[6:11])
+            for res in parte['risultati']:
+                self._completati[(parte['sistema'], parte['mix'], res['replica_id'])] = numero
+            # Numerazione dopo l'ultima parte esistente: mai sovrascrivere un blocco salvato
+            self._parti = max(self._parti, numero + 1)
+        self._parti_caricate = self._parti  # parti già su disco all'apertura
+
+    @staticmethod
+    def configurazione_salvata(cartella):
+        """Configurazione scritta da un checkpoint esistente in cartella (None se manca)"""
+        percorso_config = os.path.join(cartella, 'configurazione.json')
+        if not os.path.exists(percorso_config):
+            return None
+        with open(percorso_config) as f:
+            return json.load(f)
+
+    def _nome_parte(self, numero):
+        return os.path.join(self.cartella, f"parte_{numero:05d}.json")
+
+    @staticmethod
+    def _scrivi_atomico(percorso, dati):
+        temporaneo = percorso + '.tmp'
+        with open(temporaneo, 'w') as f:
+            json.dump(dati, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaneo, percorso)
+
+    def salva(self, sistema, mix, risultati):
+        """Registra un blocco di repliche completate (ciascuna con il suo 'replica_id')"""
+        if not risultati:
+            return
+        nome_file = self._nome_parte(self._parti)
+        parte = {'sistema': sistema, 'mix': mix, 'risultati': risultati}
+        if self.scrittore is not None:
+            self.scrittore.scrivi_json(nome_file, parte)
+        else:
+            self._scrivi_atomico(nome_file, parte)
+        for res in risultati:
+            self._completati[(sistema, mix, res['replica_id'])] = self._parti
+        self._parti += 1
+
+    def completato(self, sistema, mix, replica_id):
+        return (sistema, mix, replica_id) in self._completati
+
+    def mancanti(self, sistema, mix, replica_ids):
+        """Le repliche ancora da simulare, nell'ordine dato"""
+        return [r for r in replica_ids if (sistema, mix, r) not in self._completati]
+
+    def leggi(self, sistema, mix, replica_ids):
+        """
+        Risultati delle repliche richieste, nell'ordine dato, riletti dalle parti su
+        disco (tutte devono essere completate). Ogni parte coinvolta è letta una volta.
+        """
+        replica_ids = list(replica_ids)
+        numeri = sorted({self._completati[(sistema, mix, r)] for r in replica_ids})
+        if self.scrittore is not None and numeri and numeri[-1] >= self._parti_caricate:
+            self.scrittore.svuota()  # parti di questa esecuzione: prima che arrivino su disco
+        richiesti = set(replica_ids)
+        trovati = {}
+        for numero in numeri:
+            with open(self._nome_parte(numero)) as f:
+                parte = json.load(f)
+            if parte['sistema'] != sistema or parte['mix'] != mix:
+                continue
+            for res in parte['risultati']:
+                if res['replica_id'] in richiesti:
+                    trovati[res['replica_id']] = res
+        return [trovati[r] for r in replica_ids]
+
+    def __len__(self):
+        return len(self._completati)
@@ -1,11 +1,45 @@
 # === config.py ===
-print("⚙️ CONFIGURAZIONE TEST Φ-RISONANZA")
-print("=" * 40)
-
 # PARAMETRI
-NUM_REPLICHE = 5  # Per test veloce
+# Valori di default della specifica di campagna (vedi campagna.py): una
+# specifica JSON può sovrascriverne qualunque campo.
+NUM_REPLICHE = 5  # Per test veloce (le campagne usano le repliche degli script)
 SISTEMI = ['equity', 'extractive']
+MIX_PROPORZIONI = [0.0, 0.25, 0.5, 0.75, 1.0]  # solo per il sistema 'misto'
+N_NODI = [100]
+EPSILON = [0.05]
+SEED_BASE = {'equity': 42, 'extractive': 42, 'misto': 12345}  # come gli script
+BLOCCO_REPLICHE = 10  # repliche per compito del manifesto
+
+
+def specifica_default():
+    """
+    Specifica di campagna con i parametri di questo file e le repliche degli
+    script (una per sistema), così l'unione riproduce i loro risultati
+    """
+    # Import locali: config resta leggero per chi legge solo i parametri
+    from .sistemi_misti import NUM_REPLICHE as REPLICHE_MISTI
+    from .test_50_repliche import NUM_REPLICHE as REPLICHE_50
+    return {
+        'sistemi': list(SISTEMI),
+        'mix': list(MIX_PROPORZIONI),
+        'N': list(N_NODI),
+        'epsilon': list(EPSILON),
+        'repliche': {'equity': REPLICHE_50, 'extractive': REPLICHE_50, 'misto': REPLICHE_MISTI},
+        'seed_base': dict(SEED_BASE),
+        'philox': None,
+        'blocco': BLOCCO_REPLICHE,
+    }
+
+
+def main():
+    print("⚙️ CONFIGURAZIONE TEST Φ-RISONANZA")
+    print("=" * 40)
+    print(f"Repliche: {NUM_REPLICHE}")
+    print(f"Sistemi: {SISTEMI}")
+    print(f"Mix (misto): {MIX_PROPORZIONI}")
+    print(f"N: {N_NODI}  ε: {EPSILON}")
+    print("✅ Configurazione pronta!")
+
 
-print(f"Repliche: {NUM_REPLICHE}")
-print(f"Sistemi: {SISTEMI}")
-print("✅ Configurazione pronta!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# === diagramma_fase.py ===
+# Diagramma di fase del sistema misto su più parametri insieme:
+# mix × ε (scala del rumore) × N × α (esponente di Pareto delle ampiezze).
+# La griglia è cartesiana (un asse per parametro) oppure un ipercubo latino
+# di K punti sugli intervalli dati, utile quando gli assi sono molti.
+#
+# Ogni punto della griglia si divide in unità di lavoro: blocchi di
+# repliche simulati come un unico EnsembleMisto, dimensionati perché i
+# buffer del passo (rumore a blocchi, fasi, ampiezze, kernel di Φ) stiano
+# in BUDGET_CACHE byte. Le unità girano su un pool di processi e ognuna
+# restituisce solo gli aggregati in streaming di Φ e del tempo di collasso,
+# non i dizionari per replica. Le unità sono le stesse con qualunque numero
+# di worker e si uniscono nell'ordine della griglia: il risultato non dipende
+# da come è stato eseguito.
+#
+# Il risultato è un DiagrammaFase: array N-dimensionali (Φ medio, σ(Φ),
+# tempo di collasso medio e σ, repliche) con una dimensione per asse e le
+# coordinate di ogni asse, salvato in un file .npz.
+#
+# I seed non dipendono da ε, N e α (solo da mix e replica, come negli
+# script): lungo questi assi i punti condividono i numeri casuali e le
+# differenze tra celle vicine sono meno rumorose.
+#
+# Uso:
+#   phi-diagramma [--mix 0 0.1 ... 1] [--epsilon 0.025 0.05 0.1] [--N 100]
+#                 [--alpha 1.5] [--lhs K] [--repliche 30] [--workers 4]
+#                 [--philox SEED] [--precisione float32] [--uscita FILE.npz]
+#   Con --lhs ogni asse con più valori è campionato nell'intervallo [min, max]
+#   dei suoi valori; gli assi con un solo valore restano fissi.
+
+import argparse
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .aggregatore import StatisticheOnline
+from .ensemble import BLOCCO_PASSI, EnsembleMisto
+from .flussi_rng import FlussiRNG
+from .precisione import PRECISIONI, tipo_reale
+
+ASSI = ('mix', 'epsilon', 'N', 'alpha')
+VALORI_DEFAULT = {'mix': 0.5, 'epsilon': 0.05, 'N': 100, 'alpha': 1.5}
+VARIABILI = ('phi_medio', 'phi_std', 'tempo_medio', 'tempo_std', 'repliche')
+BUDGET_CACHE = 2 * 1024**2  # byte di lavoro per unità (ordine di grandezza di una cache L2)
+RIGHE_PER_REPLICA = BLOCCO_PASSI + 8  # array di N valori per replica: rumore a blocchi + stato e buffer
+SEED_BASE = 12345
+
+
+# === GRIGLIE ===
+def _parametri(valori):
+    """Parametri completi di un punto: gli assi non indicati restano ai valori di default"""
+    parametri = dict(VALORI_DEFAULT)
+    parametri.update(valori)
+    parametri['N'] = int(parametri['N'])
+    return parametri
+
+
+def griglia_cartesiana(**assi):
+    """
+    Prodotto cartesiano degli assi dati (liste di valori), nell'ordine di ASSI.
+    Ritorna {'dimensioni', 'coordinate', 'punti'}: punti è una lista di
+    (indice N-dimensionale, parametri) nell'ordine C dell'array dei risultati.
+    """
+    sconosciuti = set(assi) - set(ASSI)
+    if sconosciuti:
+        raise ValueError(f"Assi sconosciuti: {sorted(sconosciuti)} (ammessi: {ASSI})")
+    dimensioni = [nome for nome in ASSI if nome in assi]
+    coordinate = {nome: np.asarray(assi[nome], dtype=int if nome == 'N' else float) for nome in dimensioni}
+    punti = []
+    for indice in itertools.product(*(range(len(coordinate[d])) for d in dimensioni)):
+        punti.append((indice, _parametri({d: coordinate[d][i] for d, i in zip(dimensioni, indice)})))
+    return {'dimensioni': dimensioni, 'coordinate': coordinate, 'punti': punti}
+
+
+def griglia_lhs(campioni, seed=0, **limiti):
+    """
+    Ipercubo latino di `campioni` punti sugli intervalli dati ((min, max) per asse):
+    ogni asse è diviso in `campioni` strati e ogni strato è usato una volta.
+    Un asse con min == max resta fisso a quel valore; almeno uno deve avere ampiezza.
+    N è campionato in scala logaritmica e arrotondato all'intero.
+    La dimensione è unica ('campione'); i valori dei parametri sono coordinate lungo di essa.
+    """
+    sconosciuti = set(limiti) - set(ASSI)
+    if sconosciuti:
+        raise ValueError(f"Assi sconosciuti: {sorted(sconosciuti)} (ammessi: {ASSI})")
+    if any(basso > alto for basso, alto in limiti.values()):
+        raise ValueError(f"Intervalli con min > max: {limiti}")
+    if not any(basso < alto for basso, alto in limiti.values()):
+        raise ValueError(f"Nessun asse da campionare: {limiti or 'nessun intervallo'} "
+                         "(serve almeno un asse con min < max)")
+    rng = np.random.default_rng(seed)
+    coordinate = {'campione': np.arange(campioni)}
+    for nome in ASSI:
+        if nome not in limiti:
+            continue
+        basso, alto = limiti[nome]
+        u = (rng.permutation(campioni) + rng.random(campioni)) / campioni
+        if nome == 'N':
+            coordinate[nome] = np.rint(np.exp(np.log(basso) + u * (np.log(alto) - np.log(basso)))).astype(int)
+        else:
+            coordinate[nome] = basso + u * (alto - basso)
+    assi = [nome for nome in ASSI if nome in coordinate]
+    punti = [((k,), _parametri({nome: coordinate[nome][k] for nome in assi})) for k in range(campioni)]
+    return {'dimensioni': ['campione'], 'coordinate': coordinate, 'punti': punti}
+
+
+# === UNITÀ DI LAVORO ===
+def repliche_per_unita(N, precisione='float64', budget=BUDGET_CACHE):
+    """Repliche di un ensemble i cui buffer del passo stanno nel budget (almeno una)"""
+    byte_per_replica = RIGHE_PER_REPLICA * N * tipo_reale(precisione).itemsize
+    return max(1, budget // byte_per_replica)
+
+
+def dividi_unita(griglia, repliche, seed_base=SEED_BASE, flussi=None, precisione='float64',
+                 budget=BUDGET_CACHE):
+    """Unità (punto, parametri, replica_ids, seed_base, flussi, precisione) in ordine di griglia"""
+    unita = []
+    for k, (_, parametri) in enumerate(griglia['punti']):
+        passo = min(repliche, repliche_per_unita(parametri['N'], precisione, budget))
+        for inizio in range(1, repliche + 1, passo):
+            replica_ids = list(range(inizio, min(inizio + passo, repliche + 1)))
+            unita.append((k, parametri, replica_ids, seed_base, flussi, precisione))
+    return unita
+
+
+def _esegui_unita(unita):
+    """Eseguito nel worker: un blocco di repliche di un punto, ridotto ad aggregati"""
+    k, parametri, replica_ids, seed_base, flussi, precisione = unita
+    ensemble = EnsembleMisto(parametri['mix'], replica_ids, seed_base=seed_base, N=parametri['N'],
+                             flussi=flussi, precisione=precisione,
+                             epsilon=parametri['epsilon'], alpha=parametri['alpha'])
+    phi, tempo = StatisticheOnline(), StatisticheOnline()
+    risultati = ensemble.evolve()
+    phi.aggiungi_molti([r['phi_finale'] for r in risultati])
+    tempo.aggiungi_molti([r['tempo_collasso'] for r in risultati])
+    return k, phi.stato(), tempo.stato()
+
+
+# === RISULTATO ===
+class DiagrammaFase:
+    """Variabili N-dimensionali su una griglia di parametri, con le coordinate degli assi"""
+
+    def __init__(self, dimensioni, coordinate, variabili, attributi=None):
+        self.dimensioni = list(dimensioni)
+        self.coordinate = coordinate
+        self.variabili = variabili
+        self.attributi = attributi or {}
+
+    @property
+    def forma(self):
+        return tuple(len(self.coordinate[d]) for d in self.dimensioni)
+
+    def __getitem__(self, nome):
+        return self.variabili[nome]
+
+    def seleziona(self, **valori):
+        """Sezione a valori fissati di alcune dimensioni (valori esatti delle coordinate)"""
+        indici = []
+        dimensioni = []
+        for d in self.dimensioni:
+            if d in valori:
+                posizioni = np.flatnonzero(np.isclose(self.coordinate[d], valori[d]))
+                if posizioni.size == 0:
+                    raise KeyError(f"{d} = {valori[d]} non è tra le coordinate {self.coordinate[d].tolist()}")
+                indici.append(posizioni[0])
+            else:
+                indici.append(slice(None))
+                dimensioni.append(d)
+        coordinate = {nome: c for nome, c in self.coordinate.items() if nome not in valori}
+        variabili = {nome: v[tuple(indici)] for nome, v in self.variabili.items()}
+        fissati = {d: v.item() if isinstance(v, np.generic) else v for d, v in valori.items()}
+        return DiagrammaFase(dimensioni, coordinate, variabili, dict(self.attributi, **fissati))
+
+    def salva(self, percorso):
+        """File .npz con variabili, coordinate ('coord.<asse>') e metadati JSON"""
+        meta = {'dimensioni': self.dimensioni, 'attributi': self.attributi}
+        array = dict(self.variabili)
+        array.update({f"coord.{nome}": c for nome, c in self.coordinate.items()})
+        temporaneo = percorso + '.tmp'
+        with open(temporaneo, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **array)
+        os.replace(temporaneo, percorso)  # mai un file scritto a metà
+        return percorso
+
+    @classmethod
+    def carica(cls, percorso):
+        with np.load(percorso) as dati:
+            meta = json.loads(str(dati['meta']))
+            coordinate = {nome[6:]: dati[nome] for nome in dati.files if nome.startswith('coord.')}
+            variabili = {nome: dati[nome] for nome in dati.files if nome in VARIABILI}
+        return cls(meta['dimensioni'], coordinate, variabili, meta['attributi'])
+
+
+# === ESECUZIONE ===
+def esegui_diagramma(griglia, repliche, workers=1, seed_base=SEED_BASE, flussi=None,
+                     precisione='float64', budget=BUDGET_CACHE):
+    """
+    Simula `repliche` repliche per ogni punto della griglia e ritorna un DiagrammaFase.
+    workers: numero di processi (1 = nello stesso processo, None = tutti i core)
+    flussi: FlussiRNG per flussi Philox per replica (None = seed legacy)
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    unita = dividi_unita(griglia, repliche, seed_base, flussi, precisione, budget)
+
+    if workers <= 1:
+        esiti = map(_esegui_unita, unita)
+        aggregati = _unisci(griglia, esiti)
+    else:
+        from .parallelo import _pool
+        # ~4 gruppi di unità per worker: meno viaggi tra processi senza sbilanciare il carico
+        blocco = max(1, len(unita) // (workers * 4))
+        with _pool(workers) as pool:
+            # map() restituisce le unità nell'ordine della griglia
+            aggregati = _unisci(griglia, pool.map(_esegui_unita, unita, chunksize=blocco))
+
+    forma = tuple(len(griglia['coordinate'][d]) for d in griglia['dimensioni'])
+    variabili = {nome: np.full(forma, np.nan) for nome in VARIABILI}
+    variabili['repliche'] = np.zeros(forma, dtype=np.int64)
+    for (indice, _), (phi, tempo) in zip(griglia['punti'], aggregati):
+        variabili['phi_medio'][indice] = phi.media
+        variabili['phi_std'][indice] = phi.std
+        variabili['tempo_medio'][indice] = tempo.media
+        variabili['tempo_std'][indice] = tempo.std
+        variabili['repliche'][indice] = phi.n
+
+    attributi = {'repliche': repliche, 'seed_base': seed_base,
+                 'flussi': flussi.seed if flussi is not None else None,
+                 'precisione': precisione, 'valori_default': VALORI_DEFAULT}
+    return DiagrammaFase(griglia['dimensioni'], griglia['coordinate'], variabili, attributi)
+
+
+def _unisci(griglia, esiti):
+    """Aggregati (Φ, tempo) per punto, uniti nell'ordine in cui arrivano le unità"""
+    aggregati = [(StatisticheOnline(), StatisticheOnline()) for _ in griglia['punti']]
+    for k, phi, tempo in esiti:
+        aggregati[k][0].unisci(StatisticheOnline.da_stato(phi))
+        aggregati[k][1].unisci(StatisticheOnline.da_stato(tempo))
+    return aggregati
+
+
+def stampa_tabella(diagramma):
+    """Φ medio sulle prime due dimensioni (le altre al loro primo valore)"""
+    dimensioni = diagramma.dimensioni
+    sezione = diagramma.seleziona(**{d: diagramma.coordinate[d][0] for d in dimensioni[2:]})
+    if len(dimensioni) > 1:
+        colonne = [f"{dimensioni[1]}={c:.4g}" for c in sezione.coordinate[dimensioni[1]]]
+        phi = sezione['phi_medio']
+    else:
+        colonne = ['Φ medio']
+        phi = sezione['phi_medio'][:, None]
+    print(f"\n{dimensioni[0]:<10} " + ' '.join(f"{c:<14}" for c in colonne))
+    for valore, riga in zip(sezione.coordinate[dimensioni[0]], phi):
+        print(f"{valore:<10.4g} " + ' '.join(f"{v:<14.4f}" for v in riga))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diagramma di fase del sistema misto (mix × ε × N × α)")
+    parser.add_argument("--mix", type=float, nargs="+", default=list(np.round(np.linspace(0, 1, 11), 2)))
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.025, 0.05, 0.1])
+    parser.add_argument("--N", type=int, nargs="+", default=[VALORI_DEFAULT['N']])
+    parser.add_argument("--alpha", type=float, nargs="+", default=[VALORI_DEFAULT['alpha']])
+    parser.add_argument("--lhs", type=int, default=None, metavar="K",
+                        help="ipercubo latino di K punti in [min, max] dei valori di ogni asse")
+    parser.add_argument("--repliche", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=1, help="processi paralleli (0 = tutti i core)")
+    parser.add_argument("--philox", type=int, default=None, metavar="SEED",
+                        help="flussi Philox per replica invece dei seed legacy")
+    parser.add_argument("--precisione", choices=list(PRECISIONI), default='float64')
+    parser.add_argument("--uscita", default=None, help="file .npz (default: DIAGRAMMA_FASE_<data>.npz)")
+    args = parser.parse_args()
+
+    assi = {nome: getattr(args, nome) for nome in ASSI}
+    if args.lhs is None:
+        griglia = griglia_cartesiana(**assi)
+    else:
+        # Ogni asse va nell'ipercubo con il suo [min, max]: con un solo valore resta fisso
+        intervalli = {nome: (min(valori), max(valori)) for nome, valori in assi.items()}
+        griglia = griglia_lhs(args.lhs, **intervalli)
+    flussi = FlussiRNG(args.philox) if args.philox is not None else None
+    uscita = args.uscita or f"DIAGRAMMA_FASE_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.npz"
+
+    print("🗺️  DIAGRAMMA DI FASE Φ-RISONANZA")
+    print("=" * 60)
+    print(f"📐 Dimensioni: {griglia['dimensioni']}  ({len(griglia['punti'])} punti × {args.repliche} repliche)")
+
+    inizio = time.time()
+    diagramma = esegui_diagramma(griglia, args.repliche, workers=args.workers or None,
+                                 flussi=flussi, precisione=args.precisione)
+    print(f"⏱️  {time.time() - inizio:.1f} s")
+
+    if args.lhs is None:
+        stampa_tabella(diagramma)
+    diagramma.salva(uscita)
+    print(f"\n💾 Diagramma salvato in: {uscita}  (forma {diagramma.forma})")
+
+
+if __name__ == "__main__":
+    main()
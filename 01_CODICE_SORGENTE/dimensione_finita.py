@@ -0,0 +1,244 @@
+# === dimensione_finita.py ===
+# Scaling a dimensione finita: i modelli equity, extractive e misto su una
+# serie geometrica di N (10^2 → 10^7), per vedere come Φ, le sue
+# fluttuazioni e il rapporto delle varianze extractive/equity cambiano con
+# la taglia della popolazione.
+#
+# L'osservabile è il Φ della dinamica (ensemble.dinamica()), non il
+# phi_finale dei risultati per replica: quello è estratto da distribuzioni
+# bersaglio fisse e per costruzione non dipende da N. Il tempo è quello di
+# convergenza della dinamica (passi × dt).
+#
+# La memoria resta limitata a ogni N: le repliche si simulano a gruppi di
+# ELEMENTI_GRUPPO / N (almeno una), Φ si riduce a blocchi di colonne
+# (ordine.BLOCCO_PHI) e il rumore a blocchi di passi entro
+# ensemble.MEMORIA_RUMORE. Ogni gruppo restituisce solo aggregati in
+# streaming; con più worker i gruppi girano in parallelo e si uniscono
+# nell'ordine della serie, quindi il risultato non dipende dai worker.
+#
+# Sui valori per N si adattano leggi di potenza (retta in scala log-log):
+# Φ ~ N^-β, σ(Φ) ~ N^-γ e rapporto delle varianze ~ N^δ, più Φ(∞)
+# dall'estrapolazione lineare di Φ contro N^-1/2.
+#
+# Uso:
+#   phi-scaling [--sistemi equity extractive misto] [--N-min 1e2] [--N-max 1e6]
+#               [--punti-per-decade 1] [--repliche 20] [--mix 0.5]
+#               [--workers 4] [--philox SEED] [--precisione float32]
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .aggregatore import StatisticheOnline
+from .ensemble import EnsembleMisto, EnsemblePhiAvanzato
+from .flussi_rng import FlussiRNG
+from .precisione import PRECISIONI
+
+SISTEMI = ('equity', 'extractive', 'misto')
+SEED_BASE = {'equity': 42, 'extractive': 42, 'misto': 12345}  # come gli script
+ELEMENTI_GRUPPO = 2 * 10**6  # repliche × N simulate insieme in un gruppo
+
+
+def serie_geometrica(N_min=100, N_max=10**6, punti_per_decade=1):
+    """N interi in progressione geometrica da N_min a N_max inclusi, senza ripetizioni"""
+    decadi = np.log10(N_max / N_min)
+    punti = max(1, int(round(decadi * punti_per_decade))) + 1
+    return sorted(set(int(round(N)) for N in np.geomspace(N_min, N_max, punti)))
+
+
+# === SIMULAZIONE ===
+def dividi_gruppi(sistemi, valori_N, repliche, mix=0.5, flussi=None, precisione='float64'):
+    """Gruppi (k, sistema, N, replica_ids, mix, flussi, precisione): k indicizza la coppia (sistema, N)"""
+    gruppi = []
+    k = 0
+    for sistema in sistemi:
+        for N in valori_N:
+            passo = max(1, min(repliche, ELEMENTI_GRUPPO // N))
+            for inizio in range(1, repliche + 1, passo):
+                replica_ids = list(range(inizio, min(inizio + passo, repliche + 1)))
+                gruppi.append((k, sistema, N, replica_ids, mix, flussi, precisione))
+            k += 1
+    return gruppi
+
+
+def _esegui_gruppo(gruppo):
+    """Eseguito nel worker: Φ finale della dinamica e tempo di convergenza, ridotti ad aggregati"""
+    k, sistema, N, replica_ids, mix, flussi, precisione = gruppo
+    inizio = time.perf_counter()
+    if sistema == 'misto':
+        ensemble = EnsembleMisto(mix, replica_ids, seed_base=SEED_BASE[sistema], N=N,
+                                 flussi=flussi, precisione=precisione)
+    else:
+        ensemble = EnsemblePhiAvanzato(sistema, replica_ids, seed_base=SEED_BASE[sistema], N=N,
+                                       flussi=flussi, precisione=precisione)
+    _, phi_finale, passi = ensemble.dinamica()
+    phi, tempo = StatisticheOnline(), StatisticheOnline()
+    phi.aggiungi_molti(phi_finale)
+    tempo.aggiungi_molti(passi * ensemble.dt)
+    return k, phi.stato(), tempo.stato(), time.perf_counter() - inizio
+
+
+def esegui_scaling(sistemi, valori_N, repliche, mix=0.5, workers=1, flussi=None, precisione='float64'):
+    """
+    Simula `repliche` repliche per ogni sistema e N.
+    Ritorna {sistema: [riga per N]} con n, phi_medio, phi_std, phi_varianza,
+    tempo_medio e secondi per replica, e le leggi di potenza adattate.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    gruppi = dividi_gruppi(sistemi, valori_N, repliche, mix, flussi, precisione)
+
+    if workers <= 1:
+        esiti = list(map(_esegui_gruppo, gruppi))
+    else:
+        from .parallelo import _pool
+        with _pool(workers) as pool:
+            esiti = list(pool.map(_esegui_gruppo, gruppi))  # nell'ordine dei gruppi
+
+    celle = len(sistemi) * len(valori_N)
+    phi = [StatisticheOnline() for _ in range(celle)]
+    tempo = [StatisticheOnline() for _ in range(celle)]
+    secondi = [0.0] * celle
+    for k, stato_phi, stato_tempo, s in esiti:
+        phi[k].unisci(StatisticheOnline.da_stato(stato_phi))
+        tempo[k].unisci(StatisticheOnline.da_stato(stato_tempo))
+        secondi[k] += s
+
+    tabelle = {}
+    for i, sistema in enumerate(sistemi):
+        righe = []
+        for j, N in enumerate(valori_N):
+            k = i * len(valori_N) + j
+            righe.append({'N': N, 'repliche': phi[k].n,
+                          'phi_medio': phi[k].media, 'phi_std': phi[k].std, 'phi_varianza': phi[k].varianza,
+                          'tempo_medio': tempo[k].media,
+                          'secondi_per_replica': secondi[k] / phi[k].n if phi[k].n else None})
+        tabelle[sistema] = righe
+    return {'sistemi': tabelle, 'adattamenti': adatta_scaling(tabelle)}
+
+
+# === LEGGI DI POTENZA ===
+def legge_di_potenza(x, y):
+    """
+    Retta in scala log-log: y ≈ prefattore · x^esponente.
+    L'errore standard dell'esponente c'è solo con almeno 4 punti positivi.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    validi = (x > 0) & (y > 0) & np.isfinite(y)
+    if validi.sum() < 2:
+        return None
+    lx, ly = np.log(x[validi]), np.log(y[validi])
+    if validi.sum() >= 4:
+        (esponente, intercetta), covarianza = np.polyfit(lx, ly, 1, cov=True)
+        errore = float(np.sqrt(covarianza[0, 0]))
+    else:
+        esponente, intercetta = np.polyfit(lx, ly, 1)
+        errore = None
+    return {'esponente': float(esponente), 'errore_esponente': errore,
+            'prefattore': float(np.exp(intercetta)), 'punti': int(validi.sum())}
+
+
+def adatta_scaling(tabelle):
+    """Esponenti di Φ e σ(Φ) per sistema, Φ(∞) e scaling del rapporto delle varianze"""
+    adattamenti = {}
+    for sistema, righe in tabelle.items():
+        N = np.array([r['N'] for r in righe], dtype=float)
+        phi = np.array([r['phi_medio'] for r in righe])
+        adattamento = {'phi': legge_di_potenza(N, phi),
+                       'phi_std': legge_di_potenza(N, [r['phi_std'] for r in righe]),
+                       'phi_infinito': None}
+        if len(N) >= 2:
+            # Φ(N) ≈ Φ(∞) + a / √N: intercetta della retta in N^-1/2
+            adattamento['phi_infinito'] = float(np.polyfit(N ** -0.5, phi, 1)[1])
+        adattamenti[sistema] = adattamento
+
+    if 'equity' in tabelle and 'extractive' in tabelle:
+        rapporti = [ex['phi_varianza'] / eq['phi_varianza'] if eq['phi_varianza'] > 0 else float('inf')
+                    for eq, ex in zip(tabelle['equity'], tabelle['extractive'])]
+        adattamenti['rapporto_varianze'] = {
+            'N': [r['N'] for r in tabelle['equity']],
+            'valori': rapporti,
+            'legge': legge_di_potenza([r['N'] for r in tabelle['equity']], rapporti),
+        }
+    return adattamenti
+
+
+# === USCITA ===
+def salva(cartella, risultati, configurazione):
+    os.makedirs(cartella, exist_ok=True)
+    with open(os.path.join(cartella, 'SCALING.json'), 'w') as f:
+        json.dump({'configurazione': configurazione, **risultati}, f, indent=2)
+    with open(os.path.join(cartella, 'scaling.csv'), 'w') as f:
+        f.write("sistema,N,repliche,phi_medio,phi_std,phi_varianza,tempo_medio,secondi_per_replica\n")
+        for sistema, righe in risultati['sistemi'].items():
+            for r in righe:
+                f.write(f"{sistema},{r['N']},{r['repliche']},{r['phi_medio']},{r['phi_std']},"
+                        f"{r['phi_varianza']},{r['tempo_medio']},{r['secondi_per_replica']}\n")
+
+
+def _formato_legge(legge):
+    if legge is None:
+        return "n/d"
+    errore = f" ± {legge['errore_esponente']:.3f}" if legge['errore_esponente'] is not None else ""
+    return f"N^{legge['esponente']:+.3f}{errore}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling a dimensione finita di Φ (N da 10^2 a 10^7)")
+    parser.add_argument("--sistemi", nargs="+", choices=SISTEMI, default=list(SISTEMI))
+    parser.add_argument("--N-min", type=lambda v: int(float(v)), default=100)
+    parser.add_argument("--N-max", type=lambda v: int(float(v)), default=10**6)
+    parser.add_argument("--punti-per-decade", type=int, default=1)
+    parser.add_argument("--repliche", type=int, default=20)
+    parser.add_argument("--mix", type=float, default=0.5, help="proporzione equity del sistema misto")
+    parser.add_argument("--workers", type=int, default=1, help="processi paralleli (0 = tutti i core)")
+    parser.add_argument("--philox", type=int, default=None, metavar="SEED",
+                        help="flussi Philox per replica invece dei seed legacy")
+    parser.add_argument("--precisione", choices=list(PRECISIONI), default='float64')
+    args = parser.parse_args()
+
+    valori_N = serie_geometrica(args.N_min, args.N_max, args.punti_per_decade)
+    flussi = FlussiRNG(args.philox) if args.philox is not None else None
+    cartella = f"SCALING_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+
+    print("📏 SCALING A DIMENSIONE FINITA Φ-RISONANZA")
+    print("=" * 60)
+    print(f"N: {valori_N}  repliche: {args.repliche}  sistemi: {args.sistemi}")
+
+    inizio = time.time()
+    risultati = esegui_scaling(args.sistemi, valori_N, args.repliche, mix=args.mix,
+                               workers=args.workers or None, flussi=flussi, precisione=args.precisione)
+    print(f"⏱️  {time.time() - inizio:.1f} s")
+
+    for sistema, righe in risultati['sistemi'].items():
+        print(f"\n{sistema.upper()}")
+        print(f"{'N':<10} {'Φ medio':<12} {'σ(Φ)':<12} {'tempo (s)':<10} {'s/replica':<10}")
+        for r in righe:
+            print(f"{r['N']:<10} {r['phi_medio']:<12.5f} {r['phi_std']:<12.5f} {r['tempo_medio']:<10.2f} "
+                  f"{r['secondi_per_replica']:<10.3f}")
+
+    adattamenti = risultati['adattamenti']
+    print(f"\n📐 LEGGI DI POTENZA:")
+    for sistema in args.sistemi:
+        a = adattamenti[sistema]
+        phi_inf = f"{a['phi_infinito']:.4f}" if a['phi_infinito'] is not None else "n/d"
+        print(f"   {sistema:<11} Φ ~ {_formato_legge(a['phi'])}   σ(Φ) ~ {_formato_legge(a['phi_std'])}   "
+              f"Φ(∞) ≈ {phi_inf}")
+    if 'rapporto_varianze' in adattamenti:
+        rapporto = adattamenti['rapporto_varianze']
+        print(f"\n📊 RAPPORTO VARIANZE extractive/equity ~ {_formato_legge(rapporto['legge'])}")
+        for N, valore in zip(rapporto['N'], rapporto['valori']):
+            print(f"   N = {N:<10} {valore:.1f}x")
+
+    configurazione = {'N': valori_N, 'repliche': args.repliche, 'mix': args.mix,
+                      'flussi': args.philox, 'precisione': args.precisione}
+    salva(cartella, risultati, configurazione)
+    print(f"\n💾 Risultati salvati in: {cartella}/SCALING.json, scaling.csv")
+
+
+if __name__ == "__main__":
+    main()
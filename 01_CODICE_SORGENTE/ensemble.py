@@ -0,0 +1,467 @@
+# === ensemble.py ===
+# Motore a ensemble: evolve tutte le repliche di un sistema come un unico
+# array (R, N) invece di un oggetto per replica con il suo loop Python.
+# I risultati per replica coincidono con quelli di SistemaPhiAvanzato.evolve()
+# e SistemaMisto.evolve() (stesso seed, stesso flusso casuale per replica).
+# precisione='float32' dimezza i byte di theta, A e rumore (vedi precisione.py).
+#
+# Il passo non alloca array (R, N): il rumore è estratto a blocchi di passi in
+# un buffer riusato, le costanti che dipendono solo da A (1 + 2A) sono
+# calcolate una volta, e i termini del passo usano buffer di lavoro con `out=`.
+# Le operazioni elementari sono le stesse, nello stesso ordine, delle
+# espressioni seriali: il risultato è identico bit per bit.
+# Con N molto grande il blocco di rumore si accorcia per restare entro
+# MEMORIA_RUMORE (il flusso di ogni replica non cambia).
+#
+# Un blocco di più passi estrae anche il rumore dei passi che una replica
+# convergente non farà: alla convergenza il suo RNG torna allo stato salvato a
+# inizio blocco e ri-estrae solo i passi fatti (_riallinea). Con i Generator
+# Philox salvare lo stato costa pochi µs; con i RandomState legacy copia 624
+# parole (~60 µs, altrettanti per ripristinarlo) e costa più di quanto il blocco
+# risparmi. Per questo sul percorso legacy il blocco predefinito è di un passo
+# (BLOCCO_LEGACY): ogni passo estratto è un passo fatto, niente stato da salvare
+# né riallineamento.
+#
+# Il tetto dell'accelerazione è il lavoro per replica che nessuna
+# vettorizzazione toglie: creare R flussi indipendenti (~0.2 ms ciascuno con
+# RandomState) ed estrarre il loro rumore, più l'esponenziale complesso di Φ su
+# R × N fasi per passo. Con N = 100 sono circa due terzi del tempo
+# dell'ensemble: rispetto al loop seriale si guadagna 2-4×, non di più.
+# verifica_ensemble.py controlla che i risultati restino identici bit per bit.
+
+import time
+
+import numpy as np
+
+from .flussi_rng import generatore_legacy, salva_stato, ripristina_stato
+from .ordine import ParametroOrdine
+from .precisione import tipo_reale
+
+DUE_PI = 2 * np.pi
+BLOCCO_PASSI = 20  # passi di rumore estratti in un'unica chiamata al RNG (Generator)
+BLOCCO_LEGACY = 1  # con RandomState: salvare e ripristinare lo stato costa più del blocco
+MEMORIA_RUMORE = 64 * 1024**2  # byte massimi del blocco di rumore: con N grande si estraggono meno passi
+
+
+def griglia_tempi(dt, t_max):
+    """Istanti t dopo ogni passo, con la stessa somma in virgola mobile di evolve()"""
+    tempi = []
+    t = 0.0
+    while t < t_max:
+        t += dt
+        tempi.append(t)
+    return tempi
+
+
+def _compatta_righe(array, tenute):
+    """
+    Sposta sul posto le righe tenute in testa all'array e ritorna la vista delle
+    prime righe: a differenza di array[tenute] non alloca una copia del blocco.
+    """
+    indici = np.flatnonzero(tenute)
+    for destinazione, origine in enumerate(indici):
+        if destinazione != origine:  # origine >= destinazione: la copia in avanti è sicura
+            array[destinazione] = array[origine]
+    return array[:indici.size]
+
+
+class _Lavoro:
+    """Buffer di lavoro del passo, dimensionati sulle R righe iniziali"""
+
+    def __init__(self, forma, dtype, buffer=2):
+        """buffer: quanti array (R, N) servono al passo (tmp, e tmp2 se 2)"""
+        self._tmp = np.empty(forma, dtype=dtype)
+        self._tmp2 = np.empty(forma, dtype=dtype) if buffer > 1 else None
+        self._media = np.empty((forma[0], 1), dtype=dtype)
+        self.tmp = self._tmp
+        self.tmp2 = self._tmp2
+        self.media = self._media
+
+    def righe(self, n):
+        """Riduce i buffer alle prime n righe (viste contigue, nessuna copia)"""
+        self.tmp = self._tmp[:n]
+        self.tmp2 = self._tmp2[:n] if self._tmp2 is not None else None
+        self.media = self._media[:n]
+
+
+class _EnsembleBase:
+    """Macchinario comune: rumore a blocchi, maschera di convergenza, compattazione"""
+
+    dt = 0.05
+    t_max = 5.0
+    buffer_passo = 1  # array (R, N) di lavoro usati da _passo
+
+    def __init__(self, replica_ids, blocco=None, precisione='float64'):
+        """blocco: passi di rumore per estrazione (None: BLOCCO_LEGACY o BLOCCO_PASSI secondo il RNG)"""
+        self.replica_ids = list(replica_ids)
+        self.R = len(self.replica_ids)
+        self.blocco = None if blocco is None else max(1, int(blocco))
+        self.rngs = []
+        self.precisione = precisione
+        self.dtype = tipo_reale(precisione)
+        self._due_pi = self.dtype.type(DUE_PI)  # stesso tipo di theta: il modulo resta in precisione
+
+    # --- hook delle sottoclassi ---
+    def _costanti(self, A):
+        """Array (R, N) derivati da A e fissi durante l'evoluzione (compattati con A)"""
+        return None
+
+    def _passo(self, theta, A, costanti, rumore, t_prec, lavoro):
+        """Aggiorna theta sul posto usando i buffer di `lavoro`"""
+        raise NotImplementedError
+
+    def _convergenza(self, phi, phi_prec, t):
+        raise NotImplementedError
+
+    def _passi_per_blocco(self):
+        if self.blocco is not None:
+            return self.blocco
+        legacy = bool(self.rngs) and isinstance(self.rngs[0], np.random.RandomState)
+        return BLOCCO_LEGACY if legacy else BLOCCO_PASSI
+
+    # --- loop vettorizzato ---
+    def _evolvi(self, theta, A, registratore=None, strumenti=None):
+        """
+        Evolve tutte le repliche insieme.
+        Ritorna (phi_iniziale, phi_finale, passi) per replica: passi è il numero
+        di passi eseguiti, che serve a riallineare il RNG prima delle estrazioni finali.
+        strumenti: Strumentazione opzionale (tempi per fase e passi di convergenza)
+        """
+        crono = strumenti.cronometro(**self.etichette) if strumenti is not None else None
+        N = theta.shape[1]
+        tempi = griglia_tempi(self.dt, self.t_max)
+        max_passi = len(tempi)
+
+        # Stesso kernel di calcola_phi(), riga per riga: Φ identico alla replica singola
+        ordine = ParametroOrdine(A)
+        phi_iniziale = ordine.phi(theta)
+        if crono is not None:
+            crono.segna('calcola_phi')
+        if registratore is not None:
+            registratore.registra_righe(np.arange(self.R), 0, 0.0, phi_iniziale, np.angle(ordine.Z), theta)
+        phi_finale = phi_iniziale.copy()
+        passi = np.zeros(self.R, dtype=int)
+
+        # Stato delle sole repliche attive (compattato quando qualcuna converge)
+        attive = np.arange(self.R)
+        theta = theta.copy()
+        costanti = self._costanti(A)
+        lavoro = _Lavoro(theta.shape, self.dtype, self.buffer_passo)
+        phi_prec = phi_iniziale.copy()
+        stati = [None] * self.R
+        inizio_blocco = fine_blocco = 0
+        passi_blocco = max(1, min(self._passi_per_blocco(), max_passi, MEMORIA_RUMORE // (self.R * N * self.dtype.itemsize)))
+        riserva = np.empty((self.R, passi_blocco, N), dtype=self.dtype)
+        riallinea = passi_blocco > 1  # con un passo per blocco si estrae solo ciò che si usa
+        rumore = None
+
+        for passo in range(max_passi):
+            if attive.size == 0:
+                break
+
+            # Nuovo blocco di rumore: una chiamata al RNG per replica ogni `blocco` passi
+            if passo == fine_blocco:
+                inizio_blocco = passo
+                fine_blocco = min(passo + passi_blocco, max_passi)
+                rumore = riserva[:attive.size, :fine_blocco - passo]
+                for riga, r in enumerate(attive):
+                    rng = self.rngs[r]
+                    if riallinea:
+                        stati[r] = salva_stato(rng)
+                    rumore[riga] = rng.standard_normal((fine_blocco - passo, N))
+                if crono is not None:
+                    crono.segna('rng')
+
+            t_prec = tempi[passo - 1] if passo > 0 else 0.0
+            t = tempi[passo]
+
+            self._passo(theta, A, costanti, rumore[:, passo - inizio_blocco], t_prec, lavoro)
+            theta %= self._due_pi
+            if crono is not None:
+                crono.segna('passo')
+
+            phi = ordine.phi(theta)
+            if crono is not None:
+                crono.segna('calcola_phi')
+            if registratore is not None:
+                registratore.registra_righe(attive, passo + 1, t, phi, np.angle(ordine.Z), theta)
+                if crono is not None:
+                    crono.segna('registrazione')
+            finite = self._convergenza(phi, phi_prec, t)
+
+            if np.any(finite):
+                chiuse = attive[finite]
+                phi_finale[chiuse] = phi[finite]
+                passi[chiuse] = passo + 1
+                if riallinea:
+                    for r in chiuse:
+                        self._riallinea(r, stati[r], passo + 1 - inizio_blocco, N)
+                resto = ~finite
+                attive = attive[resto]
+                theta = theta[resto]
+                A = A[resto]
+                if costanti is not None:
+                    costanti = costanti[resto]
+                lavoro.righe(attive.size)
+                ordine = ParametroOrdine(A)
+                phi = phi[resto]
+                rumore = _compatta_righe(rumore, resto)
+
+            phi_prec = phi
+            if crono is not None:
+                crono.segna('convergenza')
+
+        # Repliche arrivate a t_max senza convergere
+        if attive.size:
+            phi_finale[attive] = phi_prec
+            passi[attive] = max_passi
+            if riallinea:
+                for r in attive:
+                    self._riallinea(r, stati[r], max_passi - inizio_blocco, N)
+
+        if crono is not None:
+            crono.segna('rng')  # riallineamento dei generatori
+            crono.chiudi()
+            convergite = np.ones(self.R, dtype=bool)
+            convergite[attive] = False
+            strumenti.registra_passi(self.etichette, passi, convergite)
+
+        return phi_iniziale, phi_finale, passi
+
+    def dinamica(self):
+        """
+        Solo l'evoluzione delle fasi, senza le estrazioni finali di evolve():
+        (phi_iniziale, phi_finale, passi) per replica, con Φ finale quello della dinamica
+        """
+        return self._evolvi(self.theta, self.A)
+
+    def _riallinea(self, r, stato, passi_consumati, N):
+        """Riporta il RNG della replica al punto in cui l'avrebbe lasciato il loop seriale"""
+        rng = self.rngs[r]
+        ripristina_stato(rng, stato)
+        rng.standard_normal(passi_consumati * N)
+
+
+# === ENSEMBLE EQUITY / EXTRACTIVE (test_50_repliche) ===
+class EnsemblePhiAvanzato(_EnsembleBase):
+    """Tutte le repliche di SistemaPhiAvanzato per un tipo di sistema"""
+
+    def __init__(self, tipo, replica_ids, seed_base=42, N=100, blocco=None, flussi=None,
+                 precisione='float64'):
+        super().__init__(replica_ids, blocco, precisione)
+        self.tipo = tipo
+        self.N = N
+        self.epsilon = 0.05
+        self.etichette = {'sistema': tipo}
+
+        self.theta = np.empty((self.R, N), dtype=self.dtype)
+        self.A = np.empty((self.R, N), dtype=self.dtype)
+        self.skewness = np.zeros(self.R)
+        self.seeds = []
+
+        for i, replica_id in enumerate(self.replica_ids):
+            if flussi is None:
+                rng = generatore_legacy(seed_base + replica_id * 1000)
+                self.seeds.append(replica_id * 1000 + 42)
+            else:
+                rng = flussi.generatore(tipo, None, replica_id)
+                self.seeds.append(flussi.seed)
+            self.rngs.append(rng)
+            self.theta[i] = rng.uniform(0, 2*np.pi, N)
+            if tipo == 'equity':
+                self.A[i] = np.ones(N) / N
+            else:
+                A = rng.pareto(1.5, N) + 1
+                A = np.sort(A)[::-1]
+                A = A / np.sum(A)
+                self.A[i] = A
+                self.skewness[i] = np.std(A) / np.mean(A)
+
+    def _costanti(self, A):
+        if self.tipo == 'equity':
+            return None
+        return 1 + 2 * A
+
+    def _passo(self, theta, A, costanti, rumore, t_prec, lavoro):
+        if self.tipo == 'equity':
+            # theta += 0.01 * rumore; poi theta = 0.95 * theta + 0.05 * media
+            np.multiply(rumore, 0.01, out=lavoro.tmp)
+            theta += lavoro.tmp
+            if t_prec > 0.5:
+                np.mean(theta, axis=1, keepdims=True, out=lavoro.media)
+                lavoro.media *= 0.05
+                theta *= 0.95
+                theta += lavoro.media
+        else:
+            # theta += (0.05 * rumore) * (1 + 2A)
+            np.multiply(rumore, 0.05, out=lavoro.tmp)
+            lavoro.tmp *= costanti
+            theta += lavoro.tmp
+
+    def _convergenza(self, phi, phi_prec, t):
+        if t <= 0.5:
+            return np.zeros(phi.shape, dtype=bool)
+        return np.abs(phi - phi_prec) < 1e-4
+
+    def evolve(self, registratore=None, strumenti=None):
+        """
+        Evolve l'ensemble e ritorna un dizionario per replica (come evolve() seriale).
+        registratore: RegistratoreTraiettorie opzionale con una riga per replica
+        strumenti: Strumentazione opzionale
+        """
+        inizio = time.perf_counter()
+        # Estrazioni pre-loop, nello stesso ordine del codice seriale
+        target_phi = np.empty(self.R)
+        tempo_target = np.empty(self.R)
+        for i, rng in enumerate(self.rngs):
+            if self.tipo == 'equity':
+                target_phi[i] = 0.994
+                tempo_target[i] = 1.8 + rng.standard_normal() * 0.2
+            else:
+                target_phi[i] = 0.25 + rng.standard_normal() * 0.1
+                tempo_target[i] = 2.3 + rng.standard_normal() * 0.3
+
+        phi_iniziale, _, _ = self._evolvi(self.theta, self.A, registratore, strumenti)
+
+        risultati = []
+        for i, replica_id in enumerate(self.replica_ids):
+            if self.tipo == 'equity':
+                phi_finale = 0.99 + 0.01 * self.rngs[i].random()
+                tempo_collasso = max(1.5, tempo_target[i])
+            else:
+                phi_finale = max(0.05, min(0.5, target_phi[i]))
+                tempo_collasso = max(2.0, tempo_target[i])
+
+            risultati.append({
+                'tipo': self.tipo,
+                'replica_id': replica_id,
+                'phi_iniziale': float(phi_iniziale[i]),
+                'phi_finale': float(phi_finale),
+                'tempo_collasso': float(tempo_collasso),
+                'delta_phi': float(phi_finale - phi_iniziale[i]),
+                'skewness_ampiezze': float(self.skewness[i]),
+                'parametri': {
+                    'N': self.N,
+                    'epsilon': self.epsilon,
+                    'seed': self.seeds[i]
+                }
+            })
+            if self.precisione != 'float64':
+                risultati[-1]['parametri']['precisione'] = self.precisione
+        if strumenti is not None:
+            strumenti.registra_repliche(self.etichette, self.R, time.perf_counter() - inizio)
+        return risultati
+
+
+# === ENSEMBLE SISTEMI MISTI (sistemi_misti) ===
+class EnsembleMisto(_EnsembleBase):
+    """Tutte le repliche di SistemaMisto per una proporzione di mix"""
+
+    buffer_passo = 2
+
+    def __init__(self, mix_proporzione, replica_ids, seed_base=12345, N=100, blocco=None,
+                 flussi=None, precisione='float64', epsilon=0.05, alpha=1.5):
+        """epsilon: scala del rumore; alpha: esponente di Pareto delle ampiezze extractive"""
+        super().__init__(replica_ids, blocco, precisione)
+        self.mix = mix_proporzione
+        self.N = N
+        self.epsilon = epsilon
+        self.alpha = alpha
+        self.etichette = {'sistema': 'misto', 'mix': float(mix_proporzione)}
+
+        self.seeds = []
+        self.theta = np.empty((self.R, N), dtype=self.dtype)
+        self.A = np.empty((self.R, N), dtype=self.dtype)
+        self.varianza = np.empty(self.R)
+        self.skewness = np.empty(self.R)
+
+        for i, replica_id in enumerate(self.replica_ids):
+            if flussi is None:
+                seed = seed_base + int(mix_proporzione * 10000) + replica_id
+                rng = generatore_legacy(seed)
+            else:
+                seed = flussi.seed
+                rng = flussi.generatore('misto', mix_proporzione, replica_id)
+            self.seeds.append(seed)
+            self.rngs.append(rng)
+            self.theta[i] = rng.uniform(0, 2*np.pi, N)
+
+            A_equity = np.ones(N) / N
+            A_extractive = rng.pareto(alpha, N) + 1
+            A_extractive = np.sort(A_extractive)[::-1]
+            A_extractive = A_extractive / np.sum(A_extractive)
+            A = mix_proporzione * A_equity + (1 - mix_proporzione) * A_extractive
+            A = A / np.sum(A)
+
+            self.A[i] = A
+            self.varianza[i] = np.var(A)
+            self.skewness[i] = np.mean(((A - np.mean(A)) / np.std(A))**3)
+
+        # Parametri dinamici in funzione del mix (uguali per tutte le repliche);
+        # con epsilon = 0.05 il rumore vale 0.01 e 0.05 * (1 - mix) come in SistemaMisto
+        if self.mix > 0.5:
+            self.forza_sincronizzazione = 0.1 * self.mix
+            self.rumore = self.epsilon / 5
+            self.tempo_target = 1.8 + (1 - self.mix) * 0.5
+            self.phi_target = 0.99 - (1 - self.mix) * 0.2
+        else:
+            self.forza_sincronizzazione = 0.01 * self.mix
+            self.rumore = self.epsilon * (1 - self.mix)
+            self.tempo_target = 2.3 - self.mix * 0.5
+            self.phi_target = 0.25 + self.mix * 0.3
+
+    def _passo(self, theta, A, costanti, rumore, t_prec, lavoro):
+        # theta += forza * (media - theta) + rumore * ξ
+        np.mean(theta, axis=1, keepdims=True, out=lavoro.media)
+        np.subtract(lavoro.media, theta, out=lavoro.tmp)
+        lavoro.tmp *= self.forza_sincronizzazione
+        np.multiply(rumore, self.rumore, out=lavoro.tmp2)
+        lavoro.tmp += lavoro.tmp2
+        theta += lavoro.tmp
+
+    def _convergenza(self, phi, phi_prec, t):
+        if not t > self.tempo_target:
+            return np.zeros(phi.shape, dtype=bool)
+        return np.abs(phi - self.phi_target) < 0.01
+
+    def evolve(self, registratore=None, strumenti=None):
+        """
+        Evolve l'ensemble e ritorna un dizionario per replica (come evolve() seriale).
+        registratore: RegistratoreTraiettorie opzionale con una riga per replica
+        strumenti: Strumentazione opzionale
+        """
+        inizio = time.perf_counter()
+        phi_iniziale, phi_attuale, _ = self._evolvi(self.theta, self.A, registratore, strumenti)
+
+        risultati = []
+        for i, replica_id in enumerate(self.replica_ids):
+            rng = self.rngs[i]
+            phi_finale = phi_attuale[i]
+            if self.mix > 0.8:
+                phi_finale = 0.98 + 0.02 * rng.random()
+            elif self.mix < 0.2:
+                phi_finale = 0.2 + 0.3 * rng.random()
+
+            tempo_collasso = self.tempo_target + rng.standard_normal() * 0.2
+
+            risultati.append({
+                'mix_proporzione': float(self.mix),
+                'replica_id': replica_id,
+                'phi_iniziale': float(phi_iniziale[i]),
+                'phi_finale': float(phi_finale),
+                'tempo_collasso': float(tempo_collasso),
+                'varianza_ampiezze': float(self.varianza[i]),
+                'skewness_ampiezze': float(self.skewness[i]),
+                'parametri': {
+                    'N': self.N,
+                    'epsilon': self.epsilon,
+                    'seed': self.seeds[i]
+                }
+            })
+            if self.alpha != 1.5:
+                risultati[-1]['parametri']['alpha'] = self.alpha
+            if self.precisione != 'float64':
+                risultati[-1]['parametri']['precisione'] = self.precisione
+        if strumenti is not None:
+            strumenti.registra_repliche(self.etichette, self.R, time.perf_counter() - inizio)
+        return risultati
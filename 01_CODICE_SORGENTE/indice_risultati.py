@@ -0,0 +1,103 @@
+# === indice_risultati.py ===
+# Indice delle esecuzioni salvate in una cartella di lavoro: un solo file
+# INDICE_RISULTATI.json con una voce per cartella RISULTATI_*, così l'analisi
+# sceglie l'esecuzione e le colonne da leggere senza aprire il JSON completo
+# di ogni cartella (che con --valori-grezzi contiene tutte le repliche).
+#
+#   INDICE_RISULTATI.json
+#     {"versione": 1, "esecuzioni": {"RISULTATI_50_...": {voce}, ...}}
+#
+# Ogni voce riporta repliche, sistemi e colonne dell'archivio colonnare.
+# test_50_repliche registra la propria cartella a fine esecuzione; le
+# cartelle prodotte prima dell'indice (o copiate da altre macchine) vengono
+# descritte e aggiunte alla prima lettura, quelle cancellate rimosse.
+# Le esecuzioni non ancora completate non entrano nell'indice.
+
+import json
+import os
+
+import numpy as np
+
+from .archivio import ArchivioColonnare
+from .checkpoint import Checkpoint
+
+FILE_INDICE = 'INDICE_RISULTATI.json'
+PREFISSO_50 = 'RISULTATI_50_'
+FILE_COMPLETI = 'RISULTATI_COMPLETI.json'
+
+
+def descrivi_esecuzione(cartella):
+    """
+    Voce d'indice di una cartella risultati, o None se l'esecuzione non è completa.
+    Legge solo lo schema e la colonna 'tipo' dell'archivio, mai il JSON completo.
+    """
+    if not os.path.exists(os.path.join(cartella, FILE_COMPLETI)):
+        return None
+    voce = {
+        'cartella': os.path.basename(os.path.normpath(cartella)),
+        'modificato': os.path.getmtime(os.path.join(cartella, FILE_COMPLETI)),
+        'archivio': False,
+        'repliche': None,
+        'sistemi': None,
+        'colonne': [],
+    }
+    archivio = ArchivioColonnare(os.path.join(cartella, 'archivio'))
+    if archivio.schema is not None:
+        repliche, sistemi = 0, set()
+        for blocco in archivio.blocchi(['tipo']):
+            repliche += len(blocco['tipo'])
+            sistemi.update(np.unique(blocco['tipo']).tolist())
+        voce.update(archivio=True, repliche=repliche, sistemi=sorted(sistemi),
+                    colonne=archivio.colonne())
+    return voce
+
+
+def _leggi(radice):
+    percorso = os.path.join(radice, FILE_INDICE)
+    if not os.path.exists(percorso):
+        return {'versione': 1, 'esecuzioni': {}}
+    with open(percorso) as f:
+        return json.load(f)
+
+
+def registra_esecuzione(cartella):
+    """Aggiunge (o aggiorna) la cartella nell'indice della cartella che la contiene"""
+    voce = descrivi_esecuzione(cartella)
+    if voce is None:
+        raise ValueError(f"{cartella} non contiene un'esecuzione completa ({FILE_COMPLETI} mancante)")
+    radice = os.path.dirname(os.path.normpath(cartella)) or '.'
+    indice = _leggi(radice)
+    indice['esecuzioni'][voce['cartella']] = voce
+    Checkpoint._scrivi_atomico(os.path.join(radice, FILE_INDICE), indice)
+    return voce
+
+
+def carica_indice(radice='.', prefisso=PREFISSO_50):
+    """
+    Voci dell'indice con il prefisso dato, dalla più vecchia alla più recente.
+    Allinea l'indice alle cartelle presenti: descrive solo quelle nuove.
+    """
+    indice = _leggi(radice)
+    esecuzioni = indice['esecuzioni']
+    presenti = {voce.name for voce in os.scandir(radice)
+                if voce.is_dir() and voce.name.startswith(prefisso)}
+
+    modificato = False
+    for nome in [n for n in esecuzioni if n.startswith(prefisso) and n not in presenti]:
+        del esecuzioni[nome]
+        modificato = True
+    for nome in sorted(presenti - set(esecuzioni)):
+        voce = descrivi_esecuzione(os.path.join(radice, nome))
+        if voce is not None:
+            esecuzioni[nome] = voce
+            modificato = True
+    if modificato:
+        Checkpoint._scrivi_atomico(os.path.join(radice, FILE_INDICE), indice)
+
+    # Il nome contiene data e ora: l'ordine alfabetico è quello cronologico
+    return [esecuzioni[nome] for nome in sorted(esecuzioni) if nome.startswith(prefisso)]
+
+
+def ultima_esecuzione(radice='.', prefisso=PREFISSO_50):
+    voci = carica_indice(radice, prefisso)
+    return voci[-1] if voci else None
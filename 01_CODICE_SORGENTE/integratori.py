@@ -0,0 +1,416 @@
+# === integratori.py ===
+# Schemi di integrazione per le SDE di Kuramoto (kuramoto, reti), intercambiabili
+# in SistemaKuramoto.evolve(integratore=...).
+#
+#   dθ = f(θ) dt + g dW        f: sistema.deriva(theta, out)    g: sistema.rumore
+#
+#   EuleroMaruyama  passo fisso, ordine forte 1/2 (1 con rumore additivo)
+#   Milstein        aggiunge ½ g g' (ΔW² - h); il rumore di Kuramoto è additivo
+#                   (g' = 0), quindi coincide con Eulero–Maruyama: è qui per i
+#                   sistemi che definiscono diffusione/diffusione_derivata
+#   Heun            predittore-correttore sulla deriva, stesso ΔW nei due stadi
+#   Adattivo        Heun con stima d'errore incorporata ½ h |f(θ̃) - f(θ)| (la
+#                   differenza da Eulero), pesata con le ampiezze: Σ A_j |e_j|
+#                   limita l'errore su Z, quindi su Φ. Passi lunghi nei tratti
+#                   quieti (stato sincronizzato o incoerente), corti nei transitori
+#
+# Il costo vero sta nelle valutazioni della deriva, non nei passi: un passo
+# Heun/Adattivo ne costa due (più quelle dei passi rifiutati), uno di Eulero una.
+# A tol 1e-2 l'Adattivo scende da 400 a ~150 passi ma da 401 solo a ~310
+# valutazioni: il risparmio reale è modesto.
+#
+# Il numero di passi dell'Adattivo non si conosce in anticipo
+# (passi_previsti() è None): evolve() allarga il registratore man mano.
+#
+# Con il passo variabile il rumore resta corretto solo se un passo rifiutato
+# riusa l'incremento browniano già estratto: l'intervallo viene diviso con il
+# ponte browniano e la seconda metà va in una pila di intervalli futuri, da
+# consumare prima di estrarre nuovo rumore. Scartare ΔW e ri-estrarlo
+# favorirebbe gli incrementi piccoli e distorcerebbe la statistica.
+#
+# Gli eventi (Φ che supera una soglia) cadono in generale dentro un passo:
+# attraversamento() li colloca interpolando tra i due punti accettati, invece
+# di arrotondarli al bordo del passo.
+#
+# valida_integratori() confronta gli schemi con Eulero–Maruyama a dt fine
+# sugli stessi sistemi (stesse condizioni iniziali): passi, valutazioni della
+# deriva, tempo, Φ medio e tempo di sincronizzazione.
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from .flussi_rng import FlussiRNG
+from .kuramoto import FREQUENZE, SistemaKuramoto
+
+DUE_PI = 2 * np.pi
+
+
+def attraversamento(t0, y0, t1, y1, soglia):
+    """Istante in cui y sale sopra la soglia tra (t0, y0) e (t1, y1), interpolato; None se non la attraversa"""
+    if y0 < soglia <= y1:
+        return t0 + (soglia - y0) / (y1 - y0) * (t1 - t0)
+    return None
+
+
+class MediaTemporale:
+    """Media e varianza nel tempo (regola dei trapezi) di y(t) per t ≥ inizio, su punti non equispaziati"""
+
+    def __init__(self, inizio):
+        self.inizio = inizio
+        self.durata = 0.0
+        self.integrale = 0.0
+        self.integrale_quadrati = 0.0
+
+    def aggiungi(self, t0, y0, t1, y1):
+        if t1 <= self.inizio or t1 <= t0:
+            return
+        if t0 < self.inizio:
+            y0 = y0 + (y1 - y0) * (self.inizio - t0) / (t1 - t0)
+            t0 = self.inizio
+        h = t1 - t0
+        self.durata += h
+        self.integrale += 0.5 * h * (y0 + y1)
+        self.integrale_quadrati += 0.5 * h * (y0 * y0 + y1 * y1)
+
+    def media(self):
+        return self.integrale / self.durata if self.durata > 0 else None
+
+    def varianza(self):
+        if self.durata <= 0:
+            return 0.0
+        return max(0.0, self.integrale_quadrati / self.durata - self.media()**2)
+
+
+# === SCHEMI A PASSO FISSO ===
+class _Schema:
+    """Base: contatori e buffer; avanza() fa un passo h con incremento browniano dW"""
+    nome = None
+
+    def __init__(self, dt=0.05):
+        self.dt = float(dt)
+        self.passi = 0
+        self.rifiutati = 0
+        self.valutazioni = 0
+
+    def descrizione(self):
+        return {'schema': self.nome, 'dt': self.dt}
+
+    def passi_previsti(self, t_max):
+        """Passi che traiettoria() farà fino a t_max (None se dipendono dalla dinamica)"""
+        return int(round(t_max / self.dt))
+
+    def _prepara(self, sistema):
+        N = sistema.N
+        self._f = np.empty(N)
+        self._f_prova = np.empty(N)
+        self._prova = np.empty(N)
+        self._rumore = np.empty(N)
+        self._dW = np.empty(N)
+        self.passi = self.rifiutati = self.valutazioni = 0
+
+    def _deriva(self, sistema, theta, out):
+        self.valutazioni += 1
+        return sistema.deriva(theta, out)
+
+    def _diffusione(self, sistema, theta, dW, out):
+        """out = g(θ) dW: rumore additivo σ dW, oppure sistema.diffusione se definita"""
+        if hasattr(sistema, 'diffusione'):
+            sistema.diffusione(theta, out)
+            out *= dW
+        else:
+            np.multiply(dW, sistema.rumore, out=out)
+        return out
+
+    def avanza(self, sistema, theta, h, dW, f, out):
+        raise NotImplementedError
+
+    def traiettoria(self, sistema, t_max):
+        """
+        Evolve sistema.theta sul posto fino a t_max; genera (t, Φ) in ogni punto
+        accettato, da (0, Φ iniziale) a (t_max, Φ finale).
+        """
+        self._prepara(sistema)
+        theta = sistema.theta
+        passi = self.passi_previsti(t_max)
+        radice_dt = math.sqrt(self.dt)
+        for k in range(passi):
+            phi = self._deriva(sistema, theta, self._f)
+            yield k * self.dt, phi
+            if sistema.rumore > 0:
+                sistema.rng.standard_normal(out=self._dW)
+                self._dW *= radice_dt
+            else:
+                self._dW.fill(0.0)
+            self.avanza(sistema, theta, self.dt, self._dW, self._f, theta)
+            np.remainder(theta, DUE_PI, out=theta)
+            self.passi += 1
+        yield passi * self.dt, self._deriva(sistema, theta, self._f)
+
+
+class EuleroMaruyama(_Schema):
+    nome = 'eulero_maruyama'
+
+    def avanza(self, sistema, theta, h, dW, f, out):
+        """out = θ + f h + g ΔW (out può coincidere con theta)"""
+        rumore = self._diffusione(sistema, theta, dW, self._rumore)
+        np.multiply(f, h, out=self._prova)
+        self._prova += rumore
+        np.add(theta, self._prova, out=out)
+        return out
+
+
+class Milstein(EuleroMaruyama):
+    nome = 'milstein'
+
+    def avanza(self, sistema, theta, h, dW, f, out):
+        """Eulero–Maruyama + ½ g g' (ΔW² - h); con rumore additivo la correzione è nulla"""
+        if not hasattr(sistema, 'diffusione_derivata'):
+            return super().avanza(sistema, theta, h, dW, f, out)
+        correzione = np.empty(sistema.N)
+        sistema.diffusione(theta, correzione)
+        sistema.diffusione_derivata(theta, self._f_prova)
+        correzione *= self._f_prova
+        correzione *= 0.5 * (dW * dW - h)
+        super().avanza(sistema, theta, h, dW, f, out)
+        out += correzione
+        return out
+
+
+class Heun(_Schema):
+    nome = 'heun'
+
+    def avanza(self, sistema, theta, h, dW, f, out, errore=None):
+        """
+        θ̃ = θ + f(θ) h + g ΔW,   out = θ + ½ (f(θ) + f(θ̃)) h + g ΔW.
+        errore (opzionale): riceve ½ h (f(θ̃) - f(θ)), distanza dal passo di Eulero.
+        Il rumore è valutato solo in θ: schema pensato per rumore additivo.
+        """
+        rumore = self._diffusione(sistema, theta, dW, self._rumore)
+        prova = self._prova
+        np.multiply(f, h, out=prova)
+        prova += rumore
+        prova += theta
+        f_prova = self._f_prova
+        self._deriva(sistema, prova, f_prova)
+
+        if errore is not None:
+            np.subtract(f_prova, f, out=errore)
+            errore *= 0.5 * h
+        f_prova += f
+        f_prova *= 0.5 * h
+        f_prova += rumore
+        np.add(theta, f_prova, out=out)
+        return out
+
+
+# === SCHEMA ADATTIVO ===
+def dividi_incremento(h, dW, h1, rng):
+    """
+    Ponte browniano: dato l'incremento dW su [0, h], estrae quello su [0, h1]
+    condizionato a dW. Ritorna (dW1, dW - dW1).
+    """
+    dW1 = rng.standard_normal(dW.size)
+    dW1 *= math.sqrt(h1 * (h - h1) / h)
+    dW1 += (h1 / h) * dW
+    return dW1, dW - dW1
+
+
+class Adattivo(Heun):
+    nome = 'adattivo'
+
+    def __init__(self, tolleranza=1e-2, h_iniziale=0.05, h_min=1e-4, h_max=0.5):
+        """
+        tolleranza: errore locale ammesso su Z per passo, Σ_j A_j |e_j|
+        h_iniziale/h_min/h_max: passo di partenza e limiti
+        """
+        super().__init__(dt=h_iniziale)
+        self.tolleranza = float(tolleranza)
+        self.h_min = float(h_min)
+        self.h_max = float(h_max)
+
+    def descrizione(self):
+        return {'schema': self.nome, 'tolleranza': self.tolleranza,
+                'h_iniziale': self.dt, 'h_min': self.h_min, 'h_max': self.h_max}
+
+    def passi_previsti(self, t_max):
+        return None  # dipendono dalla dinamica (e i resti della pila scendono sotto h_min)
+
+    def _norma(self, sistema, errore):
+        np.abs(errore, out=errore)
+        return float(sistema.A @ errore) / self.tolleranza
+
+    def traiettoria(self, sistema, t_max):
+        self._prepara(sistema)
+        theta = sistema.theta
+        nuovo = np.empty(sistema.N)
+        errore = np.empty(sistema.N)
+        con_rumore = sistema.rumore > 0
+        rng = sistema.rng
+
+        pila = []      # intervalli futuri (h, dW) con rumore già estratto, il prossimo in cima
+        t = 0.0
+        h = self.dt
+        phi = self._deriva(sistema, theta, self._f)
+        yield t, phi
+
+        while t_max - t > 1e-12 * max(1.0, t_max):
+            h = min(h, t_max - t)
+            if pila:
+                h_passo, dW = pila.pop()
+                if h < h_passo and con_rumore:
+                    dW, resto = dividi_incremento(h_passo, dW, h, rng)
+                    pila.append((h_passo - h, resto))
+                    h_passo = h
+            else:
+                h_passo = h
+                if con_rumore:
+                    dW = rng.standard_normal(sistema.N)
+                    dW *= math.sqrt(h_passo)
+                else:
+                    dW = self._dW
+                    dW.fill(0.0)
+
+            self.avanza(sistema, theta, h_passo, dW, self._f, nuovo, errore=errore)
+            e = self._norma(sistema, errore)
+
+            if e > 1.0 and h_passo > self.h_min:
+                # Rifiutato: le due metà dell'intervallo restano legate al dW estratto
+                self.rifiutati += 1
+                h = max(self.h_min, h_passo * max(0.2, 0.9 * e**-0.5))
+                if con_rumore:
+                    prima, seconda = dividi_incremento(h_passo, dW, h, rng)
+                    pila.append((h_passo - h, seconda))
+                    pila.append((h, prima))
+                continue
+
+            np.remainder(nuovo, DUE_PI, out=theta)
+            t += h_passo
+            self.passi += 1
+            phi = self._deriva(sistema, theta, self._f)
+            yield t, phi
+
+            fattore = 2.0 if e == 0 else min(2.0, max(0.2, 0.9 * e**-0.5))
+            h = min(self.h_max, max(self.h_min, h_passo * fattore))
+
+
+SCHEMI = {
+    'eulero_maruyama': EuleroMaruyama,
+    'milstein': Milstein,
+    'heun': Heun,
+    'adattivo': Adattivo,
+}
+
+
+def crea_integratore(nome, **opzioni):
+    """Integratore per nome (vedi SCHEMI); opzioni: dt, oppure tolleranza/h_* per 'adattivo'"""
+    if nome not in SCHEMI:
+        raise ValueError(f"Schema di integrazione sconosciuto: {nome} (attesi: {tuple(SCHEMI)})")
+    return SCHEMI[nome](**opzioni)
+
+
+# === VALIDAZIONE ===
+def valida_integratori(N=1000, repliche=10, t_max=30.0, K=2.0, tipo='equity', frequenze='lorentz',
+                       larghezza=0.5, rumore=0.1, dt=0.05, raffinamento=16,
+                       tolleranze=(2e-3, 5e-3, 1e-2, 2e-2), soglia_sincronia=0.6, seed=None):
+    """
+    Confronta gli schemi con Eulero–Maruyama a dt/raffinamento (riferimento) sulle
+    stesse repliche. Con rumore le traiettorie dei diversi schemi usano incrementi
+    diversi: il confronto è sulle medie d'ensemble (accuratezza debole); con
+    rumore = 0 anche la differenza per replica è significativa.
+    """
+    flussi = FlussiRNG() if seed is None else FlussiRNG(seed)
+    candidati = [('riferimento', lambda: EuleroMaruyama(dt / raffinamento)),
+                 ('eulero_maruyama', lambda: EuleroMaruyama(dt)),
+                 ('milstein', lambda: Milstein(dt)),
+                 ('heun', lambda: Heun(dt))]
+    candidati += [(f'adattivo_{tol:g}', lambda tol=tol: Adattivo(tolleranza=tol, h_iniziale=dt))
+                  for tol in tolleranze]
+
+    esiti = {}
+    for nome, costruttore in candidati:
+        righe = []
+        for replica in range(1, repliche + 1):
+            sistema = SistemaKuramoto(N=N, K=K, tipo=tipo, frequenze=frequenze, larghezza=larghezza,
+                                      rumore=rumore, dt=dt, replica_id=replica, flussi=flussi)
+            integratore = costruttore()
+            r = sistema.evolve(t_max=t_max, soglia_sincronia=soglia_sincronia, integratore=integratore)
+            righe.append((r['phi_medio'], r['phi_finale'],
+                          np.nan if r['tempo_sincronizzazione'] is None else r['tempo_sincronizzazione'],
+                          r['passi'], r['valutazioni_deriva'], r['passi_rifiutati'], r['tempo_calcolo']))
+        esiti[nome] = np.array(righe)
+
+    riferimento = esiti['riferimento']
+    riepilogo = {}
+    for nome, valori in esiti.items():
+        riepilogo[nome] = {
+            'phi_medio': float(np.mean(valori[:, 0])),
+            'errore_phi_medio': float(abs(np.mean(valori[:, 0]) - np.mean(riferimento[:, 0]))),
+            'errore_phi_finale_replica': float(np.mean(np.abs(valori[:, 1] - riferimento[:, 1]))),
+            'tempo_sincronizzazione': float(np.nanmean(valori[:, 2])) if np.isfinite(valori[:, 2]).any() else None,
+            'errore_tempo_sincronizzazione': (float(abs(np.nanmean(valori[:, 2]) - np.nanmean(riferimento[:, 2])))
+                                              if np.isfinite(valori[:, 2]).any()
+                                              and np.isfinite(riferimento[:, 2]).any() else None),
+            'passi': float(np.mean(valori[:, 3])),
+            'valutazioni_deriva': float(np.mean(valori[:, 4])),
+            'rifiutati': float(np.mean(valori[:, 5])),
+            'secondi': float(np.mean(valori[:, 6])),
+        }
+    return riepilogo
+
+
+def stampa_validazione(riepilogo):
+    print(f"\n{'Schema':<18} {'passi':>8} {'f(θ)':>8} {'rifiut.':>8} {'s/rep':>7} "
+          f"{'Φ medio':>9} {'|ΔΦ|':>9} {'|ΔΦ_fin|':>9} {'t_sinc':>8} {'|Δt|':>8}")
+    print('-' * 102)
+    for nome, r in riepilogo.items():
+        t_sinc = '-' if r['tempo_sincronizzazione'] is None else f"{r['tempo_sincronizzazione']:.3f}"
+        dt_sinc = '-' if r['errore_tempo_sincronizzazione'] is None else f"{r['errore_tempo_sincronizzazione']:.4f}"
+        print(f"{nome:<18} {r['passi']:>8.0f} {r['valutazioni_deriva']:>8.0f} {r['rifiutati']:>8.0f} "
+              f"{r['secondi']:>7.3f} {r['phi_medio']:>9.5f} {r['errore_phi_medio']:>9.2e} "
+              f"{r['errore_phi_finale_replica']:>9.2e} {t_sinc:>8} {dt_sinc:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Confronto degli schemi di integrazione di Kuramoto con Eulero–Maruyama a dt fine")
+    parser.add_argument('--N', type=int, default=1000)
+    parser.add_argument('--repliche', type=int, default=10)
+    parser.add_argument('--t-max', type=float, default=30.0)
+    parser.add_argument('--K', type=float, default=2.0)
+    parser.add_argument('--tipo', choices=['equity', 'extractive'], default='equity')
+    parser.add_argument('--frequenze', choices=FREQUENZE, default='lorentz')
+    parser.add_argument('--larghezza', type=float, default=0.5)
+    parser.add_argument('--rumore', type=float, default=0.1)
+    parser.add_argument('--dt', type=float, default=0.05)
+    parser.add_argument('--raffinamento', type=int, default=16,
+                        help="Il riferimento usa dt/raffinamento (default: 16)")
+    parser.add_argument('--tolleranze', type=float, nargs='+', default=[2e-3, 5e-3, 1e-2, 2e-2])
+    parser.add_argument('--soglia', type=float, default=0.6,
+                        help="Soglia di Φ per il tempo di sincronizzazione (default: 0.6)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🧮 VALIDAZIONE DEGLI INTEGRATORI")
+    print("=" * 60)
+    print(f"N={args.N}, K={args.K}, {args.tipo}, ω {args.frequenze}({args.larghezza}), "
+          f"σ={args.rumore}, t_max={args.t_max}, {args.repliche} repliche, "
+          f"riferimento dt={args.dt}/{args.raffinamento}")
+
+    inizio = time.time()
+    riepilogo = valida_integratori(N=args.N, repliche=args.repliche, t_max=args.t_max, K=args.K,
+                                   tipo=args.tipo, frequenze=args.frequenze, larghezza=args.larghezza,
+                                   rumore=args.rumore, dt=args.dt, raffinamento=args.raffinamento,
+                                   tolleranze=args.tolleranze, soglia_sincronia=args.soglia,
+                                   seed=args.seed)
+    stampa_validazione(riepilogo)
+    if args.rumore > 0:
+        print("\nℹ️  Con rumore |ΔΦ_fin| per replica confronta traiettorie con incrementi diversi:"
+              " fa fede |ΔΦ| sulla media d'ensemble")
+    print(f"\n✅ Completato in {time.time() - inizio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# === kuramoto.py ===
+# Integratore di Kuramoto pesato per ampiezza, formulazione di campo medio.
+#
+#   dθ_i/dt = ω_i + K Σ_j A_j sin(θ_j - θ_i) + σ ξ_i(t)
+#           = ω_i + K Φ sin(ψ - θ_i) + σ ξ_i(t),      Z = Σ_j A_j e^{iθ_j} = Φ e^{iψ}
+#
+# L'accoppiamento passa dal parametro d'ordine complesso Z: ogni passo costa
+# O(N) invece di O(N²). Stessa rappresentazione A/theta degli altri sistemi
+# (A normalizzate a somma 1, theta in [0, 2π)), ma N, K, distribuzione delle
+# frequenze e rumore sono parametri.
+
+import time
+
+import numpy as np
+
+from .flussi_rng import FlussiRNG
+from .ordine import ParametroOrdine
+from .traiettorie import registra_stato
+
+DUE_PI = 2 * np.pi
+FREQUENZE = ('lorentz', 'gauss', 'uniforme', 'nessuna')
+
+
+def genera_ampiezze(tipo, N, rng, alpha=1.5, mix=None):
+    """
+    Ampiezze normalizzate a somma 1.
+    tipo: 'equity' (uniformi), 'extractive' (Pareto di forma alpha), 'misto' (combinazione
+    convessa con peso mix sull'equity, come in SistemaMisto)
+    """
+    A_equity = np.full(N, 1.0 / N)
+    if tipo == 'equity':
+        return A_equity
+
+    A_extractive = rng.pareto(alpha, N) + 1
+    A_extractive = np.sort(A_extractive)[::-1]
+    A_extractive /= np.sum(A_extractive)
+    if tipo == 'extractive':
+        return A_extractive
+    if tipo == 'misto':
+        A = mix * A_equity + (1 - mix) * A_extractive
+        return A / np.sum(A)
+    raise ValueError(f"Tipo di ampiezze sconosciuto: {tipo}")
+
+
+def genera_frequenze(distribuzione, N, rng, larghezza=0.5, centro=0.0):
+    """Frequenze naturali ω_i: larghezza è γ (Lorentz), σ (Gauss) o semiampiezza (uniforme)"""
+    if distribuzione == 'lorentz':
+        return centro + larghezza * rng.standard_cauchy(N)
+    if distribuzione == 'gauss':
+        return centro + larghezza * rng.standard_normal(N)
+    if distribuzione == 'uniforme':
+        return rng.uniform(centro - larghezza, centro + larghezza, N)
+    if distribuzione == 'nessuna':
+        return np.full(N, float(centro))
+    raise ValueError(f"Distribuzione di frequenze sconosciuta: {distribuzione} (attese: {FREQUENZE})")
+
+
+class SistemaKuramoto:
+    def __init__(self, N=1000, K=1.0, tipo='equity', mix=None, alpha=1.5,
+                 frequenze='lorentz', larghezza=0.5, rumore=0.0, dt=0.05,
+                 replica_id=1, flussi=None, seed=None):
+        """
+        N: numero di oscillatori          K: accoppiamento
+        tipo/mix/alpha: distribuzione delle ampiezze A (vedi genera_ampiezze)
+        frequenze/larghezza: distribuzione delle ω_i
+        rumore: intensità σ del rumore bianco sulle fasi (0 = deterministico)
+        flussi: FlussiRNG (se None, FlussiRNG(seed) con il seed radice di default)
+        """
+        self.N = int(N)
+        self.K = float(K)
+        self.tipo = tipo
+        self.mix = mix
+        self.alpha = alpha
+        self.frequenze = frequenze
+        self.larghezza = float(larghezza)
+        self.rumore = float(rumore)
+        self.dt = float(dt)
+        self.replica_id = replica_id
+
+        if flussi is None:
+            flussi = FlussiRNG() if seed is None else FlussiRNG(seed)
+        self.seed = flussi.seed
+        self.rng = flussi.generatore(f"kuramoto_{tipo}", mix, replica_id)
+
+        self.theta = self.rng.uniform(0, DUE_PI, self.N)
+        self.A = genera_ampiezze(tipo, self.N, self.rng, alpha=alpha, mix=mix)
+        self.omega = genera_frequenze(frequenze, self.N, self.rng, larghezza=self.larghezza)
+
+        self._ordine = ParametroOrdine(self.A)
+
+        # Buffer preallocati: il passo non alloca array di dimensione N
+        self._cos = np.empty(self.N)
+        self._sin = np.empty(self.N)
+        self._deriva = np.empty(self.N)
+        self._tmp = np.empty(self.N)
+
+    def parametro_ordine(self):
+        """Ritorna (Φ, ψ) dal parametro d'ordine complesso Z = Σ A_j e^{iθ_j}"""
+        phi, psi = self._ordine.calcola(self.theta)
+        return float(phi), float(psi)
+
+    def calcola_phi(self):
+        """Calcola parametro d'ordine Φ"""
+        return self.parametro_ordine()[0]
+
+    def deriva(self, theta, out):
+        """
+        Scrive in out la deriva ω_i + K Φ sin(ψ - θ_i) valutata in theta; ritorna Φ(theta).
+        Usata da passo e dagli schemi di integrazione (vedi integratori).
+        """
+        c, s, tmp = self._cos, self._sin, self._tmp
+        np.cos(theta, out=c)
+        np.sin(theta, out=s)
+        z_re = self.A @ c
+        z_im = self.A @ s
+
+        # K Φ sin(ψ - θ_i) = K (Im Z cos θ_i - Re Z sin θ_i): riusa cos/sin già calcolati
+        np.multiply(c, self.K * z_im, out=out)
+        np.multiply(s, self.K * z_re, out=tmp)
+        out -= tmp
+        out += self.omega
+        return float(np.hypot(z_re, z_im))
+
+    def passo(self):
+        """Un passo di Euler–Maruyama; ritorna Φ prima del passo"""
+        deriva, tmp = self._deriva, self._tmp
+        phi = self.deriva(self.theta, deriva)
+
+        deriva *= self.dt
+        self.theta += deriva
+        if self.rumore > 0:
+            self.rng.standard_normal(out=tmp)
+            tmp *= self.rumore * np.sqrt(self.dt)
+            self.theta += tmp
+        np.remainder(self.theta, DUE_PI, out=self.theta)
+
+        return phi
+
+    def evolve(self, t_max=5.0, transitorio=None, soglia_sincronia=0.9, registratore=None, riga=0,
+               integratore=None):
+        """
+        Evolve fino a t_max (registratore: RegistratoreTraiettorie opzionale).
+        Φ medio e fluttuazioni sono calcolati dopo il transitorio (default: metà di t_max).
+        tempo_sincronizzazione: primo istante con Φ ≥ soglia_sincronia (None se mai).
+        integratore: schema di integratori (es. Adattivo()); None = Eulero–Maruyama a passo dt
+        """
+        if transitorio is None:
+            transitorio = t_max / 2
+        if integratore is not None:
+            return self._evolvi_con(integratore, t_max, transitorio, soglia_sincronia, registratore, riga)
+        tempo_inizio = time.time()
+
+        phi_iniziale = self.calcola_phi()
+        passi = int(round(t_max / self.dt))
+
+        somma = somma_quadrati = 0.0
+        campioni = 0
+        tempo_sincronizzazione = None
+
+        if registratore is not None:
+            registra_stato(registratore, riga, 0, 0.0, self._ordine, self.theta)
+
+        for k in range(passi):
+            phi = self.passo()
+            if registratore is not None:
+                registra_stato(registratore, riga, k + 1, (k + 1) * self.dt, self._ordine, self.theta)
+            t = k * self.dt
+            if tempo_sincronizzazione is None and phi >= soglia_sincronia:
+                tempo_sincronizzazione = t
+            if t >= transitorio:
+                somma += phi
+                somma_quadrati += phi * phi
+                campioni += 1
+
+        phi_finale = self.calcola_phi()
+        if tempo_sincronizzazione is None and phi_finale >= soglia_sincronia:
+            tempo_sincronizzazione = passi * self.dt
+
+        phi_medio = somma / campioni if campioni else phi_finale
+        phi_var = max(0.0, somma_quadrati / campioni - phi_medio**2) if campioni else 0.0
+        return self._risultato(t_max, tempo_inizio, phi_iniziale, phi_finale, phi_medio, phi_var,
+                               tempo_sincronizzazione)
+
+    def _evolvi_con(self, integratore, t_max, transitorio, soglia_sincronia, registratore, riga):
+        """
+        evolve con uno schema di integratori: medie nel tempo sui punti accettati
+        (passo anche variabile), soglia di sincronia interpolata dentro il passo
+        """
+        from .integratori import MediaTemporale, attraversamento
+
+        tempo_inizio = time.time()
+        media = MediaTemporale(transitorio)
+        tempo_sincronizzazione = None
+        precedente = None
+        if registratore is not None:
+            # Il registratore segue i passi dell'integratore, non quelli di self.dt:
+            # dimensionato subito a passo fisso, allungato man mano a passo adattivo
+            previsti = integratore.passi_previsti(t_max)
+            if previsti is not None:
+                registratore.estendi(previsti)
+        for k, (t, phi) in enumerate(integratore.traiettoria(self, t_max)):
+            if registratore is not None:
+                if k >= registratore.T:
+                    registratore.estendi(2 * (registratore.T - 1) + 1)  # raddoppio: copie ammortizzate
+                registra_stato(registratore, riga, k, t, self._ordine, self.theta)
+            if precedente is None:
+                phi_iniziale = phi
+                if phi >= soglia_sincronia:
+                    tempo_sincronizzazione = 0.0
+            else:
+                if tempo_sincronizzazione is None:
+                    tempo_sincronizzazione = attraversamento(*precedente, t, phi, soglia_sincronia)
+                media.aggiungi(*precedente, t, phi)
+            precedente = (t, phi)
+
+        phi_finale = precedente[1]
+        phi_medio = media.media()
+        if phi_medio is None:
+            phi_medio = phi_finale
+        risultato = self._risultato(t_max, tempo_inizio, phi_iniziale, phi_finale, phi_medio,
+                                    media.varianza(), tempo_sincronizzazione)
+        risultato['passi'] = integratore.passi
+        risultato['passi_rifiutati'] = integratore.rifiutati
+        risultato['valutazioni_deriva'] = integratore.valutazioni
+        risultato['parametri']['integratore'] = integratore.descrizione()
+        return risultato
+
+    def _risultato(self, t_max, tempo_inizio, phi_iniziale, phi_finale, phi_medio, phi_var,
+                   tempo_sincronizzazione):
+        return {
+            'tipo': self.tipo,
+            'replica_id': self.replica_id,
+            'phi_iniziale': float(phi_iniziale),
+            'phi_finale': float(phi_finale),
+            'phi_medio': float(phi_medio),
+            'phi_std': float(np.sqrt(phi_var)),
+            'tempo_sincronizzazione': tempo_sincronizzazione,
+            'tempo_calcolo': time.time() - tempo_inizio,
+            'parametri': {
+                'N': self.N,
+                'K': self.K,
+                'mix': self.mix,
+                'alpha': self.alpha,
+                'frequenze': self.frequenze,
+                'larghezza': self.larghezza,
+                'rumore': self.rumore,
+                'dt': self.dt,
+                't_max': t_max,
+                'seed': self.seed
+            }
+        }
+
+
+# TEST
+def main():
+    print("🌀 KURAMOTO CAMPO MEDIO - EFFETTI DI TAGLIA FINITA")
+    print("=" * 60)
+
+    print(f"\n{'N':<10} {'Tipo':<12} {'Φ medio':<10} {'σ(Φ)':<10} {'Tempo (s)':<10}")
+    print(f"{'-'*10} {'-'*12} {'-'*10} {'-'*10} {'-'*10}")
+
+    # K = 2 > K_c = 2γ = 1: Φ teorico per equity senza rumore = sqrt(1 - K_c/K) ≈ 0.707
+    for N in [10**2, 10**3, 10**4, 10**5]:
+        for tipo in ['equity', 'extractive']:
+            sis = SistemaKuramoto(N=N, K=2.0, tipo=tipo, frequenze='lorentz', larghezza=0.5, rumore=0.1)
+            res = sis.evolve(t_max=30.0)
+            print(f"{N:<10d} {tipo:<12} {res['phi_medio']:<10.4f} {res['phi_std']:<10.4f} "
+                  f"{res['tempo_calcolo']:<10.2f}")
+
+
+if __name__ == "__main__":
+    main()
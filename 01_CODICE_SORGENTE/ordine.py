@@ -0,0 +1,113 @@
+# === ordine.py ===
+# Parametro d'ordine Z = Σ_j A_j e^{iθ_j} = Φ e^{iψ}, condiviso da tutti i sistemi.
+#
+# Un solo esponenziale complesso in un buffer preallocato: niente cos, sin e
+# prodotti pesati temporanei ad ogni chiamata. Funziona su un vettore (N,)
+# o su un ensemble (R, N) con la stessa riduzione per riga, quindi una
+# replica dà lo stesso Φ da sola o dentro un ensemble.
+# Per dinamiche che cambiano solo alcune fasi, Z si aggiorna in O(k).
+# Con A in float32 il kernel usa cos e sin reali in float32 (vettorizzati,
+# molto più rapidi dell'esponenziale complex64) e buffer da 4 byte, ma le
+# riduzioni accumulano in float64: l'errore di arrotondamento di Φ non cresce
+# con N come farebbe una somma in singola precisione.
+# Oltre BLOCCO_PHI nodi per riga la riduzione procede a blocchi di colonne
+# con buffer di un solo blocco: la memoria del kernel resta costante invece
+# di crescere come 4 volte theta, e N = 10^7 sta in RAM. Fino a BLOCCO_PHI
+# il calcolo è quello di sempre, identico bit per bit.
+
+import numpy as np
+
+RISINCRONIZZA = 1024  # aggiornamenti incrementali prima di ricalcolare Z da zero
+BLOCCO_PHI = 2**16    # colonne per blocco quando N è più grande
+
+
+class ParametroOrdine:
+    """Kernel di Φ per ampiezze A fissate: (N,) oppure (R, N)"""
+
+    def __init__(self, A, blocco=BLOCCO_PHI):
+        self.A = A
+        self.singola = A.dtype == np.float32
+        N = A.shape[-1]
+        self.a_blocchi = N > blocco
+        self.blocco = blocco if self.a_blocchi else N
+        forma = A.shape[:-1] + (self.blocco,)
+        if self.singola:
+            self._cos = np.empty(forma, dtype=A.dtype)  # cos θ e sin θ dell'ultimo calcolo (o blocco)
+            self._sin = np.empty(forma, dtype=A.dtype)
+            self._w = np.empty(forma, dtype=A.dtype)    # A cos θ / A sin θ, buffer delle riduzioni
+        else:
+            self._e = np.empty(forma, dtype=complex)  # e^{iθ} dell'ultimo calcolo (o blocco)
+            self._w = np.empty(forma, dtype=complex)  # A e^{iθ}, buffer della riduzione
+        self.Z = None
+        self._aggiornamenti = 0
+
+    def _riduci(self, theta, A, n):
+        """Z delle colonne date, usando i primi n elementi dei buffer"""
+        if self.singola:
+            c, s, w = self._cos[..., :n], self._sin[..., :n], self._w[..., :n]
+            np.cos(theta, out=c)
+            np.sin(theta, out=s)
+            np.multiply(c, A, out=w)
+            parte_reale = np.sum(w, axis=-1, dtype=np.float64)
+            np.multiply(s, A, out=w)
+            return parte_reale + 1j * np.sum(w, axis=-1, dtype=np.float64)
+        e, w = self._e[..., :n], self._w[..., :n]
+        np.multiply(theta, 1j, out=e)
+        np.exp(e, out=e)
+        np.multiply(e, A, out=w)
+        return np.sum(w, axis=-1)
+
+    def complesso(self, theta):
+        """Z per ogni riga (scalare complesso se theta è un vettore)"""
+        if not self.a_blocchi:
+            self.Z = self._riduci(theta, self.A, self.blocco)
+        else:
+            N = theta.shape[-1]
+            Z = 0
+            for inizio in range(0, N, self.blocco):
+                fine = min(inizio + self.blocco, N)
+                Z = Z + self._riduci(theta[..., inizio:fine], self.A[..., inizio:fine], fine - inizio)
+            self.Z = Z
+        self._aggiornamenti = 0
+        return self.Z
+
+    def calcola(self, theta):
+        """Ritorna (Φ, ψ): modulo e fase media pesata, in un solo passaggio"""
+        Z = self.complesso(theta)
+        return np.abs(Z), np.angle(Z)
+
+    def phi(self, theta):
+        """Solo Φ = |Z|"""
+        return np.abs(self.complesso(theta))
+
+    def aggiorna(self, theta, indici, theta_nuove):
+        """
+        Aggiorna Z quando cambiano solo le fasi theta[indici] (vettore (N,), indici senza
+        ripetizioni, dopo calcola()).
+        Scrive theta_nuove in theta e ritorna il nuovo Φ. Ogni RISINCRONIZZA
+        aggiornamenti Z viene ricalcolato da zero per non accumulare errore.
+        """
+        if self.Z is None or self._aggiornamenti >= RISINCRONIZZA:
+            theta[indici] = theta_nuove
+            return self.phi(theta)
+
+        nuove = np.exp(1j * np.asarray(theta_nuove, dtype=float))
+        if self.a_blocchi:
+            # I buffer contengono solo l'ultimo blocco: i vecchi termini si ricalcolano da theta
+            vecchie = np.exp(1j * np.asarray(theta[indici], dtype=float))
+        elif self.singola:
+            vecchie = self._cos[indici] + 1j * self._sin[indici]
+            self._cos[indici] = nuove.real
+            self._sin[indici] = nuove.imag
+        else:
+            vecchie = self._e[indici]
+            self._e[indici] = nuove
+        self.Z = self.Z + np.sum(self.A[indici] * (nuove - vecchie))
+        theta[indici] = theta_nuove
+        self._aggiornamenti += 1
+        return np.abs(self.Z)
+
+
+def calcola_phi(A, theta):
+    """Φ senza stato (alloca i buffer): per chiamate isolate"""
+    return ParametroOrdine(A).phi(theta)
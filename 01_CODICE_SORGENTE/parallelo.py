@@ -0,0 +1,244 @@
+# === parallelo.py ===
+# Esecutore parallelo della griglia mix × repliche di sistemi_misti.
+# I task (mix, blocco di repliche) vengono distribuiti su un pool di processi
+# e i blocchi restituiti nell'ordine della griglia, indipendentemente da
+# quale worker finisce per primo: l'output è identico all'esecuzione seriale.
+#
+# La griglia non viene mai tenuta in memoria: esegui_griglia produce
+# un'unità alla volta, con le statistiche dell'unità già calcolate nel worker
+# (stati di StatisticheOnline, da unire con unisci()); chi consuma aggiorna
+# statistiche e archivio e scarta le righe. In memoria restano solo i blocchi
+# finiti in anticipo che aspettano il loro turno.
+#
+# L'unione di Chan di due stati non è esatta in virgola mobile: medie e
+# varianze dipendono da come le repliche sono raggruppate. Le unità sono
+# quindi fisse: REPLICHE_PER_UNITA repliche consecutive di un mix, sempre le
+# stesse qualunque siano worker, blocchi, cache o ripresa, e unite sempre
+# nell'ordine delle repliche (come dividi_unita/_unisci di diagramma_fase).
+# Un blocco eseguito da un worker è fatto di unità intere.
+#
+# Con una CacheRisultati i mix già simulati con gli stessi parametri e seed
+# vengono letti dal disco e solo i mix mancanti finiscono nei task; con un
+# Checkpoint ogni blocco completato è salvato subito e alla ripresa si
+# simulano solo le unità incomplete (le altre si rileggono dal checkpoint).
+
+import os
+import subprocess
+import sys
+from itertools import groupby
+
+from .aggregatore import StatisticheOnline
+from .ensemble import EnsembleMisto
+from .strumentazione import Strumentazione, fase
+
+SISTEMA = 'misto'            # etichetta dei risultati nel checkpoint
+BLOCCO_MAX_CHECKPOINT = 500  # repliche massime tra due checkpoint
+REPLICHE_PER_UNITA = 50      # repliche di un'unità statistica (fissa: vedi sopra)
+GRANDEZZE = ('phi_finale', 'tempo_collasso')  # aggregate blocco per blocco
+
+
+def aggrega(risultati, grandezze=GRANDEZZE):
+    """Stato di StatisticheOnline di ogni grandezza su un blocco di risultati"""
+    stati = {}
+    for nome in grandezze:
+        statistiche = StatisticheOnline()
+        statistiche.aggiungi_molti([res[nome] for res in risultati])
+        stati[nome] = statistiche.stato()
+    return stati
+
+
+def dividi_unita(num_repliche):
+    """replica_ids delle unità statistiche di un mix, in ordine"""
+    return [list(range(inizio, min(inizio + REPLICHE_PER_UNITA, num_repliche + 1)))
+            for inizio in range(1, num_repliche + 1, REPLICHE_PER_UNITA)]
+
+
+def per_unita(risultati):
+    """(risultati, {grandezza: stato}) per ogni unità, da risultati in ordine di replica"""
+    return [(unita, aggrega(unita)) for unita in
+            (list(gruppo) for _, gruppo in groupby(risultati, key=lambda res: (res['replica_id'] - 1) // REPLICHE_PER_UNITA))]
+
+
+def _esegui_blocco(task):
+    """Eseguito nel worker: un blocco di unità di un mix come un unico ensemble, con gli aggregati per unità"""
+    mix, replica_ids, seed_base, flussi, precisione = task
+    risultati = EnsembleMisto(mix, replica_ids, seed_base=seed_base, flussi=flussi, precisione=precisione).evolve()
+    return (per_unita(risultati),)
+
+
+def _esegui_blocco_strumentato(task):
+    """Come _esegui_blocco, più lo stato della Strumentazione del worker"""
+    mix, replica_ids, seed_base, flussi, precisione = task
+    strumenti = Strumentazione()
+    ensemble = EnsembleMisto(mix, replica_ids, seed_base=seed_base, flussi=flussi, precisione=precisione)
+    risultati = ensemble.evolve(strumenti=strumenti)
+    return per_unita(risultati), strumenti.stato()
+
+
+def dividi_task(mix_list, num_repliche, dimensione_blocco, seed_base=12345, flussi=None,
+                checkpoint=None, precisione='float64'):
+    """
+    Espande la griglia in task (mix, repliche, seed_base, flussi, precisione) in ordine deterministico,
+    ciascuno di unità intere (dimensione_blocco arrotondata per eccesso a REPLICHE_PER_UNITA).
+    Con un checkpoint le unità già complete vengono escluse; una incompleta si rifà per intero.
+    """
+    unita_per_task = max(1, -(-dimensione_blocco // REPLICHE_PER_UNITA))
+    task = []
+    for mix in mix_list:
+        unita = [u for u in dividi_unita(num_repliche)
+                 if checkpoint is None or checkpoint.mancanti(SISTEMA, mix, u)]
+        for inizio in range(0, len(unita), unita_per_task):
+            replica_ids = [r for u in unita[inizio:inizio + unita_per_task] for r in u]
+            task.append((mix, replica_ids, seed_base, flussi, precisione))
+    return task
+
+
+def parametri_cache(mix, num_repliche, seed_base=12345, flussi=None, precisione='float64'):
+    """Parametri che identificano i risultati di un mix (indipendenti da worker e blocchi)"""
+    parametri = {'mix': mix, 'repliche': num_repliche, 'seed_base': seed_base, 'flussi': flussi}
+    if precisione != 'float64':
+        parametri['precisione'] = precisione  # le chiavi in doppia restano quelle di prima
+    return parametri
+
+
+def esegui_griglia(mix_list, num_repliche, workers=1, dimensione_blocco=None, seed_base=12345,
+                   flussi=None, cache=None, checkpoint=None, strumenti=None, precisione='float64'):
+    """
+    Esegue tutte le repliche per ogni mix, un blocco alla volta.
+    workers: numero di processi (1 = nello stesso processo, None = tutti i core)
+    flussi: FlussiRNG per flussi Philox per replica (None = seed legacy)
+    cache: CacheRisultati opzionale, una voce per mix
+    checkpoint: Checkpoint opzionale, aggiornato a ogni blocco completato
+    strumenti: Strumentazione opzionale, con i dati raccolti anche nei worker
+    precisione: 'float64' o 'float32' (vedi precisione.py)
+    Generatore di (mix, risultati dell'unità, {grandezza: StatisticheOnline dell'unità})
+    nell'ordine della griglia e delle repliche: le stesse unità, nello stesso ordine,
+    con qualunque numero di worker, blocco, cache e ripresa.
+    """
+    if cache is None:
+        yield from _esegui_griglia(mix_list, num_repliche, workers, dimensione_blocco, seed_base, flussi,
+                                   checkpoint, strumenti, precisione)
+        return
+
+    chiavi = {mix: cache.chiave(EnsembleMisto, parametri_cache(mix, num_repliche, seed_base, flussi, precisione))
+              for mix in mix_list}
+    mancanti = [mix for mix in mix_list if not cache.contiene(EnsembleMisto, chiavi[mix])]
+    # I mix mancanti girano tutti insieme sul pool; i loro blocchi arrivano raggruppati per mix
+    calcolati = groupby(_esegui_griglia(mancanti, num_repliche, workers, dimensione_blocco, seed_base,
+                                        flussi, checkpoint, strumenti, precisione),
+                        key=lambda blocco: blocco[0])
+    for mix in mix_list:
+        if mix not in mancanti:
+            for risultati, stati in per_unita(cache.leggi(EnsembleMisto, chiavi[mix])):
+                yield mix, risultati, _statistiche(stati)
+            continue
+        _, blocchi = next(calcolati)
+        voce = cache.scrivi_a_blocchi(EnsembleMisto, chiavi[mix])
+        try:
+            for blocco in blocchi:
+                voce.aggiungi(blocco[1])
+                yield blocco
+        except BaseException:
+            voce.annulla()
+            raise
+        voce.chiudi()
+    if mancanti:
+        cache.pulisci()
+
+
+def _statistiche(stati):
+    return {nome: StatisticheOnline.da_stato(stato) for nome, stato in stati.items()}
+
+
+def _pool(workers):
+    """Pool di processi 'spawn': il contesto più restrittivo, se funziona qui funziona ovunque"""
+    # Import locali: chi esegue in serie (e ogni worker) non carica concurrent.futures
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+
+
+def _esegui_griglia(mix_list, num_repliche, workers, dimensione_blocco, seed_base, flussi,
+                    checkpoint=None, strumenti=None, precisione='float64'):
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if dimensione_blocco is None:
+        # ~4 blocchi per worker: bilancia il carico senza frammentare gli ensemble
+        # (decide solo come si divide il lavoro, non le unità delle statistiche)
+        totale = len(mix_list) * num_repliche
+        dimensione_blocco = max(1, -(-totale // (workers * 4)))
+        dimensione_blocco = min(dimensione_blocco, num_repliche)
+        if checkpoint is not None:
+            dimensione_blocco = min(dimensione_blocco, BLOCCO_MAX_CHECKPOINT)
+
+    # Ordine della griglia, unità per unità: quelle già nel checkpoint si rileggono
+    # dal disco, le altre arrivano dal loro task. Va fissato prima di salvare.
+    task = dividi_task(mix_list, num_repliche, dimensione_blocco, seed_base, flussi, checkpoint, precisione)
+    da_simulare = {}  # (mix, primo replica_id dell'unità) -> indice del task
+    for indice, t in enumerate(task):
+        for primo in t[1][::REPLICHE_PER_UNITA]:
+            da_simulare[(t[0], primo)] = indice
+    sequenza = [(mix, unita, da_simulare.get((mix, unita[0])))
+                for mix in mix_list for unita in dividi_unita(num_repliche)]
+
+    # Con la strumentazione ogni blocco torna con lo stato dei contatori del worker
+    esegui = _esegui_blocco if strumenti is None else _esegui_blocco_strumentato
+
+    def raccogli(t, esito):
+        """Unità del blocco; con checkpoint il blocco è salvato appena arriva"""
+        unita = esito[0]
+        if strumenti is not None:
+            strumenti.unisci_stato(esito[1])
+        if checkpoint is not None:
+            with fase(strumenti, 'checkpoint'):
+                checkpoint.salva(SISTEMA, t[0], [res for risultati, _ in unita for res in risultati])
+        return unita
+
+    def in_ordine(esiti):
+        """esiti: (indice del task, unità del blocco) in qualunque ordine; produce la sequenza della griglia"""
+        esiti = iter(esiti)
+        in_attesa = {}
+        for mix, replica_ids, indice in sequenza:
+            if indice is None:
+                with fase(strumenti, 'checkpoint'):
+                    risultati = checkpoint.leggi(SISTEMA, mix, replica_ids)
+                yield mix, risultati, _statistiche(aggrega(risultati))
+                continue
+            while indice not in in_attesa:
+                arrivato, unita = next(esiti)
+                in_attesa[arrivato] = iter(unita)
+            risultati, stati = next(in_attesa[indice])
+            if risultati[-1]['replica_id'] == task[indice][1][-1]:
+                del in_attesa[indice]  # ultima unità del blocco
+            yield mix, risultati, _statistiche(stati)
+
+    if workers <= 1 or not task:
+        # In serie: ogni blocco è simulato solo quando chi consuma lo chiede
+        yield from in_ordine((i, raccogli(t, esegui(t))) for i, t in enumerate(task))
+        return
+
+    with _pool(workers) as pool:
+        if checkpoint is None:
+            # map() restituisce i blocchi nell'ordine dei task
+            yield from in_ordine(enumerate(raccogli(t, esito) for t, esito in zip(task, pool.map(esegui, task))))
+            return
+        # Con checkpoint: ogni blocco è salvato appena finisce, in qualunque ordine
+        from concurrent.futures import as_completed
+        futuri = {pool.submit(esegui, t): i for i, t in enumerate(task)}
+        yield from in_ordine((futuri[futuro], raccogli(task[futuri[futuro]], futuro.result()))
+                             for futuro in as_completed(futuri))
+
+
+def tempo_import_worker(ripetizioni=5):
+    """
+    Millisecondi per importare questo modulo in un interprete nuovo (il costo
+    pagato da ogni worker 'spawn'); minimo su più ripetizioni. Obiettivo: < 100 ms.
+    """
+    codice = ("import time; t = time.perf_counter(); "
+              f"import {__name__}; print(time.perf_counter() - t)")
+    tempi = []
+    for _ in range(ripetizioni):
+        uscita = subprocess.run([sys.executable, '-c', codice], capture_output=True, text=True, check=True)
+        tempi.append(float(uscita.stdout) * 1000)
+    return min(tempi)
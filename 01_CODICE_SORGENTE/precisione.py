@@ -0,0 +1,111 @@
+# === precisione.py ===
+# Precisione dei simulatori a ensemble: 'float64' (default) o 'float32'.
+# In float32 theta, A, rumore e buffer del kernel di Φ occupano metà dei
+# byte: per N grandi il passo è limitato dalla banda di memoria e va più
+# veloce, con metà della memoria. I numeri casuali restano quelli in doppia
+# (estratti in float64 e arrotondati), quindi le due precisioni simulano le
+# stesse repliche e si possono confrontare replica per replica.
+#
+# valida_precisione() misura la deriva di Φ, ΔΦ e CV in float32 rispetto a
+# float64 sulle configurazioni canoniche equity/extractive e dice se la
+# singola precisione è sicura entro le tolleranze. Si confronta il Φ della
+# dinamica (non il phi_finale riportato da evolve(), che per questi sistemi
+# è un'estrazione casuale) e il numero di passi prima della convergenza.
+#
+# Uso: phi-precisione [--repliche 50] [--N 100 10000]
+
+import argparse
+import sys
+
+import numpy as np
+
+PRECISIONI = {'float64': np.float64, 'float32': np.float32}
+TOLLERANZA_PHI = 1e-3   # deriva massima ammessa su Φ medio e ΔΦ
+TOLLERANZA_CV = 0.01    # deriva relativa massima ammessa sul CV
+
+
+def tipo_reale(precisione):
+    """dtype numpy di una precisione ('float64' / 'float32')"""
+    if precisione not in PRECISIONI:
+        raise ValueError(f"Precisione sconosciuta: {precisione} (attese: {tuple(PRECISIONI)})")
+    return np.dtype(PRECISIONI[precisione])
+
+
+def _riassunto(phi):
+    return float(np.mean(phi)), float(np.std(phi) / np.mean(phi) * 100)
+
+
+def valida_precisione(repliche=50, valori_N=(100,), tolleranza_phi=TOLLERANZA_PHI,
+                      tolleranza_cv=TOLLERANZA_CV):
+    """
+    Simula le configurazioni canoniche in float64 e float32 con gli stessi seed.
+    Ritorna una voce per N con, per sistema, la deriva di Φ medio, del CV, la
+    deriva massima replica per replica e le repliche che convergono a un passo
+    diverso, più la deriva di ΔΦ e il verdetto 'sicuro'.
+    """
+    from .ensemble import EnsemblePhiAvanzato
+
+    rapporto = []
+    for N in valori_N:
+        voce = {'N': N, 'repliche': repliche, 'sistemi': {}}
+        medie = {}
+        sicuro = True
+        for sistema in ('equity', 'extractive'):
+            esiti = {}
+            for precisione in PRECISIONI:
+                ensemble = EnsemblePhiAvanzato(sistema, range(1, repliche + 1), N=N, precisione=precisione)
+                esiti[precisione] = ensemble.dinamica()
+            (iniziale64, phi64, passi64), (iniziale32, phi32, passi32) = esiti['float64'], esiti['float32']
+            media64, cv64 = _riassunto(phi64)
+            media32, cv32 = _riassunto(phi32)
+            deriva_cv = abs(cv32 - cv64) / cv64 if cv64 else abs(cv32)
+            voce['sistemi'][sistema] = {
+                'phi_medio_float64': media64,
+                'phi_medio_float32': media32,
+                'deriva_phi_medio': abs(media32 - media64),
+                'deriva_phi_max_replica': float(np.max(np.abs(phi32 - phi64))),
+                'deriva_phi_iniziale_max': float(np.max(np.abs(iniziale32 - iniziale64))),
+                'cv_float64': cv64,
+                'cv_float32': cv32,
+                'deriva_cv_relativa': deriva_cv,
+                'passi_diversi': int(np.sum(passi32 != passi64)),
+            }
+            medie[sistema] = (media64, media32)
+            sicuro &= abs(media32 - media64) <= tolleranza_phi and deriva_cv <= tolleranza_cv
+
+        delta64 = medie['equity'][0] - medie['extractive'][0]
+        delta32 = medie['equity'][1] - medie['extractive'][1]
+        voce['delta_phi_float64'] = delta64
+        voce['delta_phi_float32'] = delta32
+        voce['deriva_delta_phi'] = abs(delta32 - delta64)
+        voce['sicuro'] = bool(sicuro and abs(delta32 - delta64) <= tolleranza_phi)
+        rapporto.append(voce)
+    return rapporto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validazione della simulazione in float32 contro float64")
+    parser.add_argument("--repliche", type=int, default=50)
+    parser.add_argument("--N", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--tolleranza-phi", type=float, default=TOLLERANZA_PHI)
+    parser.add_argument("--tolleranza-cv", type=float, default=TOLLERANZA_CV)
+    args = parser.parse_args()
+
+    print("🔬 VALIDAZIONE FLOAT32 CONTRO FLOAT64")
+    print("=" * 60)
+    rapporto = valida_precisione(args.repliche, args.N, args.tolleranza_phi, args.tolleranza_cv)
+    for voce in rapporto:
+        print(f"\nN = {voce['N']} ({voce['repliche']} repliche)")
+        for sistema, d in voce['sistemi'].items():
+            print(f"   {sistema:<11} Φ {d['phi_medio_float64']:.6f} → {d['phi_medio_float32']:.6f} "
+                  f"(deriva {d['deriva_phi_medio']:.2e}, max replica {d['deriva_phi_max_replica']:.2e})  "
+                  f"CV {d['cv_float64']:.3f}% → {d['cv_float32']:.3f}%  "
+                  f"passi diversi: {d['passi_diversi']}/{voce['repliche']}")
+        print(f"   ΔΦ {voce['delta_phi_float64']:.6f} → {voce['delta_phi_float32']:.6f} "
+              f"(deriva {voce['deriva_delta_phi']:.2e})")
+        print(f"   {'✅ float32 sicuro' if voce['sicuro'] else '❌ float32 fuori tolleranza'}")
+    return 0 if all(voce['sicuro'] for voce in rapporto) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# === reti.py ===
+# Accoppiamento su rete sparsa (adiacenza CSR) per topologie eterogenee.
+#
+#   dθ_i/dt = ω_i + K/d_i Σ_j W_ij A_j sin(θ_j - θ_i) + σ ξ_i,   d_i = Σ_j W_ij A_j
+#
+# Con u = W (A cos θ) e v = W (A sin θ) il termine di accoppiamento è
+# K (v_i cos θ_i - u_i sin θ_i) / d_i: due prodotti matrice-vettore sparsi per
+# passo, costo O(archi) invece di O(N²). Le ampiezze entrano nel vettore, non
+# nella matrice, che resta quella passata (niente copie pesate da 10^7 archi).
+
+import numpy as np
+from scipy import sparse
+
+from .kuramoto import SistemaKuramoto
+
+
+# === GENERATORI DI RETI ===
+def simmetrizza(righe, colonne, N):
+    """CSR non orientata, senza autoanelli né archi multipli, indici int32 se possibile"""
+    tipo_indici = np.int32 if N < 2**31 else np.int64
+    righe = np.asarray(righe, dtype=tipo_indici)
+    colonne = np.asarray(colonne, dtype=tipo_indici)
+    validi = righe != colonne
+    righe, colonne = righe[validi], colonne[validi]
+
+    r = np.concatenate([righe, colonne])
+    c = np.concatenate([colonne, righe])
+    W = sparse.csr_matrix((np.ones(r.size), (r, c)), shape=(N, N))
+    W.sum_duplicates()
+    W.data[:] = 1.0
+    return W
+
+
+def rete_stella(N, num_hub=1):
+    """Hub-and-spoke: ogni nodo periferico è collegato a tutti gli hub (nodi 0..num_hub-1)"""
+    hub = np.arange(num_hub)
+    periferia = np.arange(num_hub, N)
+    righe = np.repeat(hub, periferia.size)
+    colonne = np.tile(periferia, num_hub)
+    return simmetrizza(righe, colonne, N)
+
+
+def rete_chung_lu(pesi, num_archi, rng):
+    """
+    Rete casuale con grado atteso ∝ pesi (modello di Chung–Lu): gli estremi di ogni
+    arco sono estratti indipendentemente con probabilità ∝ pesi. Vettorizzato, O(archi).
+    """
+    pesi = np.asarray(pesi, dtype=float)
+    cumulata = np.cumsum(pesi)
+    cumulata /= cumulata[-1]
+    N = pesi.size
+    righe = np.minimum(np.searchsorted(cumulata, rng.random(num_archi)), N - 1)
+    colonne = np.minimum(np.searchsorted(cumulata, rng.random(num_archi)), N - 1)
+    return simmetrizza(righe, colonne, N)
+
+
+def rete_da_ampiezze(A, grado_medio, rng):
+    """Topologia coerente con le ampiezze: i nodi forti (extractive) diventano hub"""
+    return rete_chung_lu(A, int(A.size * grado_medio / 2), rng)
+
+
+def rete_erdos_renyi(N, grado_medio, rng):
+    return rete_chung_lu(np.ones(N), int(N * grado_medio / 2), rng)
+
+
+# === SISTEMA SU RETE ===
+class SistemaKuramotoRete(SistemaKuramoto):
+    def __init__(self, adiacenza, pesa_ampiezze=True, **parametri):
+        """
+        adiacenza: matrice N×N (scipy.sparse, convertita in CSR), eventualmente pesata
+        pesa_ampiezze: se True l'influenza del nodo j è W_ij A_j, altrimenti W_ij
+        parametri: come SistemaKuramoto (K, tipo, mix, frequenze, rumore, ...), N escluso
+        """
+        W = sparse.csr_matrix(adiacenza, dtype=float)
+        if W.shape[0] != W.shape[1]:
+            raise ValueError(f"Adiacenza non quadrata: {W.shape}")
+        super().__init__(N=W.shape[0], **parametri)
+
+        self.W = W
+        self.pesa_ampiezze = pesa_ampiezze
+        self._peso = self.A if pesa_ampiezze else np.ones(self.N)
+
+        # Normalizzazione per grado pesato; i nodi isolati non sentono accoppiamento
+        grado = self.W @ self._peso
+        self._inv_grado = np.zeros(self.N)
+        np.divide(1.0, grado, out=self._inv_grado, where=grado > 0)
+
+        self._u = np.empty(self.N)
+        self._v = np.empty(self.N)
+
+    def _campo_locale(self, theta=None):
+        """u = W (peso cos θ), v = W (peso sin θ), con cos/sin lasciati nei buffer"""
+        if theta is None:
+            theta = self.theta
+        np.cos(theta, out=self._cos)
+        np.sin(theta, out=self._sin)
+        np.multiply(self._peso, self._cos, out=self._tmp)
+        self._u[:] = self.W @ self._tmp
+        np.multiply(self._peso, self._sin, out=self._tmp)
+        self._v[:] = self.W @ self._tmp
+
+    def parametro_ordine_locale(self):
+        """Φ_i = |Σ_j W_ij peso_j e^{iθ_j}| / d_i: coerenza del vicinato di ogni nodo"""
+        self._campo_locale()
+        return np.hypot(self._u, self._v) * self._inv_grado
+
+    def deriva(self, theta, out):
+        """Deriva con accoppiamento sui vicini valutata in theta; ritorna Φ globale(theta)"""
+        self._campo_locale(theta)
+        c, s, u, v, tmp = self._cos, self._sin, self._u, self._v, self._tmp
+        phi = float(np.hypot(self.A @ c, self.A @ s))
+
+        np.multiply(v, c, out=out)
+        np.multiply(u, s, out=tmp)
+        out -= tmp
+        out *= self._inv_grado
+        out *= self.K
+        out += self.omega
+        return phi
+
+    def evolve(self, t_max=5.0, transitorio=None, soglia_sincronia=0.9, registratore=None, riga=0,
+               integratore=None):
+        """Come SistemaKuramoto.evolve, più Φ locale (media, minimo) e dati della rete"""
+        risultato = super().evolve(t_max=t_max, transitorio=transitorio,
+                                   soglia_sincronia=soglia_sincronia,
+                                   registratore=registratore, riga=riga,
+                                   integratore=integratore)
+        phi_locale = self.parametro_ordine_locale()
+        connessi = self._inv_grado > 0
+        risultato['phi_locale_medio'] = float(np.mean(phi_locale[connessi])) if connessi.any() else 0.0
+        risultato['phi_locale_min'] = float(np.min(phi_locale[connessi])) if connessi.any() else 0.0
+        risultato['parametri']['archi'] = int(self.W.nnz // 2)
+        risultato['parametri']['pesa_ampiezze'] = self.pesa_ampiezze
+        return risultato
+
+
+# TEST
+def main():
+    print("🕸️  KURAMOTO SU RETE SPARSA")
+    print("=" * 60)
+
+    N = 10000
+    rng = np.random.default_rng(1)
+    A_extractive = np.sort(rng.pareto(1.5, N) + 1)[::-1]
+    A_extractive /= A_extractive.sum()
+
+    reti = {
+        'erdos-renyi': rete_erdos_renyi(N, 10, rng),
+        'hub (Chung-Lu)': rete_da_ampiezze(A_extractive, 10, rng),
+        'stella (5 hub)': rete_stella(N, 5),
+    }
+
+    print(f"\n{'Rete':<16} {'Tipo':<12} {'Archi':<10} {'Φ medio':<10} {'Φ locale':<10} {'Tempo (s)':<10}")
+    print(f"{'-'*16} {'-'*12} {'-'*10} {'-'*10} {'-'*10} {'-'*10}")
+    for nome, W in reti.items():
+        for tipo in ['equity', 'extractive']:
+            sis = SistemaKuramotoRete(W, K=2.0, tipo=tipo, frequenze='lorentz', larghezza=0.5, rumore=0.1)
+            res = sis.evolve(t_max=20.0)
+            print(f"{nome:<16} {tipo:<12} {res['parametri']['archi']:<10d} {res['phi_medio']:<10.4f} "
+                  f"{res['phi_locale_medio']:<10.4f} {res['tempo_calcolo']:<10.2f}")
+
+
+if __name__ == "__main__":
+    main()
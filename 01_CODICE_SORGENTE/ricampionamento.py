@@ -0,0 +1,259 @@
+# === ricampionamento.py ===
+# Intervalli bootstrap e test di permutazione per le affermazioni principali
+# (Φ medio, σ, CV, ΔΦ, rapporto delle varianze), interamente vettorizzati.
+#
+# Tutte le statistiche sono funzioni dei primi due momenti, quindi di ogni
+# ricampionamento servono solo S1 = Σ(x - μ) e S2 = Σ(x - μ)² (dati centrati:
+# niente cancellazione in S2/n - (S1/n)²). Due metodi:
+#   'esatto'  indici ricampionati a blocchi (B_blocco, n), con B_blocco scelto
+#             per non superare MAX_ELEMENTI valori in memoria alla volta;
+#   'normale' per B·n grande: (S1, S2) di un ricampionamento sono somme di n
+#             estrazioni indipendenti, quindi per il TLC una normale bivariata
+#             con la covarianza empirica di (x - μ, (x - μ)²). Costo O(B + n):
+#             10^5 ricampionamenti su 10^5 repliche in millisecondi.
+# 'auto' usa l'esatto finché B·n ≤ LIMITE_ESATTO.
+#
+# Uso da riga di comando (su una cartella di test_50_repliche):
+#   python ricampionamento.py RISULTATI_50_... [ricampionamenti]
+
+import sys
+
+import numpy as np
+
+MAX_ELEMENTI = 2**23       # valori ricampionati in memoria per blocco (~64 MB in float64)
+LIMITE_ESATTO = 10**8      # oltre questo B·n il metodo 'auto' passa all'approssimazione normale
+NUM_RICAMPIONAMENTI = 10000
+SEED = 20251225
+
+STATISTICHE_SINGOLE = ('media', 'std', 'varianza', 'cv')
+STATISTICHE_DOPPIE = ('differenza_medie', 'rapporto_varianze')
+
+
+# === MOMENTI DEI RICAMPIONAMENTI ===
+def _blocchi(B, n):
+    righe = max(1, MAX_ELEMENTI // max(n, 1))
+    for inizio in range(0, B, righe):
+        yield min(righe, B - inizio)
+
+
+def _momenti_bootstrap(c, B, rng, metodo):
+    """(S1, S2) di B ricampionamenti con reinserimento dei dati centrati c"""
+    n = c.size
+    if metodo == 'normale':
+        u = np.stack([c, c * c])
+        media = u.mean(axis=1)
+        cov = np.cov(u, bias=True) * n
+        z = rng.multivariate_normal(n * media, cov, size=B, method='eigh')
+        return z[:, 0], z[:, 1]
+
+    S1 = np.empty(B)
+    S2 = np.empty(B)
+    fatti = 0
+    for b in _blocchi(B, n):
+        v = c[rng.integers(0, n, size=(b, n))]
+        S1[fatti:fatti + b] = v.sum(axis=1)
+        v *= v
+        S2[fatti:fatti + b] = v.sum(axis=1)
+        fatti += b
+    return S1, S2
+
+
+def _momenti_permutazione(c, n1, B, rng, metodo):
+    """(S1, S2) del primo gruppo (n1 elementi) in B permutazioni dei dati riuniti c"""
+    n = c.size
+    if metodo == 'normale':
+        # Somme su un sottoinsieme casuale senza reinserimento: correzione per popolazione finita
+        u = np.stack([c, c * c])
+        media = u.mean(axis=1)
+        cov = np.cov(u, bias=True) * n1 * (n - n1) / (n - 1)
+        z = rng.multivariate_normal(n1 * media, cov, size=B, method='eigh')
+        return z[:, 0], z[:, 1]
+
+    S1 = np.empty(B)
+    S2 = np.empty(B)
+    fatti = 0
+    for b in _blocchi(B, n):
+        v = rng.permuted(np.broadcast_to(c, (b, n)), axis=1)[:, :n1]
+        S1[fatti:fatti + b] = v.sum(axis=1)
+        v = v * v
+        S2[fatti:fatti + b] = v.sum(axis=1)
+        fatti += b
+    return S1, S2
+
+
+def _scegli_metodo(metodo, B, n):
+    if metodo == 'auto':
+        return 'esatto' if B * n <= LIMITE_ESATTO else 'normale'
+    if metodo not in ('esatto', 'normale'):
+        raise ValueError(f"Metodo sconosciuto: {metodo}")
+    return metodo
+
+
+def _media_varianza(mu, n, S1, S2):
+    """Media e varianza (di popolazione, come np.var) dai momenti centrati"""
+    m = S1 / n
+    return mu + m, np.maximum(S2 / n - m * m, 0.0)
+
+
+def _singola(nome, media, varianza):
+    if nome == 'media':
+        return media
+    if nome == 'varianza':
+        return varianza
+    if nome == 'std':
+        return np.sqrt(varianza)
+    if nome == 'cv':
+        return np.sqrt(varianza) / media * 100
+    raise ValueError(f"Statistica sconosciuta: {nome}")
+
+
+def _doppia(nome, media_x, var_x, media_y, var_y):
+    if nome == 'differenza_medie':
+        return media_x - media_y
+    if nome == 'rapporto_varianze':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return var_x / var_y
+    raise ValueError(f"Statistica sconosciuta: {nome}")
+
+
+def stima(x, statistica='media', y=None):
+    """Valore osservato della statistica (x da solo o confronto x vs y)"""
+    x = np.asarray(x, dtype=float)
+    if y is None:
+        return float(_singola(statistica, np.mean(x), np.var(x)))
+    y = np.asarray(y, dtype=float)
+    return float(_doppia(statistica, np.mean(x), np.var(x), np.mean(y), np.var(y)))
+
+
+# === BOOTSTRAP ===
+def distribuzione_bootstrap(x, statistica='media', y=None, n_ricampionamenti=NUM_RICAMPIONAMENTI,
+                            seed=SEED, metodo='auto'):
+    """Valori della statistica in n_ricampionamenti ricampionamenti (x e y indipendenti)"""
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=float)
+    mu_x = x.mean()
+    metodo_x = _scegli_metodo(metodo, n_ricampionamenti, x.size)
+    media_x, var_x = _media_varianza(mu_x, x.size, *_momenti_bootstrap(x - mu_x, n_ricampionamenti, rng, metodo_x))
+    if y is None:
+        return _singola(statistica, media_x, var_x)
+
+    y = np.asarray(y, dtype=float)
+    mu_y = y.mean()
+    metodo_y = _scegli_metodo(metodo, n_ricampionamenti, y.size)
+    media_y, var_y = _media_varianza(mu_y, y.size, *_momenti_bootstrap(y - mu_y, n_ricampionamenti, rng, metodo_y))
+    return _doppia(statistica, media_x, var_x, media_y, var_y)
+
+
+def intervallo_bootstrap(x, statistica='media', y=None, n_ricampionamenti=NUM_RICAMPIONAMENTI,
+                         livello=0.95, seed=SEED, metodo='auto'):
+    """
+    Intervallo di confidenza bootstrap (percentili) di una statistica.
+    statistica: 'media', 'std', 'varianza', 'cv' su x, oppure con y
+    'differenza_medie' (ΔΦ = media x - media y) e 'rapporto_varianze' (var x / var y)
+    """
+    valori = distribuzione_bootstrap(x, statistica, y, n_ricampionamenti, seed, metodo)
+    alfa = 1 - livello
+    inferiore, superiore = np.nanquantile(valori, [alfa / 2, 1 - alfa / 2])
+    n = max(np.asarray(x).size, 0 if y is None else np.asarray(y).size)
+    return {
+        'stima': stima(x, statistica, y),
+        'inferiore': float(inferiore),
+        'superiore': float(superiore),
+        'errore_standard': float(np.nanstd(valori, ddof=1)),
+        'livello': livello,
+        'ricampionamenti': n_ricampionamenti,
+        'metodo': _scegli_metodo(metodo, n_ricampionamenti, n),
+    }
+
+
+# === TEST DI PERMUTAZIONE ===
+def test_permutazione(x, y, statistica='differenza_medie', n_permutazioni=NUM_RICAMPIONAMENTI,
+                      seed=SEED, metodo='auto'):
+    """
+    Test a due code di H0: x e y hanno la stessa distribuzione.
+    'differenza_medie' confronta |Δ|, 'rapporto_varianze' confronta |log rapporto|.
+    p-valore = (1 + #{permutazioni almeno estreme}) / (1 + permutazioni).
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    riuniti = np.concatenate([x, y])
+    n, n1, n2 = riuniti.size, x.size, y.size
+    mu = riuniti.mean()
+    c = riuniti - mu
+    metodo = _scegli_metodo(metodo, n_permutazioni, n)
+
+    S1_x, S2_x = _momenti_permutazione(c, n1, n_permutazioni, rng, metodo)
+    # Il secondo gruppo è il complemento: i suoi momenti seguono da quelli totali
+    S1_y, S2_y = c.sum() - S1_x, (c * c).sum() - S2_x
+    media_x, var_x = _media_varianza(mu, n1, S1_x, S2_x)
+    media_y, var_y = _media_varianza(mu, n2, S1_y, S2_y)
+    permutate = _doppia(statistica, media_x, var_x, media_y, var_y)
+    osservata = stima(x, statistica, y)
+
+    if statistica == 'rapporto_varianze':
+        # Un gruppo a varianza nulla dà rapporto 0 o inf, cioè |log| = inf: sono
+        # estreme solo le permutazioni con un gruppo anch'esso a varianza nulla
+        if np.isnan(osservata):
+            raise ValueError("rapporto_varianze indefinito: varianza nulla in entrambi i gruppi")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estreme = np.abs(np.log(permutate)) >= np.abs(np.log(osservata)) * (1 - 1e-12)
+    else:
+        estreme = np.abs(permutate) >= abs(osservata) * (1 - 1e-12)
+    return {
+        'statistica': statistica,
+        'osservata': osservata,
+        'p_valore': float((1 + np.count_nonzero(estreme)) / (1 + n_permutazioni)),
+        'permutazioni': n_permutazioni,
+        'metodo': metodo,
+    }
+
+
+# === CONFRONTO EQUITY / EXTRACTIVE ===
+def confronto_sistemi(phi_equity, phi_extractive, n_ricampionamenti=NUM_RICAMPIONAMENTI, livello=0.95,
+                      seed=SEED, metodo='auto'):
+    """Intervalli per media, σ e CV di ciascun sistema, ΔΦ e rapporto varianze, con test di permutazione"""
+    risultato = {}
+    for nome, x in (('equity', phi_equity), ('extractive', phi_extractive)):
+        risultato[nome] = {stat: intervallo_bootstrap(x, stat, None, n_ricampionamenti, livello, seed, metodo)
+                           for stat in ('media', 'std', 'cv')}
+    risultato['differenza_phi'] = intervallo_bootstrap(phi_equity, 'differenza_medie', phi_extractive,
+                                                       n_ricampionamenti, livello, seed, metodo)
+    risultato['rapporto_varianze'] = intervallo_bootstrap(phi_extractive, 'rapporto_varianze', phi_equity,
+                                                          n_ricampionamenti, livello, seed, metodo)
+    risultato['permutazione'] = {
+        'differenza_phi': test_permutazione(phi_equity, phi_extractive, 'differenza_medie',
+                                            n_ricampionamenti, seed, metodo),
+        'rapporto_varianze': test_permutazione(phi_extractive, phi_equity, 'rapporto_varianze',
+                                               n_ricampionamenti, seed, metodo),
+    }
+    return risultato
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python ricampionamento.py CARTELLA_RISULTATI_50 [RICAMPIONAMENTI]")
+        sys.exit(1)
+
+    from .archivio import ArchivioColonnare
+
+    cartella = sys.argv[1]
+    B = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_RICAMPIONAMENTI
+    colonne = ArchivioColonnare(f"{cartella}/archivio").leggi(['tipo', 'phi_finale'])
+    eq = colonne['phi_finale'][colonne['tipo'] == 'equity']
+    ex = colonne['phi_finale'][colonne['tipo'] == 'extractive']
+
+    print(f"🎲 BOOTSTRAP ({B} ricampionamenti) - {cartella}")
+    print("=" * 60)
+    esito = confronto_sistemi(eq, ex, n_ricampionamenti=B)
+    for sistema in ('equity', 'extractive'):
+        for stat, ic in esito[sistema].items():
+            print(f"   {sistema:<11} {stat:<6} {ic['stima']:.4f}  [{ic['inferiore']:.4f}, {ic['superiore']:.4f}]")
+    for nome in ('differenza_phi', 'rapporto_varianze'):
+        ic = esito[nome]
+        p = esito['permutazione'][nome]['p_valore']
+        print(f"   {nome:<18} {ic['stima']:.4f}  [{ic['inferiore']:.4f}, {ic['superiore']:.4f}]  p = {p:.2g}")
+
+
+if __name__ == "__main__":
+    main()
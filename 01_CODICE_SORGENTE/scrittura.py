@@ -0,0 +1,158 @@
+# === scrittura.py ===
+# Scrittura su disco in un thread separato, per non fermare la simulazione
+# sulla latenza del filesystem (su scratch di rete un fsync costa decine di ms).
+#
+#   simulazione ──put──▶ coda limitata (capacita) ──▶ thread scrittore
+#                                                     serializza, scrive .tmp,
+#                                                     fsync, os.replace, fsync cartella
+#
+# Il thread preleva tutto ciò che trova in coda (fino a `lotto` file) e lo
+# scrive in un colpo solo: un fsync per file e uno per cartella per lotto,
+# invece di uno per cartella a ogni file. I file restano atomici (.tmp +
+# os.replace) come in Checkpoint._scrivi_atomico.
+#
+# Contropressione: se la coda è piena chi invia aspetta; il tempo perso così
+# è in `attesa`. Finché il disco tiene il passo la simulazione non si ferma mai.
+#
+# svuota() aspetta che tutto sia su disco (prima di rileggere archivio o
+# checkpoint); chiudi() svuota e ferma il thread. Anche un Ctrl-C o un'uscita
+# senza chiudi() svuotano la coda (atexit): i blocchi già simulati non vanno
+# persi. Un errore di scrittura nel thread viene rilanciato al chiamante alla
+# prima occasione (invio, svuota, chiudi).
+#
+# I dati inviati sono serializzati più tardi, nel thread: non vanno modificati
+# dopo l'invio (checkpoint e archivio non li toccano più).
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from .archivio import salva_npz
+
+CAPACITA = 16   # file in attesa prima che chi invia si blocchi
+LOTTO = 64      # file scritti al massimo per lotto
+
+_FINE = object()
+
+
+def _scrivi_json(f, dati):
+    f.write(json.dumps(dati).encode())
+
+
+def _scrivi_npz(f, colonne):
+    salva_npz(f, colonne)
+
+
+_FORMATI = {'json': _scrivi_json, 'npz': _scrivi_npz}
+
+
+class ScrittoreAsincrono:
+    def __init__(self, capacita=CAPACITA, lotto=LOTTO):
+        """
+        capacita: file in coda oltre i quali l'invio aspetta (contropressione)
+        lotto: file scritti al massimo tra due gruppi di fsync
+        """
+        self.lotto = lotto
+        self.attesa = 0.0        # secondi passati da chi invia ad aspettare la coda piena
+        self.file_scritti = 0
+        self.lotti = 0
+        self._coda = queue.Queue(maxsize=capacita)
+        self._errore = None
+        self._chiuso = False
+        self._thread = threading.Thread(target=self._ciclo, name='scrittore_asincrono', daemon=True)
+        self._thread.start()
+        atexit.register(self.chiudi)
+
+    # === INVIO ===
+    def scrivi_json(self, percorso, dati):
+        self._invia(('json', percorso, dati))
+
+    def scrivi_npz(self, percorso, colonne):
+        self._invia(('npz', percorso, colonne))
+
+    def _invia(self, voce):
+        self._verifica()
+        if self._chiuso:
+            raise RuntimeError("ScrittoreAsincrono già chiuso")
+        try:
+            self._coda.put_nowait(voce)
+        except queue.Full:
+            inizio = time.perf_counter()
+            self._coda.put(voce)
+            self.attesa += time.perf_counter() - inizio
+
+    def svuota(self):
+        """Aspetta che tutti i file inviati siano su disco"""
+        self._coda.join()
+        self._verifica()
+
+    def chiudi(self):
+        """Svuota la coda e ferma il thread (idempotente)"""
+        if not self._chiuso:
+            self._chiuso = True
+            atexit.unregister(self.chiudi)
+            self._coda.put(_FINE)
+            self._thread.join()
+        self._verifica()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.chiudi()
+
+    def _verifica(self):
+        if self._errore is not None:
+            errore, self._errore = self._errore, None
+            raise RuntimeError(f"Scrittura asincrona fallita: {errore}") from errore
+
+    # === THREAD ===
+    def _ciclo(self):
+        fine = False
+        while not fine:
+            voci = [self._coda.get()]
+            while len(voci) < self.lotto:
+                try:
+                    voci.append(self._coda.get_nowait())
+                except queue.Empty:
+                    break
+            fine = any(voce is _FINE for voce in voci)
+            da_scrivere = [voce for voce in voci if voce is not _FINE]
+            try:
+                # Dopo un errore si continua a prelevare (chi invia non resta bloccato)
+                # ma non si scrive più: l'errore arriva al chiamante
+                if da_scrivere and self._errore is None:
+                    self._scrivi_lotto(da_scrivere)
+            except Exception as errore:
+                self._errore = errore
+            finally:
+                for _ in voci:
+                    self._coda.task_done()
+
+    def _scrivi_lotto(self, voci):
+        cartelle = set()
+        for formato, percorso, dati in voci:
+            temporaneo = percorso + '.tmp'
+            with open(temporaneo, 'wb') as f:
+                _FORMATI[formato](f, dati)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporaneo, percorso)
+            cartelle.add(os.path.dirname(os.path.abspath(percorso)))
+        # Rende durevoli i rename: un fsync per cartella per lotto
+        for cartella in cartelle:
+            try:
+                descrittore = os.open(cartella, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(descrittore)
+            except OSError:
+                pass
+            finally:
+                os.close(descrittore)
+        self.file_scritti += len(voci)
+        self.lotti += 1
@@ -1,7 +1,4 @@
 # === sistema.py ===
-print("🧪 SISTEMA Φ-RISONANZA SEMPLICE")
-print("=" * 40)
-
 import numpy as np
 
 class SistemaPhi:
@@ -34,7 +31,9 @@ class SistemaPhi:
         }
 
 # TEST
-if __name__ == "__main__":
+def main():
+    print("🧪 SISTEMA Φ-RISONANZA SEMPLICE")
+    print("=" * 40)
     print("\n🎯 TEST RAPIDO:")
     
     # Crea sistemi
@@ -53,4 +52,8 @@ if __name__ == "__main__":
     if res_eq['phi_finale'] > res_ex['phi_finale']:
         print(f"\n✅ CORRETTO: Equity ({res_eq['phi_finale']:.3f}) > Extractive ({res_ex['phi_finale']:.3f})")
     else:
-        print(f"\n⚠️  Attenzione: Equity ≤ Extractive")
\ No newline at end of file
+        print(f"\n⚠️  Attenzione: Equity ≤ Extractive")
+
+
+if __name__ == "__main__":
+    main()
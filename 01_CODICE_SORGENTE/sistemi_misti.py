@@ -1,53 +1,64 @@
 # === sistemi_misti.py ===
-print("🔬 ESPERIMENTI SISTEMI MISTI Φ-RISONANZA")
-print("=" * 60)
-
 import numpy as np
 import json
 import os
 import time
+import argparse
+import shutil
 from datetime import datetime
-import matplotlib.pyplot as plt
+
+from .aggregatore import StatisticheOnline
+from .archivio import ArchivioColonnare
+from .cache_risultati import CacheRisultati
+from .checkpoint import Checkpoint
+from .ensemble import EnsembleMisto
+from .parallelo import esegui_griglia
+from .flussi_rng import FlussiRNG, generatore_legacy
+from .ordine import ParametroOrdine
+from .precisione import PRECISIONI
+from .scrittura import ScrittoreAsincrono
+from .strumentazione import Strumentazione, fase
+from .traiettorie import registra_stato
+from .transizione import SOGLIA_PHI, cerca_transizione
 
 # === CONFIGURAZIONE ===
 NUM_REPLICHE = 30  # 30 repliche per ogni mix
 MIX_PROPORZIONI = [0.0, 0.25, 0.5, 0.75, 1.0]  # 0=100% extractive, 1=100% equity
-
-# Crea cartella risultati
-data_ora = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-cartella_risultati = f"SISTEMI_MISTI_{data_ora}"
-os.makedirs(cartella_risultati, exist_ok=True)
-
-print(f"📁 Cartella risultati: {cartella_risultati}")
-print(f"🔬 Mix testati: {MIX_PROPORZIONI}")
-print(f"🔁 Repliche per mix: {NUM_REPLICHE}")
+NUM_WORKERS = 1  # Processi paralleli (None = tutti i core)
 
 # === SISTEMA Φ IBRIDO ===
 class SistemaMisto:
-    def __init__(self, mix_proporzione, replica_id, seed_base=12345):
+    def __init__(self, mix_proporzione, replica_id, seed_base=12345, flussi=None, epsilon=0.05, alpha=1.5):
         """
         mix_proporzione: 0.0 = 100% extractive, 1.0 = 100% equity
+        flussi: FlussiRNG per flussi Philox per replica; None = seed legacy
+        epsilon: scala del rumore; alpha: esponente di Pareto delle ampiezze extractive
         """
         self.mix = mix_proporzione
         self.replica_id = replica_id
         
-        # Seed unico
-        seed = seed_base + int(mix_proporzione * 10000) + replica_id
-        np.random.seed(seed)
+        # Seed unico (flusso privato: niente stato globale)
+        if flussi is None:
+            self.seed = seed_base + int(mix_proporzione * 10000) + replica_id
+            self.rng = generatore_legacy(self.seed)
+        else:
+            self.seed = flussi.seed
+            self.rng = flussi.generatore('misto', mix_proporzione, replica_id)
         
         # Parametri
         self.N = 100
-        self.epsilon = 0.05
+        self.epsilon = epsilon
+        self.alpha = alpha
         
         # Fasi iniziali
-        self.theta = np.random.uniform(0, 2*np.pi, self.N)
+        self.theta = self.rng.uniform(0, 2*np.pi, self.N)
         
         # CREA DISTRIBUZIONE IBRIDA
         # Parte Equity (uniforme)
         A_equity = np.ones(self.N) / self.N
         
         # Parte Extractive (power-law)
-        A_extractive = np.random.pareto(1.5, self.N) + 1
+        A_extractive = self.rng.pareto(alpha, self.N) + 1
         A_extractive = np.sort(A_extractive)[::-1]
         A_extractive = A_extractive / np.sum(A_extractive)
         
@@ -59,30 +70,35 @@ class SistemaMisto:
         self.varianza = np.var(self.A)
         self.skewness = np.mean(((self.A - np.mean(self.A)) / np.std(self.A))**3)
         
+        # Kernel di Φ: un esponenziale complesso in buffer riutilizzati
+        self._ordine = ParametroOrdine(self.A)
+        
     def calcola_phi(self):
-        """Calcola parametro d'ordine Φ"""
-        somma_reale = np.sum(self.A * np.cos(self.theta))
-        somma_immag = np.sum(self.A * np.sin(self.theta))
-        return np.sqrt(somma_reale**2 + somma_immag**2)
+        """Calcola parametro d'ordine Φ (kernel condiviso, buffer preallocati)"""
+        return self._ordine.phi(self.theta)
     
-    def evolve(self):
-        """Evoluzione sistema misto"""
+    def evolve(self, registratore=None, riga=0):
+        """Evoluzione sistema misto (registratore: RegistratoreTraiettorie opzionale)"""
         phi_iniziale = self.calcola_phi()
         
         # Dinamica dipendente dal mix
         t = 0.0
         dt = 0.05
+        passo = 0
         phi_attuale = phi_iniziale
         
+        if registratore is not None:
+            registra_stato(registratore, riga, passo, t, self._ordine, self.theta)
+        
         # Parametri dinamici in funzione del mix
         if self.mix > 0.5:  # Prevalenza Equity
             forza_sincronizzazione = 0.1 * self.mix
-            rumore = 0.01
+            rumore = self.epsilon / 5  # 0.01 con epsilon = 0.05
             tempo_target = 1.8 + (1 - self.mix) * 0.5
             phi_target = 0.99 - (1 - self.mix) * 0.2
         else:  # Prevalenza Extractive
             forza_sincronizzazione = 0.01 * self.mix
-            rumore = 0.05 * (1 - self.mix)
+            rumore = self.epsilon * (1 - self.mix)
             tempo_target = 2.3 - self.mix * 0.5
             phi_target = 0.25 + self.mix * 0.3
         
@@ -94,15 +110,19 @@ class SistemaMisto:
             sync_term = forza_sincronizzazione * (mean_phase - self.theta)
             
             # Rumore (più forte per Extractive)
-            noise_term = rumore * np.random.randn(self.N)
+            noise_term = rumore * self.rng.standard_normal(self.N)
             
             # Aggiorna fasi
             self.theta += sync_term + noise_term
             self.theta = self.theta % (2 * np.pi)
             
             t += dt
+            passo += 1
             phi_attuale = self.calcola_phi()
             
+            if registratore is not None:
+                registra_stato(registratore, riga, passo, t, self._ordine, self.theta)
+            
             # Convergenza
             if t > tempo_target and abs(phi_attuale - phi_target) < 0.01:
                 break
@@ -110,13 +130,13 @@ class SistemaMisto:
         # Aggiusta risultato finale
         phi_finale = phi_attuale
         if self.mix > 0.8:
-            phi_finale = 0.98 + 0.02 * np.random.rand()
+            phi_finale = 0.98 + 0.02 * self.rng.random()
         elif self.mix < 0.2:
-            phi_finale = 0.2 + 0.3 * np.random.rand()
+            phi_finale = 0.2 + 0.3 * self.rng.random()
         
-        tempo_collasso = tempo_target + np.random.randn() * 0.2
+        tempo_collasso = tempo_target + self.rng.standard_normal() * 0.2
         
-        return {
+        risultato = {
             'mix_proporzione': float(self.mix),
             'replica_id': self.replica_id,
             'phi_iniziale': float(phi_iniziale),
@@ -127,64 +147,176 @@ class SistemaMisto:
             'parametri': {
                 'N': self.N,
                 'epsilon': self.epsilon,
-                'seed': seed
+                'seed': self.seed
             }
         }
+        if self.alpha != 1.5:
+            risultato['parametri']['alpha'] = self.alpha
+        return risultato
+
+# === AGGREGAZIONE (condivisa con l'unione delle campagne, campagna.py) ===
+def statistiche_del_mix(mix, phi_stat, tempo_stat, num_repliche=NUM_REPLICHE):
+    """Statistiche di un mix dagli aggregati in streaming di Φ finale e tempo di collasso"""
+    return {
+        'mix': float(mix),
+        'phi_medio': phi_stat.media,
+        'phi_std': phi_stat.std,
+        'phi_min': phi_stat.minimo,
+        'phi_max': phi_stat.massimo,
+        'tempo_medio': tempo_stat.media,
+        'tempo_std': tempo_stat.std,
+        'num_repliche': num_repliche,
+        'phi_quantili': phi_stat.quantili()
+    }
+
+
+def indice_transizione(mix_list, phi_medi, soglia=SOGLIA_PHI):
+    """Primo i in cui Φ medio passa da sotto a sopra la soglia tra mix_list[i] e mix_list[i+1] (o None)"""
+    for i in range(len(mix_list)-1):
+        if phi_medi[i] < soglia and phi_medi[i+1] > soglia:
+            return i
+    return None
+
+
+def risultati_misti(statistiche_mix, timestamp, num_repliche=NUM_REPLICHE, mix_testati=MIX_PROPORZIONI,
+                    N=100, epsilon=0.05):
+    """Contenuto di RISULTATI_MISTI.json, con il punto di transizione della griglia"""
+    mix_list = sorted(statistiche_mix)
+    phi_medi = [statistiche_mix[m]['phi_medio'] for m in mix_list]
+    # I sistemi puri sono nella griglia degli script; in una campagna possono mancare
+    puro_extractive = statistiche_mix[0.0]['phi_medio'] if 0.0 in statistiche_mix else None
+    puro_equity = statistiche_mix[1.0]['phi_medio'] if 1.0 in statistiche_mix else None
+    i = indice_transizione(mix_list, phi_medi)
+    return {
+        'timestamp': timestamp,
+        'parametri': {
+            'num_repliche': num_repliche,
+            'mix_testati': mix_testati,
+            'N_nodi': N,
+            'epsilon': epsilon
+        },
+        'statistiche': statistiche_mix,
+        'analisi_transizione': {
+            # Dove Φ supera la soglia (0.6): punto medio tra i due mix della griglia
+            'punto_transizione': float((mix_list[i] + mix_list[i+1]) / 2) if i is not None else None,
+            'phi_extractive_puro': puro_extractive,
+            'phi_equity_puro': puro_equity,
+            'delta_phi_totale': (puro_equity - puro_extractive
+                                 if puro_equity is not None and puro_extractive is not None else None)
+        }
+    }
+
 
 # === ESECUZIONE ESPERIMENTI MISTI ===
-def esegui_esperimenti_misti():
+def _data_ora_originale(cartella_risultati, salvata):
+    """
+    data_ora dell'esecuzione da riprendere: dalla configurazione del checkpoint,
+    altrimenti dal nome SISTEMI_MISTI_<data_ora> della cartella, altrimenti
+    dall'ora in cui il checkpoint è stato creato
+    """
+    if salvata is not None and salvata.get('data_ora') is not None:
+        return salvata['data_ora']
+    nome = os.path.basename(os.path.normpath(cartella_risultati))
+    if nome.startswith("SISTEMI_MISTI_"):
+        return nome[len("SISTEMI_MISTI_"):]
+    percorso_config = os.path.join(cartella_risultati, 'checkpoint', 'configurazione.json')
+    istante = os.path.getmtime(percorso_config) if os.path.exists(percorso_config) else time.time()
+    return datetime.fromtimestamp(istante).strftime("%Y-%m-%d_%H-%M-%S")
+
+
+def esegui_esperimenti_misti(workers=NUM_WORKERS, data_ora=None, flussi=None, cache=None, riprendi=None,
+                             larghezza_transizione=None, strumenti=None, precisione='float64',
+                             scrittura_asincrona=True):
+    """
+    riprendi: cartella di un'esecuzione interrotta; si simulano solo le repliche mancanti
+    larghezza_transizione: se data, affina il punto di transizione con la ricerca adattiva
+    fino a un intervallo di questa ampiezza
+    strumenti: Strumentazione opzionale; il rapporto è scritto accanto ai risultati
+    precisione: 'float64' o 'float32' per gli ensemble (vedi precisione.py)
+    scrittura_asincrona: checkpoint e archivio scritti da un thread (vedi scrittura.py)
+    """
+    print("🔬 ESPERIMENTI SISTEMI MISTI Φ-RISONANZA")
+    print("=" * 60)
+    
+    # Crea cartella risultati (solo qui: importare il modulo non tocca il disco)
+    salvata = None
+    if riprendi is not None:
+        cartella_risultati = riprendi
+        salvata = Checkpoint.configurazione_salvata(f"{cartella_risultati}/checkpoint")
+        data_ora = _data_ora_originale(cartella_risultati, salvata)
+    else:
+        if data_ora is None:
+            data_ora = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        cartella_risultati = f"SISTEMI_MISTI_{data_ora}"
+    os.makedirs(cartella_risultati, exist_ok=True)
+    
+    # Checkpoint a ogni blocco completato: un'interruzione non perde il lavoro fatto
+    configurazione = {
+        'mix': MIX_PROPORZIONI,
+        'repliche': NUM_REPLICHE,
+        'flussi': flussi.seed if flussi is not None else None,
+    }
+    if precisione != 'float64':
+        configurazione['precisione'] = precisione
+    # La data dell'esecuzione originale resta nel checkpoint per le riprese
+    # (i checkpoint scritti prima non la contengono: si lasciano come sono)
+    if salvata is None or 'data_ora' in salvata:
+        configurazione['data_ora'] = data_ora
+    # Checkpoint e archivio non fermano le simulazioni sul disco: li scrive un thread
+    scrittore = ScrittoreAsincrono() if scrittura_asincrona else None
+    checkpoint = Checkpoint(f"{cartella_risultati}/checkpoint", configurazione=configurazione,
+                            scrittore=scrittore)
+    
+    print(f"📁 Cartella risultati: {cartella_risultati}")
+    print(f"🔬 Mix testati: {MIX_PROPORZIONI}")
+    print(f"🔁 Repliche per mix: {NUM_REPLICHE}")
+    print(f"⚙️  Worker: {workers if workers is not None else os.cpu_count()}")
+    print(f"🎲 RNG: {flussi if flussi is not None else 'seed legacy'}")
+    print(f"🔢 Precisione: {precisione}")
+    print(f"🗄️  Cache: {cache.cartella if cache is not None else 'disattivata'}")
+    if len(checkpoint):
+        print(f"♻️  Ripresa: {len(checkpoint)} repliche già completate")
+    
     print("\n🔬 INIZIO ESPERIMENTI SISTEMI MISTI...")
     tempo_inizio = time.time()
     
-    risultati_completi = {}
     statistiche_mix = {}
+    # L'archivio si ricostruisce dai risultati: una ripresa non accoda duplicati
+    shutil.rmtree(f"{cartella_risultati}/archivio", ignore_errors=True)
+    archivio = ArchivioColonnare(f"{cartella_risultati}/archivio", scrittore=scrittore)
+    
+    # Tutta la griglia mix × repliche, eventualmente su più processi, un blocco alla volta:
+    # gli aggregati del blocco si uniscono a quelli del mix e le righe vanno nell'archivio
+    phi_stat = {mix: StatisticheOnline() for mix in MIX_PROPORZIONI}
+    tempo_stat = {mix: StatisticheOnline() for mix in MIX_PROPORZIONI}
+    totale = len(MIX_PROPORZIONI) * NUM_REPLICHE
+    fatte = segnate = 0
+    
+    # Progresso
+    print("   Progresso: [", end="")
+    for mix, risultati, aggregati in esegui_griglia(MIX_PROPORZIONI, NUM_REPLICHE, workers=workers,
+                                                    flussi=flussi, cache=cache, checkpoint=checkpoint,
+                                                    strumenti=strumenti, precisione=precisione):
+        with fase(strumenti, 'statistiche_archivio', sistema='misto', mix=float(mix)):
+            phi_stat[mix].unisci(aggregati['phi_finale'])
+            tempo_stat[mix].unisci(aggregati['tempo_collasso'])
+            # Una riga per replica nell'archivio colonnare (scritto a blocchi)
+            archivio.aggiungi_molti(risultati)
+        
+        fatte += len(risultati)
+        while segnate < fatte * 10 // totale:
+            print("#", end="", flush=True)
+            segnate += 1
+    print("] COMPLETATO")
     
     for mix in MIX_PROPORZIONI:
         print(f"\n{'='*40}")
         print(f"🧪 MIX: {mix:.2f} ({mix*100:.0f}% Equity, {(1-mix)*100:.0f}% Extractive)")
         print(f"{'='*40}")
         
-        risultati_mix = []
-        phi_valori = []
-        tempo_valori = []
-        
-        # Progresso
-        print("   Progresso: [", end="")
-        
-        for replica in range(1, NUM_REPLICHE + 1):
-            if replica % (NUM_REPLICHE//10) == 0:
-                print("#", end="", flush=True)
-            
-            # Esegui replica
-            sistema = SistemaMisto(mix, replica)
-            res = sistema.evolve()
-            
-            risultati_mix.append(res)
-            phi_valori.append(res['phi_finale'])
-            tempo_valori.append(res['tempo_collasso'])
-            
-            # Salva ogni replica
-            with open(f"{cartella_risultati}/mix_{mix:.2f}_rep_{replica:03d}.json", 'w') as f:
-                json.dump(res, f, indent=2)
-        
-        print("] COMPLETATO")
-        
-        # Statistiche per questo mix
-        phi_arr = np.array(phi_valori)
-        tempo_arr = np.array(tempo_valori)
+        # Statistiche per questo mix (aggiornate in streaming)
+        stat = statistiche_del_mix(mix, phi_stat[mix], tempo_stat[mix])
         
-        stat = {
-            'mix': float(mix),
-            'phi_medio': float(np.mean(phi_arr)),
-            'phi_std': float(np.std(phi_arr)),
-            'phi_min': float(np.min(phi_arr)),
-            'phi_max': float(np.max(phi_arr)),
-            'tempo_medio': float(np.mean(tempo_arr)),
-            'tempo_std': float(np.std(tempo_arr)),
-            'num_repliche': NUM_REPLICHE
-        }
-        
-        risultati_completi[mix] = risultati_mix
         statistiche_mix[mix] = stat
         
         print(f"\n   📊 RISULTATI:")
@@ -211,71 +343,81 @@ def esegui_esperimenti_misti():
               f"{stat['phi_std']:<12.4f} {stat['tempo_medio']:<12.2f}")
     
     # === GRAFICI TRANSIZIONE ===
-    plt.figure(figsize=(15, 5))
+    with fase(strumenti, 'grafici'):
+        import matplotlib.pyplot as plt  # solo sul percorso che disegna
+        plt.figure(figsize=(15, 5))
     
-    # 1. Φ vs Mix
-    plt.subplot(1, 3, 1)
-    plt.errorbar(mix_list, phi_medi, yerr=phi_stds, fmt='o-', capsize=5, 
-                 color='darkblue', linewidth=2)
-    plt.xlabel('Proporzione Equity (mix)')
-    plt.ylabel('Φ medio')
-    plt.title('Transizione Φ: Extractive → Equity')
-    plt.grid(True, alpha=0.3)
-    plt.axhline(y=0.25, color='red', linestyle='--', alpha=0.5, label='Extractive puro')
-    plt.axhline(y=0.994, color='green', linestyle='--', alpha=0.5, label='Equity puro')
-    plt.legend()
+        # 1. Φ vs Mix
+        plt.subplot(1, 3, 1)
+        plt.errorbar(mix_list, phi_medi, yerr=phi_stds, fmt='o-', capsize=5, 
+                     color='darkblue', linewidth=2)
+        plt.xlabel('Proporzione Equity (mix)')
+        plt.ylabel('Φ medio')
+        plt.title('Transizione Φ: Extractive → Equity')
+        plt.grid(True, alpha=0.3)
+        plt.axhline(y=0.25, color='red', linestyle='--', alpha=0.5, label='Extractive puro')
+        plt.axhline(y=0.994, color='green', linestyle='--', alpha=0.5, label='Equity puro')
+        plt.legend()
     
-    # 2. Variazione Φ vs Mix
-    plt.subplot(1, 3, 2)
-    plt.plot(mix_list, phi_stds, 's-', color='darkred', linewidth=2)
-    plt.xlabel('Proporzione Equity (mix)')
-    plt.ylabel('σ(Φ) (variabilità)')
-    plt.title('Variabilità Φ vs Mix')
-    plt.grid(True, alpha=0.3)
+        # 2. Variazione Φ vs Mix
+        plt.subplot(1, 3, 2)
+        plt.plot(mix_list, phi_stds, 's-', color='darkred', linewidth=2)
+        plt.xlabel('Proporzione Equity (mix)')
+        plt.ylabel('σ(Φ) (variabilità)')
+        plt.title('Variabilità Φ vs Mix')
+        plt.grid(True, alpha=0.3)
     
-    # 3. Tempo vs Mix
-    plt.subplot(1, 3, 3)
-    plt.plot(mix_list, tempi_medi, '^-', color='darkgreen', linewidth=2)
-    plt.xlabel('Proporzione Equity (mix)')
-    plt.ylabel('Tempo collasso medio (s)')
-    plt.title('Tempo di collasso vs Mix')
-    plt.grid(True, alpha=0.3)
-    plt.axhline(y=2.3, color='red', linestyle='--', alpha=0.5, label='Extractive puro')
-    plt.axhline(y=1.8, color='green', linestyle='--', alpha=0.5, label='Equity puro')
-    plt.legend()
+        # 3. Tempo vs Mix
+        plt.subplot(1, 3, 3)
+        plt.plot(mix_list, tempi_medi, '^-', color='darkgreen', linewidth=2)
+        plt.xlabel('Proporzione Equity (mix)')
+        plt.ylabel('Tempo collasso medio (s)')
+        plt.title('Tempo di collasso vs Mix')
+        plt.grid(True, alpha=0.3)
+        plt.axhline(y=2.3, color='red', linestyle='--', alpha=0.5, label='Extractive puro')
+        plt.axhline(y=1.8, color='green', linestyle='--', alpha=0.5, label='Equity puro')
+        plt.legend()
     
-    plt.tight_layout()
-    plt.savefig(f"{cartella_risultati}/transizione_fase.png", dpi=150)
+        plt.tight_layout()
+        plt.savefig(f"{cartella_risultati}/transizione_fase.png", dpi=150)
+        plt.close()
     
     # === SALVA RISULTATI COMPLETI ===
-    risultati_finali = {
-        'timestamp': data_ora,
-        'parametri': {
-            'num_repliche': NUM_REPLICHE,
-            'mix_testati': MIX_PROPORZIONI,
-            'N_nodi': 100,
-            'epsilon': 0.05
-        },
-        'statistiche': statistiche_mix,
-        'analisi_transizione': {
-            'punto_transizione': None,  # Da calcolare
-            'phi_extractive_puro': statistiche_mix[0.0]['phi_medio'],
-            'phi_equity_puro': statistiche_mix[1.0]['phi_medio'],
-            'delta_phi_totale': statistiche_mix[1.0]['phi_medio'] - statistiche_mix[0.0]['phi_medio']
-        }
-    }
+    risultati_finali = risultati_misti(statistiche_mix, data_ora)
     
-    # Calcola punto di transizione (dove Φ supera 0.6)
-    for i in range(len(mix_list)-1):
-        if phi_medi[i] < 0.6 and phi_medi[i+1] > 0.6:
-            transizione = (mix_list[i] + mix_list[i+1]) / 2
-            risultati_finali['analisi_transizione']['punto_transizione'] = float(transizione)
-            print(f"\n🎯 PUNTO DI TRANSIZIONE: mix ≈ {transizione:.2f}")
-            print(f"   (Φ passa da <0.6 a >0.6)")
-            break
+    # Punto di transizione (dove Φ supera 0.6)
+    i = indice_transizione(mix_list, phi_medi)
+    if i is not None:
+        transizione = risultati_finali['analisi_transizione']['punto_transizione']
+        print(f"\n🎯 PUNTO DI TRANSIZIONE: mix ≈ {transizione:.2f}")
+        print(f"   (Φ passa da <0.6 a >0.6)")
+        
+        if larghezza_transizione is not None:
+            # Bisezione rumorosa dentro l'intervallo della griglia
+            print(f"\n🔎 Ricerca adattiva in [{mix_list[i]:.2f}, {mix_list[i+1]:.2f}]...")
+            with fase(strumenti, 'ricerca_adattiva'):
+                adattiva = cerca_transizione(mix_list[i], mix_list[i+1], larghezza=larghezza_transizione,
+                                             flussi=flussi, verboso=True)
+            a, b = adattiva['intervallo']
+            analisi = risultati_finali['analisi_transizione']
+            analisi['punto_transizione'] = adattiva['punto_transizione']
+            analisi['intervallo_transizione'] = adattiva['intervallo']
+            analisi['confidenza_transizione'] = adattiva['confidenza']
+            analisi['ricerca_adattiva'] = adattiva
+            print(f"🎯 PUNTO DI TRANSIZIONE (adattivo): mix ≈ {adattiva['punto_transizione']:.4f} "
+                  f"[{a:.4f}, {b:.4f}] al {adattiva['confidenza']*100:.0f}%, "
+                  f"{adattiva['simulazioni']} simulazioni")
     
-    with open(f"{cartella_risultati}/RISULTATI_MISTI.json", 'w') as f:
-        json.dump(risultati_finali, f, indent=2)
+    with fase(strumenti, 'statistiche_archivio'):
+        archivio.chiudi()
+        if scrittore is not None:
+            scrittore.chiudi()
+    
+    with fase(strumenti, 'json'):
+        with open(f"{cartella_risultati}/RISULTATI_MISTI.json", 'w') as f:
+            json.dump(risultati_finali, f, indent=2)
+    if strumenti is not None:
+        strumenti.scrivi(cartella_risultati)
     
     tempo_totale = time.time() - tempo_inizio
     
@@ -286,6 +428,9 @@ def esegui_esperimenti_misti():
     print(f"   Mix testati: {len(MIX_PROPORZIONI)}")
     print(f"   Repliche totali: {len(MIX_PROPORZIONI) * NUM_REPLICHE}")
     print(f"   Tempo esecuzione: {tempo_totale:.1f}s")
+    if scrittore is not None:
+        print(f"   Scrittura asincrona: {scrittore.file_scritti} file, "
+              f"attesa per coda piena {scrittore.attesa:.2f}s")
     print(f"   Φ Extractive puro: {statistiche_mix[0.0]['phi_medio']:.4f}")
     print(f"   Φ Equity puro: {statistiche_mix[1.0]['phi_medio']:.4f}")
     print(f"   ΔΦ totale: {risultati_finali['analisi_transizione']['delta_phi_totale']:.4f}")
@@ -294,5 +439,39 @@ def esegui_esperimenti_misti():
     
     return risultati_finali
 
+def main():
+    parser = argparse.ArgumentParser(description="Esperimenti sistemi misti Φ-risonanza")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS,
+                        help="processi paralleli (0 = tutti i core)")
+    parser.add_argument("--philox", type=int, default=None, metavar="SEED",
+                        help="flussi Philox per replica con questo seed radice")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="CARTELLA",
+                        help="riusa i risultati già calcolati (cartella di default se omessa)")
+    parser.add_argument("--invalida-cache", action="store_true",
+                        help="svuota la cache dei sistemi misti prima di eseguire")
+    parser.add_argument("--adattivo", nargs="?", type=float, const=0.005, default=None, metavar="LARGHEZZA",
+                        help="affina il punto di transizione fino a questa ampiezza (default 0.005)")
+    parser.add_argument("--riprendi", default=None, metavar="CARTELLA",
+                        help="riprende un'esecuzione interrotta dalla sua cartella risultati")
+    parser.add_argument("--strumenta", action="store_true",
+                        help="misura tempi per fase, passi di convergenza e memoria")
+    parser.add_argument("--precisione", choices=list(PRECISIONI), default='float64',
+                        help="precisione degli ensemble (float32: metà memoria, vedi phi-precisione)")
+    parser.add_argument("--scrittura-sincrona", action="store_true",
+                        help="scrive checkpoint e archivio nel ciclo principale invece che in un thread")
+    args = parser.parse_args()
+    flussi = FlussiRNG(args.philox) if args.philox is not None else None
+    cache = None
+    if args.cache is not None:
+        cache = CacheRisultati(args.cache) if args.cache else CacheRisultati()
+        if args.invalida_cache:
+            cache.invalida(EnsembleMisto)
+    esegui_esperimenti_misti(workers=args.workers or None, flussi=flussi, cache=cache,
+                             riprendi=args.riprendi, larghezza_transizione=args.adattivo,
+                             strumenti=Strumentazione() if args.strumenta else None,
+                             precisione=args.precisione,
+                             scrittura_asincrona=not args.scrittura_sincrona)
+
+
 if __name__ == "__main__":
-    esegui_esperimenti_misti()
\ No newline at end of file
+    main()
@@ -0,0 +1,242 @@
+# === strumentazione.py ===
+# Strumentazione opzionale dei percorsi caldi: tempo di parete per fase
+# (RNG, aggiornamento delle fasi, calcola_phi, convergenza, CSV/JSON, grafici),
+# distribuzione dei passi prima della convergenza, repliche al secondo e
+# picco di memoria residente (RSS), per sistema e mix.
+#
+# È attiva solo se si passa un oggetto Strumentazione (argomento `strumenti`):
+# con None i percorsi caldi fanno solo un controllo `is not None` per passo.
+# Lo stato è un dizionario JSON unibile: i worker di un pool lo rimandano al
+# processo principale insieme ai risultati, e i tempi per fase sono sommati
+# su tutti i processi. Il rapporto si esporta in JSON e nel formato testuale
+# di Prometheus:
+#
+#   <cartella_risultati>/strumentazione.json
+#   <cartella_risultati>/strumentazione.prom
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource  # non disponibile su Windows
+except ImportError:
+    resource = None
+
+BUCKET_PASSI = (5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 150, 200, 500, 1000)
+
+
+def picco_rss():
+    """Picco di memoria residente del processo in byte (None se non misurabile)"""
+    if resource is None:
+        return None
+    picco = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return picco if sys.platform == 'darwin' else picco * 1024  # Linux: kB
+
+
+def fase(strumenti, nome, **etichette):
+    """strumenti.fase(...) se la strumentazione è attiva, altrimenti un contesto vuoto"""
+    if strumenti is None:
+        return nullcontext()
+    return strumenti.fase(nome, **etichette)
+
+
+def _chiave(etichette):
+    """Etichette come tupla ordinata: usabile come chiave di dizionario"""
+    return tuple(sorted(etichette.items()))
+
+
+class Cronometro:
+    """Attribuisce il tempo trascorso tra due segna() alla fase indicata"""
+
+    def __init__(self, strumenti, etichette):
+        self.strumenti = strumenti
+        self.etichette = etichette
+        self.tempi = {}
+        self._ultimo = time.perf_counter()
+
+    def segna(self, fase):
+        adesso = time.perf_counter()
+        self.tempi[fase] = self.tempi.get(fase, 0.0) + adesso - self._ultimo
+        self._ultimo = adesso
+
+    def chiudi(self):
+        for fase, secondi in self.tempi.items():
+            self.strumenti.aggiungi_tempo(fase, secondi, self.etichette)
+
+
+class Strumentazione:
+    def __init__(self):
+        self.fasi = {}            # (fase, etichette) -> [secondi, chiamate]
+        self.passi = {}           # etichette -> {passi: repliche convergite}
+        self.non_convergite = {}  # etichette -> repliche arrivate a t_max
+        self.repliche = {}        # etichette -> [repliche, secondi]
+        self.rss = {}             # etichette -> picco RSS in byte
+
+    # --- registrazione ---
+    def aggiungi_tempo(self, fase, secondi, etichette=None, chiamate=1):
+        voce = self.fasi.setdefault((fase, _chiave(etichette or {})), [0.0, 0])
+        voce[0] += secondi
+        voce[1] += chiamate
+
+    @contextmanager
+    def fase(self, nome, **etichette):
+        """with strumenti.fase('json'): ... cronometra il blocco"""
+        inizio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.aggiungi_tempo(nome, time.perf_counter() - inizio, etichette)
+
+    def cronometro(self, **etichette):
+        return Cronometro(self, etichette)
+
+    def registra_passi(self, etichette, passi, convergite):
+        """passi: passi eseguiti per replica; convergite: maschera delle repliche uscite per convergenza"""
+        chiave = _chiave(etichette)
+        istogramma = self.passi.setdefault(chiave, {})
+        for p, ok in zip(passi, convergite):
+            if ok:
+                istogramma[int(p)] = istogramma.get(int(p), 0) + 1
+        self.non_convergite[chiave] = self.non_convergite.get(chiave, 0) + int(len(passi) - sum(convergite))
+
+    def registra_repliche(self, etichette, repliche, secondi):
+        """Repliche simulate in `secondi`; campiona anche il picco RSS"""
+        chiave = _chiave(etichette)
+        voce = self.repliche.setdefault(chiave, [0, 0.0])
+        voce[0] += repliche
+        voce[1] += secondi
+        rss = picco_rss()
+        if rss is not None:
+            self.rss[chiave] = max(self.rss.get(chiave, 0), rss)
+
+    # --- stato unibile (JSON) ---
+    def stato(self):
+        return {
+            'fasi': [[fase, list(map(list, et)), s, n] for (fase, et), (s, n) in self.fasi.items()],
+            'passi': [[list(map(list, et)), sorted(ist.items())] for et, ist in self.passi.items()],
+            'non_convergite': [[list(map(list, et)), n] for et, n in self.non_convergite.items()],
+            'repliche': [[list(map(list, et)), r, s] for et, (r, s) in self.repliche.items()],
+            'rss': [[list(map(list, et)), b] for et, b in self.rss.items()],
+        }
+
+    @classmethod
+    def da_stato(cls, stato):
+        strumenti = cls()
+        strumenti.unisci_stato(stato)
+        return strumenti
+
+    def unisci_stato(self, stato):
+        """Somma lo stato (JSON) di un'altra Strumentazione, per esempio di un worker"""
+        tupla = lambda et: tuple(map(tuple, et))
+        for fase, et, s, n in stato['fasi']:
+            self.aggiungi_tempo(fase, s, dict(tupla(et)), n)
+        for et, ist in stato['passi']:
+            destinazione = self.passi.setdefault(tupla(et), {})
+            for p, n in ist:
+                destinazione[p] = destinazione.get(p, 0) + n
+        for et, n in stato['non_convergite']:
+            self.non_convergite[tupla(et)] = self.non_convergite.get(tupla(et), 0) + n
+        for et, r, s in stato['repliche']:
+            voce = self.repliche.setdefault(tupla(et), [0, 0.0])
+            voce[0] += r
+            voce[1] += s
+        for et, b in stato['rss']:
+            self.rss[tupla(et)] = max(self.rss.get(tupla(et), 0), b)
+
+    def unisci(self, altro):
+        self.unisci_stato(altro.stato())
+
+    # --- rapporti ---
+    def rapporto(self):
+        """Rapporto leggibile: fasi con percentuale, passi di convergenza, throughput e RSS"""
+        totale = sum(s for s, _ in self.fasi.values()) or 1.0
+        fasi = [{'fase': fase, **dict(et), 'secondi': s, 'chiamate': n, 'percentuale': 100 * s / totale}
+                for (fase, et), (s, n) in sorted(self.fasi.items(), key=lambda v: -v[1][0])]
+
+        convergenza = []
+        for et in sorted(set(self.passi) | set(self.non_convergite), key=str):
+            ist = self.passi.get(et, {})
+            convergite = sum(ist.values())
+            valori = sorted(ist)
+            cumulata, mediana = 0, None
+            for p in valori:
+                cumulata += ist[p]
+                if mediana is None and 2 * cumulata >= convergite:
+                    mediana = p
+            convergenza.append({
+                **dict(et),
+                'convergite': convergite,
+                'non_convergite': self.non_convergite.get(et, 0),
+                'passi_medi': sum(p * n for p, n in ist.items()) / convergite if convergite else None,
+                'passi_mediana': mediana,
+                'passi_min': valori[0] if valori else None,
+                'passi_max': valori[-1] if valori else None,
+                'istogramma': {str(p): ist[p] for p in valori},
+            })
+
+        throughput = [{**dict(et), 'repliche': r, 'secondi': s, 'repliche_al_secondo': r / s if s else None,
+                       'picco_rss_mb': self.rss[et] / 1024**2 if et in self.rss else None}
+                      for et, (r, s) in sorted(self.repliche.items(), key=lambda v: str(v[0]))]
+
+        return {'fasi': fasi, 'convergenza': convergenza, 'throughput': throughput,
+                'picco_rss_mb': max(self.rss.values()) / 1024**2 if self.rss else None}
+
+    def prometheus(self):
+        """Metriche nel formato testuale di Prometheus (esposizione 0.0.4)"""
+        righe = []
+
+        def etichette(et, **altre):
+            coppie = list(et) + sorted(altre.items())
+            if not coppie:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in coppie) + '}'
+
+        righe += ['# HELP phi_fase_secondi_totale Tempo di parete per fase',
+                  '# TYPE phi_fase_secondi_totale counter']
+        for (fase, et), (s, _) in self.fasi.items():
+            righe.append(f"phi_fase_secondi_totale{etichette(et, fase=fase)} {s!r}")
+        righe += ['# HELP phi_fase_chiamate_totale Numero di intervalli misurati per fase',
+                  '# TYPE phi_fase_chiamate_totale counter']
+        for (fase, et), (_, n) in self.fasi.items():
+            righe.append(f"phi_fase_chiamate_totale{etichette(et, fase=fase)} {n}")
+
+        righe += ['# HELP phi_passi_convergenza Passi eseguiti prima della convergenza',
+                  '# TYPE phi_passi_convergenza histogram']
+        for et, ist in self.passi.items():
+            for limite in BUCKET_PASSI:
+                conteggio = sum(n for p, n in ist.items() if p <= limite)
+                righe.append(f"phi_passi_convergenza_bucket{etichette(et, le=limite)} {conteggio}")
+            righe.append(f"phi_passi_convergenza_bucket{etichette(et, le='+Inf')} {sum(ist.values())}")
+            righe.append(f"phi_passi_convergenza_sum{etichette(et)} {sum(p * n for p, n in ist.items())}")
+            righe.append(f"phi_passi_convergenza_count{etichette(et)} {sum(ist.values())}")
+
+        righe += ['# HELP phi_repliche_non_convergite_totale Repliche arrivate a t_max senza convergere',
+                  '# TYPE phi_repliche_non_convergite_totale counter']
+        for et, n in self.non_convergite.items():
+            righe.append(f"phi_repliche_non_convergite_totale{etichette(et)} {n}")
+
+        righe += ['# HELP phi_repliche_totale Repliche simulate',
+                  '# TYPE phi_repliche_totale counter']
+        for et, (r, _) in self.repliche.items():
+            righe.append(f"phi_repliche_totale{etichette(et)} {r}")
+        righe += ['# HELP phi_repliche_al_secondo Repliche simulate al secondo',
+                  '# TYPE phi_repliche_al_secondo gauge']
+        for et, (r, s) in self.repliche.items():
+            if s:
+                righe.append(f"phi_repliche_al_secondo{etichette(et)} {r / s!r}")
+
+        righe += ['# HELP phi_picco_rss_byte Picco di memoria residente del processo',
+                  '# TYPE phi_picco_rss_byte gauge']
+        for et, b in self.rss.items():
+            righe.append(f"phi_picco_rss_byte{etichette(et)} {b}")
+        return '\n'.join(righe) + '\n'
+
+    def scrivi(self, cartella):
+        """Scrive strumentazione.json e strumentazione.prom nella cartella dei risultati"""
+        with open(os.path.join(cartella, 'strumentazione.json'), 'w') as f:
+            json.dump(self.rapporto(), f, indent=2)
+        with open(os.path.join(cartella, 'strumentazione.prom'), 'w') as f:
+            f.write(self.prometheus())
@@ -0,0 +1,530 @@
+# === surrogato.py ===
+# Modello surrogato di Φ(mix, ε, N, α) sui risultati salvati degli sweep:
+# risponde a "quanto vale Φ a mix 0.62?" senza simulare, con un'incertezza,
+# e indica dove conviene simulare ancora.
+#
+# Processo gaussiano con kernel di Matérn 5/2 e una lunghezza di scala per
+# asse, sulle coordinate normalizzate in [0, 1] (ε e N in scala logaritmica).
+# Ogni punto osservato ha il suo rumore noto, σ(Φ)²/repliche (l'errore della
+# media). Il rumore stimato (nugget) vale solo per i punti senza rumore noto
+# (una replica, o varianza nulla): un nugget su tutti i punti lascerebbe alla
+# verosimiglianza la scelta di spiegare il salto tra mix 0.5 e 0.6 come rumore
+# bianco, e la media mancherebbe di 0.18 punti osservati con errore 3e-5.
+# Scala, lunghezze e nugget massimizzano la verosimiglianza marginale
+# (L-BFGS-B, gradiente analitico). Dopo adatta(), verifica_punti() controlla
+# che la media riproduca i punti osservati entro il loro errore standard.
+# Senza nugget il processo interpola il salto e oscilla subito dopo (fino a
+# Φ ≈ 1.07 tra 0.6 e 0.7): la media prevista è limitata a [0, 1], l'intervallo
+# di Φ, e la deviazione standard calibrata segnala comunque quel tratto.
+#
+# Perché non una spline monotona: Φ non è monotono nel mix (il sistema
+# misto cala tra 0.15 e 0.25 e salta tra 0.5 e 0.55).
+#
+# L'incertezza σ di un processo stazionario dipende solo da dove sono i
+# punti, non dai valori: da sola sarebbe uguale a metà strada tra due punti
+# qualsiasi, salto o no (e i residui leave-one-out non vedono un salto che
+# cade tra due campioni: ciascun lato prevede bene i propri vicini). La
+# deviazione standard riportata è quindi σ √(1 + b²/σ_f²), dove b² è la
+# varianza locale dei valori osservati attorno alla previsione, con i pesi
+# del kernel: ≈ σ dove Φ è liscio, più larga tra vicini con valori molto
+# diversi, nulla sui punti osservati. È lì che proponi() manda le nuove
+# simulazioni, restringendo l'intervallo che contiene la transizione.
+#
+# Dopo adatta() le previsioni costano un prodotto per K⁻¹ precalcolata:
+# O(n) per la media e O(n²) per l'incertezza, senza fattorizzazioni. Con
+# qualche centinaio di punti una chiamata singola sta in decine di µs,
+# in blocco pochi µs a punto. Il modello adattato si salva in .npz e si
+# ricarica senza dati grezzi né ottimizzazione (uso da dashboard).
+#
+# Fonti: DiagrammaFase (griglia o ipercubo latino, vedi diagramma_fase) e
+# archivi colonnari di sistemi_misti (mix × N × ε, α al valore di default).
+# Gli assi che nei dati hanno un solo valore restano fissi: le domande
+# possono ometterli, ma non chiedere altri valori (sarebbe un'estrapolazione).
+#
+# Uso:
+#   phi-surrogato --diagramma DIAGRAMMA.npz [--archivio CARTELLA/archivio]
+#                 [--chiedi mix=0.62 epsilon=0.05] [--proponi 8]
+#                 [--affina 3 --repliche 30] [--salva SURROGATO.npz]
+#   phi-surrogato --modello SURROGATO.npz --chiedi mix=0.62
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from .aggregatore import StatisticheOnline
+from .archivio import ArchivioColonnare
+from .diagramma_fase import ASSI, VALORI_DEFAULT, DiagrammaFase, _parametri, esegui_diagramma
+
+SCALA_LOG = ('epsilon', 'N')     # assi normalizzati in scala logaritmica
+NUGGET_MIN = 1e-8                # varianza aggiunta a ogni punto (stabilità di Cholesky)
+TOLLERANZA_PUNTI = 3.0           # scarto massimo sui punti osservati, in errori standard
+INTERVALLO_PHI = (0.0, 1.0)      # Φ = |Σ A_j e^{iθ_j}| con Σ A_j = 1
+RADICE_5 = np.sqrt(5.0)
+
+
+# === DATI ===
+def punti_diagramma(diagramma):
+    """
+    Punti di un DiagrammaFase come ({asse: array}, Φ medio, varianza della media).
+    Gli assi non variati prendono il valore fissato o quello di default del diagramma.
+    """
+    if diagramma.dimensioni == ['campione']:
+        assi = {nome: np.asarray(c, dtype=float) for nome, c in diagramma.coordinate.items() if nome in ASSI}
+    else:
+        griglia = np.meshgrid(*(diagramma.coordinate[d] for d in diagramma.dimensioni), indexing='ij')
+        assi = {d: g.ravel().astype(float) for d, g in zip(diagramma.dimensioni, griglia)}
+    phi = np.asarray(diagramma['phi_medio'], dtype=float).ravel()
+    std = np.asarray(diagramma['phi_std'], dtype=float).ravel()
+    repliche = np.asarray(diagramma['repliche']).ravel()
+
+    default = dict(VALORI_DEFAULT, **diagramma.attributi.get('valori_default', {}))
+    for nome in ASSI:
+        if nome not in assi:
+            assi[nome] = np.full(phi.size, float(diagramma.attributi.get(nome, default[nome])))
+
+    validi = (repliche > 0) & np.isfinite(phi)
+    varianza = np.where(repliche > 1, std**2 / np.maximum(repliche, 1), np.nan)
+    return {nome: v[validi] for nome, v in assi.items()}, phi[validi], varianza[validi]
+
+
+def punti_archivio(cartella):
+    """Punti di un archivio di sistemi_misti, uno per (mix, N, ε), letto a blocchi"""
+    colonne = ['mix_proporzione', 'parametri.N', 'parametri.epsilon', 'phi_finale']
+    gruppi = {}
+    for blocco in ArchivioColonnare(cartella).blocchi(colonne):
+        chiavi = np.stack([blocco[c] for c in colonne[:3]], axis=1).astype(float)
+        uniche, inverso = np.unique(chiavi, axis=0, return_inverse=True)
+        for k, chiave in enumerate(map(tuple, uniche)):
+            gruppi.setdefault(chiave, StatisticheOnline()).aggiungi_molti(blocco['phi_finale'][inverso.ravel() == k])
+
+    chiavi = sorted(gruppi)
+    stat = [gruppi[c] for c in chiavi]
+    assi = {
+        'mix': np.array([c[0] for c in chiavi]),
+        'N': np.array([c[1] for c in chiavi]),
+        'epsilon': np.array([c[2] for c in chiavi]),
+        'alpha': np.full(len(chiavi), VALORI_DEFAULT['alpha']),
+    }
+    phi = np.array([s.media for s in stat])
+    varianza = np.array([s.varianza / s.n if s.n > 1 else np.nan for s in stat])
+    return assi, phi, varianza
+
+
+# === KERNEL ===
+def _matern52(U, V, scale, ampiezza):
+    """Matrice di covarianza Matérn 5/2 tra le righe di U e V (coordinate normalizzate)"""
+    r2 = np.zeros((U.shape[0], V.shape[0]))
+    for k in range(U.shape[1]):
+        d = np.subtract.outer(U[:, k], V[:, k])
+        d /= scale[k]
+        r2 += d * d
+    r = np.sqrt(r2)
+    return ampiezza * (1 + RADICE_5 * r + (5.0 / 3.0) * r2) * np.exp(-RADICE_5 * r)
+
+
+class Surrogato:
+    """Processo gaussiano su Φ(mix, ε, N, α) con rumore per punto noto"""
+
+    def __init__(self):
+        self._assi = {nome: [] for nome in ASSI}
+        self._phi = []
+        self._varianza = []
+        self.adattato = False
+
+    # === DATI ===
+    def aggiungi(self, assi, phi, varianza):
+        """Aggiunge punti ({asse: array}, Φ, varianza della media; NaN = ignota)"""
+        phi = np.atleast_1d(np.asarray(phi, dtype=float))
+        for nome in ASSI:
+            valori = np.asarray(assi.get(nome, VALORI_DEFAULT[nome]), dtype=float)
+            self._assi[nome].append(np.broadcast_to(valori, phi.shape).copy())
+        self._phi.append(phi)
+        self._varianza.append(np.broadcast_to(np.asarray(varianza, dtype=float), phi.shape).copy())
+        self.adattato = False
+        return self
+
+    def aggiungi_diagramma(self, diagramma):
+        if isinstance(diagramma, str):
+            diagramma = DiagrammaFase.carica(diagramma)
+        return self.aggiungi(*punti_diagramma(diagramma))
+
+    def aggiungi_archivio(self, cartella):
+        return self.aggiungi(*punti_archivio(cartella))
+
+    def __len__(self):
+        return sum(p.size for p in self._phi)
+
+    # === ADATTAMENTO ===
+    def _scala(self, X):
+        U = np.array(X, dtype=float)
+        for k, nome in enumerate(self.attivi):
+            if nome in SCALA_LOG:
+                U[:, k] = np.log(U[:, k])
+        return U
+
+    def _normalizza(self, X):
+        """Coordinate grezze (colonne = assi attivi) → [0, 1] sull'intervallo dei dati"""
+        U = self._scala(X)
+        U -= self._minimo
+        U /= self._estensione
+        return U
+
+    def adatta(self, riavvii=3, seed=0):
+        """Stima gli iperparametri e precalcola K⁻¹; ritorna self"""
+        if not self._phi:
+            raise ValueError("Surrogato senza dati: usa aggiungi_diagramma o aggiungi_archivio")
+        assi = {nome: np.concatenate(v) for nome, v in self._assi.items()}
+        y = np.concatenate(self._phi)
+        rumore = np.concatenate(self._varianza)
+
+        self.attivi = [nome for nome in ASSI if np.unique(assi[nome]).size > 1]
+        self.fissi = {nome: float(assi[nome][0]) for nome in ASSI if nome not in self.attivi}
+        if not self.attivi:
+            raise ValueError("Tutti i punti hanno gli stessi parametri: non c'è niente da interpolare")
+
+        X = np.stack([assi[nome] for nome in self.attivi], axis=1)
+        grezzi = self._scala(X)
+        self._minimo = grezzi.min(axis=0)
+        self._estensione = grezzi.max(axis=0) - self._minimo
+        self._X = X
+        self._U = self._normalizza(X)
+
+        # Rumore ignoto (una sola replica) o nullo: lo copre il nugget, e solo lì
+        noto = np.isfinite(rumore) & (rumore > 0)
+        self._rumore = np.where(noto, rumore, 0.0)
+        self._senza_rumore = (~noto).astype(float)
+        self._media_y = float(np.mean(y))
+        self._y = y - self._media_y
+        self._varianza_y = max(float(np.var(y)), 1e-12)
+
+        from scipy import optimize  # import pesante: solo quando si adatta
+
+        rng = np.random.default_rng(seed)
+        d = len(self.attivi)
+        # Con il rumore noto ovunque il nugget non ha punti su cui agire: resta al minimo
+        nugget_max = self._varianza_y if self._senza_rumore.any() else NUGGET_MIN
+        migliore = None
+        for tentativo in range(riavvii):
+            scale = np.full(d, 0.3) if tentativo == 0 else np.exp(rng.uniform(np.log(0.05), np.log(1.0), d))
+            iniziale = np.concatenate([np.log(scale), [np.log(self._varianza_y),
+                                                       np.log(max(1e-4 * nugget_max, NUGGET_MIN))]])
+            limiti = [(np.log(0.01), np.log(10.0))] * d + [
+                (np.log(1e-3 * self._varianza_y), np.log(1e2 * self._varianza_y)),
+                (np.log(NUGGET_MIN), np.log(nugget_max))]
+            esito = optimize.minimize(self._meno_log_verosimiglianza, iniziale, jac=True,
+                                      method='L-BFGS-B', bounds=limiti)
+            if migliore is None or esito.fun < migliore.fun:
+                migliore = esito
+
+        self._imposta(migliore.x)
+        self.log_verosimiglianza = -float(migliore.fun)
+        self.adattato = True
+        self.verifica = self.verifica_punti()
+        return self
+
+    def verifica_punti(self, tolleranza=TOLLERANZA_PUNTI):
+        """
+        Scarto tra la media prevista e i punti osservati con rumore noto, in errori
+        standard: {'punti', 'fuori' (oltre la tolleranza), 'scarto_max', 'peggiore' (assi)}
+        """
+        if not self.adattato:
+            raise RuntimeError("Surrogato non adattato: chiama adatta()")
+        noti = self._rumore > 0
+        # Media nei punti di addestramento: y - (rumore del punto) α, senza ricalcolare il kernel
+        residui = (self._rumore + NUGGET_MIN + self.nugget * self._senza_rumore) * self._alfa
+        scarti = np.abs(residui[noti]) / np.sqrt(self._rumore[noti])
+        esito = {'punti': int(noti.sum()), 'fuori': int(np.sum(scarti > tolleranza)),
+                 'scarto_max': float(scarti.max()) if scarti.size else 0.0, 'peggiore': None}
+        if scarti.size:
+            k = np.flatnonzero(noti)[np.argmax(scarti)]
+            esito['peggiore'] = {nome: float(self._X[k, j]) for j, nome in enumerate(self.attivi)}
+        return esito
+
+    def _covarianza(self, parametri):
+        d = len(self.attivi)
+        scale, ampiezza, nugget = np.exp(parametri[:d]), np.exp(parametri[d]), np.exp(parametri[d + 1])
+        K_segnale = _matern52(self._U, self._U, scale, ampiezza)
+        K = K_segnale + np.diag(self._rumore + NUGGET_MIN + nugget * self._senza_rumore)
+        return K, K_segnale, scale, ampiezza, nugget
+
+    def _meno_log_verosimiglianza(self, parametri):
+        """-log p(y | parametri) e il suo gradiente rispetto ai log-parametri"""
+        from scipy import linalg
+        K, K_segnale, scale, ampiezza, nugget = self._covarianza(parametri)
+        try:
+            fattore = linalg.cho_factor(K, lower=True)
+        except linalg.LinAlgError:
+            return 1e25, np.zeros_like(parametri)
+        alfa = linalg.cho_solve(fattore, self._y)
+        n = self._y.size
+        valore = 0.5 * self._y @ alfa + np.log(np.diag(fattore[0])).sum() + 0.5 * n * np.log(2 * np.pi)
+
+        # d(-log p)/dθ = ½ tr((K⁻¹ - α αᵀ) dK/dθ)
+        W = linalg.cho_solve(fattore, np.eye(n))
+        W -= np.outer(alfa, alfa)
+        gradiente = np.empty_like(parametri)
+        r2_assi = [np.subtract.outer(self._U[:, k], self._U[:, k])**2 / scale[k]**2
+                   for k in range(len(self.attivi))]
+        r = np.sqrt(sum(r2_assi))
+        # dk/dlog ℓ_k = ampiezza (5/3) (1 + √5 r) e^{-√5 r} (Δ_k/ℓ_k)²
+        comune = ampiezza * (5.0 / 3.0) * (1 + RADICE_5 * r) * np.exp(-RADICE_5 * r)
+        for k, r2 in enumerate(r2_assi):
+            gradiente[k] = 0.5 * np.sum(W * comune * r2)
+        gradiente[-2] = 0.5 * np.sum(W * K_segnale)
+        gradiente[-1] = 0.5 * nugget * np.sum(np.diag(W) * self._senza_rumore)
+        return valore, gradiente
+
+    def _imposta(self, parametri):
+        from scipy import linalg
+        K, _, scale, ampiezza, nugget = self._covarianza(parametri)
+        fattore = linalg.cho_factor(K, lower=True)
+        self.scale = scale
+        self.ampiezza = float(ampiezza)
+        self.nugget = float(nugget)
+        self._alfa = linalg.cho_solve(fattore, self._y)
+        self._K_inv = linalg.cho_solve(fattore, np.eye(self._y.size))
+
+    def _calibrazione(self, K_stella, media):
+        """Fattore √(1 + b²/σ_f²) sulla deviazione standard, b² = varianza locale dei dati attorno a media"""
+        pesi = K_stella.sum(axis=1)
+        scarto = media - self._media_y
+        somma = K_stella @ (self._y * self._y) - 2 * scarto * (K_stella @ self._y) + scarto * scarto * pesi
+        b2 = np.divide(somma, pesi, out=np.zeros_like(pesi), where=pesi > 1e-12 * self.ampiezza)
+        return np.sqrt(1 + np.maximum(b2, 0.0) / self.ampiezza)
+
+    # === PREVISIONE ===
+    def _coordinate(self, parametri):
+        """Matrice (m, assi attivi) da {asse: valore o array}, controllando gli assi fissi"""
+        if not self.adattato:
+            raise RuntimeError("Surrogato non adattato: chiama adatta() (o carica un modello salvato)")
+        sconosciuti = set(parametri) - set(ASSI)
+        if sconosciuti:
+            raise ValueError(f"Assi sconosciuti: {sorted(sconosciuti)} (ammessi: {ASSI})")
+        for nome, valore in self.fissi.items():
+            if nome in parametri and not np.allclose(parametri[nome], valore):
+                raise ValueError(f"{nome} è fisso a {valore:g} nei dati del surrogato: "
+                                 f"{nome}={parametri[nome]} sarebbe un'estrapolazione")
+        mancanti = [nome for nome in self.attivi if nome not in parametri]
+        if mancanti:
+            raise ValueError(f"Servono i valori di {mancanti} (assi attivi: {self.attivi})")
+        colonne = np.broadcast_arrays(*(np.asarray(parametri[nome], dtype=float) for nome in self.attivi))
+        return np.stack([c.ravel() for c in colonne], axis=1), colonne[0].shape
+
+    def predici(self, **parametri):
+        """
+        Φ previsto e sua deviazione standard (incertezza del surrogato allargata
+        dove i dati vicini variano molto, senza il rumore tra repliche) per
+        valori o array degli assi attivi
+        """
+        X, forma = self._coordinate(parametri)
+        K_stella = _matern52(self._normalizza(X), self._U, self.scale, self.ampiezza)
+        media = self._media_y + K_stella @ self._alfa
+        varianza = self.ampiezza - np.einsum('ij,ij->i', K_stella @ self._K_inv, K_stella)
+        std = np.sqrt(np.maximum(varianza, 0.0)) * self._calibrazione(K_stella, media)
+        media = np.clip(media, *INTERVALLO_PHI)
+        if forma == ():
+            return float(media[0]), float(std[0])
+        return media.reshape(forma), std.reshape(forma)
+
+    def phi(self, **parametri):
+        """Solo il Φ previsto (media), per uno o più punti"""
+        X, forma = self._coordinate(parametri)
+        media = self._media_y + _matern52(self._normalizza(X), self._U, self.scale, self.ampiezza) @ self._alfa
+        media = np.clip(media, *INTERVALLO_PHI)
+        return float(media[0]) if forma == () else media.reshape(forma)
+
+    # === DOVE SIMULARE ===
+    def _candidati(self, numero, seed):
+        """Ipercubo latino sull'intervallo dei dati (coordinate normalizzate)"""
+        rng = np.random.default_rng(seed)
+        d = len(self.attivi)
+        strati = np.stack([rng.permutation(numero) for _ in range(d)], axis=1)
+        return (strati + rng.random((numero, d))) / numero
+
+    def _da_normalizzate(self, U):
+        X = U * self._estensione + self._minimo
+        for k, nome in enumerate(self.attivi):
+            if nome in SCALA_LOG:
+                X[:, k] = np.exp(X[:, k])
+        return X
+
+    def proponi(self, numero, candidati=1000, seed=0, rumore=None):
+        """
+        `numero` punti dove simulare: scelta greedy della massima incertezza (calibrata), che
+        dopo ogni scelta si aggiorna come se il punto fosse già stato simulato
+        (l'incertezza non dipende dal valore osservato), così i punti non si
+        ammassano. rumore: varianza attesa della nuova osservazione (default:
+        mediana del rumore noto dei dati).
+        Ritorna una griglia per esegui_diagramma (dimensione 'campione').
+        """
+        if not self.adattato:
+            raise RuntimeError("Surrogato non adattato: chiama adatta()")
+        if rumore is None:
+            rumore = float(np.median(self._rumore)) + NUGGET_MIN
+        U = self._candidati(candidati, seed)
+        K_stella = _matern52(U, self._U, self.scale, self.ampiezza)
+        covarianza = _matern52(U, U, self.scale, self.ampiezza) - K_stella @ self._K_inv @ K_stella.T
+        peso = self._calibrazione(K_stella, self._media_y + K_stella @ self._alfa)**2
+
+        scelti = []
+        for _ in range(numero):
+            j = int(np.argmax(np.diag(covarianza) * peso))
+            scelti.append(j)
+            colonna = covarianza[:, j].copy()
+            covarianza -= np.outer(colonna, colonna) / (colonna[j] + rumore)
+
+        X = self._da_normalizzate(U[scelti])
+        if 'N' in self.attivi:
+            X[:, self.attivi.index('N')] = np.round(X[:, self.attivi.index('N')])
+        # Tutti gli assi tra le coordinate: anche quelli fissi tornano nel diagramma simulato
+        coordinate = {nome: (X[:, self.attivi.index(nome)] if nome in self.attivi
+                             else np.full(numero, self.fissi[nome])) for nome in ASSI}
+        coordinate['N'] = coordinate['N'].astype(int)
+        punti = [((k,), _parametri({nome: c[k] for nome, c in coordinate.items()})) for k in range(numero)]
+        coordinate['campione'] = np.arange(numero)
+        return {'dimensioni': ['campione'], 'coordinate': coordinate, 'punti': punti}
+
+    # === PERSISTENZA ===
+    def salva(self, percorso):
+        """Modello adattato in .npz: basta per predici/phi/proponi, senza riadattare"""
+        if not self.adattato:
+            raise RuntimeError("Surrogato non adattato: chiama adatta()")
+        meta = {'attivi': self.attivi, 'fissi': self.fissi, 'media_y': self._media_y,
+                'ampiezza': self.ampiezza, 'nugget': self.nugget,
+                'log_verosimiglianza': self.log_verosimiglianza}
+        temporaneo = percorso + '.tmp'
+        with open(temporaneo, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), X=self._X, U=self._U, y=self._y,
+                     rumore=self._rumore, alfa=self._alfa, K_inv=self._K_inv, scale=self.scale,
+                     minimo=self._minimo, estensione=self._estensione)
+        os.replace(temporaneo, percorso)  # mai un file scritto a metà
+        return percorso
+
+    @classmethod
+    def carica(cls, percorso):
+        modello = cls()
+        with np.load(percorso) as dati:
+            meta = json.loads(str(dati['meta']))
+            modello._X, modello._U, modello._y = dati['X'], dati['U'], dati['y']
+            modello._rumore, modello._alfa, modello._K_inv = dati['rumore'], dati['alfa'], dati['K_inv']
+            modello.scale, modello._minimo, modello._estensione = dati['scale'], dati['minimo'], dati['estensione']
+        modello.attivi, modello.fissi = meta['attivi'], meta['fissi']
+        modello._media_y, modello.ampiezza, modello.nugget = meta['media_y'], meta['ampiezza'], meta['nugget']
+        modello.log_verosimiglianza = meta['log_verosimiglianza']
+        # I dati restano utilizzabili per aggiungere punti e riadattare
+        X = modello._X
+        modello._assi = {nome: [X[:, modello.attivi.index(nome)] if nome in modello.attivi
+                                else np.full(len(X), modello.fissi[nome])] for nome in ASSI}
+        modello._phi = [modello._y + modello._media_y]
+        modello._varianza = [modello._rumore]
+        modello._senza_rumore = (modello._rumore <= 0).astype(float)
+        modello.adattato = True
+        modello.verifica = modello.verifica_punti()
+        return modello
+
+
+# === RIGA DI COMANDO ===
+def _leggi_domanda(testo):
+    """'mix=0.62 epsilon=0.05' → {'mix': 0.62, 'epsilon': 0.05}"""
+    domanda = {}
+    for parte in testo.replace(',', ' ').split():
+        nome, _, valore = parte.partition('=')
+        if not valore:
+            raise argparse.ArgumentTypeError(f"Atteso asse=valore, trovato '{parte}'")
+        domanda[nome] = float(valore)
+    return domanda
+
+
+def stampa_modello(modello):
+    print(f"📐 Assi attivi: {modello.attivi}   fissi: {modello.fissi or '-'}")
+    print(f"   Lunghezze di scala (su [0, 1]): "
+          + ', '.join(f"{nome}={s:.3g}" for nome, s in zip(modello.attivi, modello.scale)))
+    print(f"   σ segnale = {np.sqrt(modello.ampiezza):.4f}, σ nugget = {np.sqrt(modello.nugget):.2e}, "
+          f"log-verosimiglianza = {modello.log_verosimiglianza:.1f}, {len(modello._y)} punti")
+    verifica = modello.verifica
+    if verifica['fuori']:
+        print(f"   ⚠️  {verifica['fuori']}/{verifica['punti']} punti osservati oltre {TOLLERANZA_PUNTI:g} "
+              f"errori standard (massimo {verifica['scarto_max']:.1f} in {verifica['peggiore']})")
+    else:
+        print(f"   ✅ Punti osservati riprodotti entro {TOLLERANZA_PUNTI:g} errori standard "
+              f"(massimo {verifica['scarto_max']:.2f}, {verifica['punti']} punti)")
+
+
+def stampa_proposta(griglia):
+    print(f"\n🎯 Dove simulare ({len(griglia['punti'])} punti, massima incertezza):")
+    for (k,), parametri in griglia['punti']:
+        print("   " + ', '.join(f"{nome}={parametri[nome]:.4g}" for nome in ASSI))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Surrogato di Φ(mix, ε, N, α) sugli sweep salvati")
+    parser.add_argument("--diagramma", nargs="+", default=[], metavar="FILE.npz",
+                        help="diagrammi di fase salvati da phi-diagramma")
+    parser.add_argument("--archivio", nargs="+", default=[], metavar="CARTELLA",
+                        help="archivi colonnari di phi-misti (cartella .../archivio)")
+    parser.add_argument("--modello", default=None, metavar="FILE.npz", help="surrogato già adattato")
+    parser.add_argument("--chiedi", type=_leggi_domanda, action="append", default=[], metavar="'mix=0.62 ...'",
+                        help="punto da prevedere (ripetibile)")
+    parser.add_argument("--proponi", type=int, default=0, metavar="K",
+                        help="propone K punti dove l'incertezza è massima")
+    parser.add_argument("--affina", type=int, default=0, metavar="ITERAZIONI",
+                        help="simula i punti proposti e riadatta, per ITERAZIONI volte (richiede --proponi)")
+    parser.add_argument("--repliche", type=int, default=30, help="repliche per punto simulato con --affina")
+    parser.add_argument("--salva", default=None, metavar="FILE.npz", help="salva il surrogato adattato")
+    args = parser.parse_args()
+
+    print("🔮 SURROGATO Φ-RISONANZA")
+    print("=" * 60)
+
+    if args.modello is not None:
+        modello = Surrogato.carica(args.modello)
+        print(f"📂 Modello: {args.modello}")
+    else:
+        modello = Surrogato()
+        for percorso in args.diagramma:
+            modello.aggiungi_diagramma(percorso)
+        for cartella in args.archivio:
+            modello.aggiungi_archivio(cartella)
+        if not len(modello):
+            parser.error("servono --diagramma, --archivio o --modello")
+        inizio = time.time()
+        modello.adatta()
+        print(f"⏱️  Adattamento su {len(modello)} punti: {time.time() - inizio:.2f} s")
+    stampa_modello(modello)
+
+    for iterazione in range(1, args.affina + 1):
+        if not args.proponi:
+            parser.error("--affina richiede --proponi K")
+        griglia = modello.proponi(args.proponi, seed=iterazione)
+        _, std_prima = modello.predici(**{nome: griglia['coordinate'][nome] for nome in modello.attivi})
+        diagramma = esegui_diagramma(griglia, args.repliche)
+        modello.aggiungi_diagramma(diagramma).adatta()
+        _, std_dopo = modello.predici(**{nome: griglia['coordinate'][nome] for nome in modello.attivi})
+        print(f"\n🔁 Affinamento {iterazione}: {args.proponi} punti × {args.repliche} repliche, "
+              f"σ massima nei punti {std_prima.max():.4f} → {std_dopo.max():.4f}")
+
+    if args.chiedi:
+        print(f"\n{'Punto':<36} {'Φ':>9} {'± σ':>9}")
+        for domanda in args.chiedi:
+            media, std = modello.predici(**domanda)
+            testo = ', '.join(f"{nome}={valore:g}" for nome, valore in domanda.items())
+            print(f"{testo:<36} {media:>9.4f} {std:>9.4f}")
+        inizio = time.perf_counter()
+        ripetizioni = 1000
+        for _ in range(ripetizioni):
+            modello.predici(**args.chiedi[0])
+        print(f"\n⚡ {(time.perf_counter() - inizio) / ripetizioni * 1e6:.0f} µs per domanda")
+
+    if args.proponi:
+        stampa_proposta(modello.proponi(args.proponi, seed=0))
+
+    if args.salva:
+        modello.salva(args.salva)
+        print(f"\n💾 Surrogato salvato in: {args.salva}")
+
+
+if __name__ == "__main__":
+    main()
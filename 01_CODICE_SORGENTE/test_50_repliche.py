@@ -1,43 +1,51 @@
 # === test_50_repliche.py ===
-print("🚀 TEST ROBUSTEZZA COMPLETO - 50 REPLICHE")
-print("=" * 60)
-
+import argparse
 import numpy as np
 import json
 import os
+import shutil
 import time
 from datetime import datetime
 
+from .aggregatore import StatisticheOnline, rapporto_varianze
+from .archivio import ArchivioColonnare
+from .cache_risultati import CacheRisultati
+from .checkpoint import Checkpoint
+from .ricampionamento import confronto_sistemi
+from .scrittura import ScrittoreAsincrono
+from .ensemble import EnsemblePhiAvanzato
+from .flussi_rng import FlussiRNG, generatore_legacy
+from .indice_risultati import registra_esecuzione
+from .ordine import ParametroOrdine
+from .precisione import PRECISIONI
+from .strumentazione import Strumentazione, fase
+from .traiettorie import registra_stato
+
 # === CONFIGURAZIONE ===
 NUM_REPLICHE = 50  # ORA 50 REPLICHE!
 SISTEMI = ['equity', 'extractive']
-
-# Crea cartella risultati
-data_ora = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-cartella_risultati = f"RISULTATI_50_{data_ora}"
-os.makedirs(cartella_risultati, exist_ok=True)
-os.makedirs(f"{cartella_risultati}/raw", exist_ok=True)
-
-print(f"📁 Cartella risultati: {cartella_risultati}")
-print(f"🔁 Repliche per sistema: {NUM_REPLICHE}")
-print(f"📊 Totale simulazioni: {NUM_REPLICHE * 2}")
+BLOCCO_CHECKPOINT = 10  # repliche simulate tra due checkpoint
 
 # === SISTEMA Φ MIGLIORATO ===
 class SistemaPhiAvanzato:
-    def __init__(self, tipo, replica_id, seed_base=42):
+    def __init__(self, tipo, replica_id, seed_base=42, flussi=None):
         self.tipo = tipo
         self.replica_id = replica_id
         
-        # Seed unico per riproducibilità
-        seed = seed_base + replica_id * 1000
-        np.random.seed(seed)
+        # Seed unico per riproducibilità (flusso privato: niente stato globale)
+        if flussi is None:
+            self.rng = generatore_legacy(seed_base + replica_id * 1000)
+            self.seed = replica_id * 1000 + 42
+        else:
+            self.rng = flussi.generatore(tipo, None, replica_id)
+            self.seed = flussi.seed
         
         # Parametri dai tuoi esperimenti
         self.N = 100  # nodi
         self.epsilon = 0.05
         
         # Stato iniziale
-        self.theta = np.random.uniform(0, 2*np.pi, self.N)
+        self.theta = self.rng.uniform(0, 2*np.pi, self.N)
         
         # AMPIEZZE: differenza chiave tra sistemi
         if tipo == 'equity':
@@ -48,44 +56,46 @@ class SistemaPhiAvanzato:
             # EXTRACTIVE: distribuzione di potenza (alcuni nodi molto forti)
             # Usa distribuzione di Pareto per maggior variabilità
             alpha = 1.5  # Parametro di skewness
-            self.A = np.random.pareto(alpha, self.N) + 1
+            self.A = self.rng.pareto(alpha, self.N) + 1
             self.A = np.sort(self.A)[::-1]  # Ordina decrescente
             self.A = self.A / np.sum(self.A)  # Normalizza
             self.skewness = np.std(self.A) / np.mean(self.A)
+        
+        # Kernel di Φ: un esponenziale complesso in buffer riutilizzati
+        self._ordine = ParametroOrdine(self.A)
     
     def calcola_phi(self):
-        """Calcola parametro d'ordine Φ accurato"""
-        # Media complessa pesata
-        somma_reale = np.sum(self.A * np.cos(self.theta))
-        somma_immag = np.sum(self.A * np.sin(self.theta))
-        
-        phi = np.sqrt(somma_reale**2 + somma_immag**2)
-        return phi
+        """Calcola parametro d'ordine Φ (kernel condiviso, buffer preallocati)"""
+        return self._ordine.phi(self.theta)
     
-    def evolve(self):
-        """Evoluzione più realistica"""
+    def evolve(self, registratore=None, riga=0):
+        """Evoluzione più realistica (registratore: RegistratoreTraiettorie opzionale)"""
         phi_iniziale = self.calcola_phi()
         
         # SIMULAZIONE EVOLUZIONE
         t = 0.0
         dt = 0.05
+        passo = 0
         phi_attuale = phi_iniziale
         phi_precedente = phi_iniziale
         
+        if registratore is not None:
+            registra_stato(registratore, riga, passo, t, self._ordine, self.theta)
+        
         # Equity converge velocemente, Extractive oscilla
         if self.tipo == 'equity':
             target_phi = 0.994  # Valore target dai tuoi dati
-            tempo_target = 1.8 + np.random.randn() * 0.2
+            tempo_target = 1.8 + self.rng.standard_normal() * 0.2
         else:
             # Extractive: valore basso con più variabilità
-            target_phi = 0.25 + np.random.randn() * 0.1
-            tempo_target = 2.3 + np.random.randn() * 0.3
+            target_phi = 0.25 + self.rng.standard_normal() * 0.1
+            tempo_target = 2.3 + self.rng.standard_normal() * 0.3
         
         while t < 5.0:  # Max 5 secondi
             # Aggiorna fasi
             if self.tipo == 'equity':
                 # Equity: tende a sincronizzarsi
-                noise = 0.01 * np.random.randn(self.N)
+                noise = 0.01 * self.rng.standard_normal(self.N)
                 self.theta += noise
                 
                 # Forza leggera sincronizzazione
@@ -94,7 +104,7 @@ class SistemaPhiAvanzato:
                     self.theta = 0.95 * self.theta + 0.05 * mean_phase
             else:
                 # Extractive: più caotico
-                noise = 0.05 * np.random.randn(self.N)
+                noise = 0.05 * self.rng.standard_normal(self.N)
                 # I nodi forti influenzano di più
                 weighted_noise = noise * (1 + 2 * self.A)
                 self.theta += weighted_noise
@@ -103,10 +113,14 @@ class SistemaPhiAvanzato:
             self.theta = self.theta % (2 * np.pi)
             
             t += dt
+            passo += 1
             
             # Calcola phi
             phi_attuale = self.calcola_phi()
             
+            if registratore is not None:
+                registra_stato(registratore, riga, passo, t, self._ordine, self.theta)
+            
             # Check convergenza
             delta_phi = abs(phi_attuale - phi_precedente)
             if delta_phi < 1e-4 and t > 0.5:
@@ -118,7 +132,7 @@ class SistemaPhiAvanzato:
         
         # Aggiusta per raggiungere target realistico
         if self.tipo == 'equity':
-            phi_finale = 0.99 + 0.01 * np.random.rand()
+            phi_finale = 0.99 + 0.01 * self.rng.random()
             tempo_collasso = max(1.5, tempo_target)
         else:
             # Extractive: più variabile tra repliche
@@ -136,75 +150,187 @@ class SistemaPhiAvanzato:
             'parametri': {
                 'N': self.N,
                 'epsilon': self.epsilon,
-                'seed': self.replica_id * 1000 + 42
+                'seed': self.seed
             }
         }
 
+# === AGGREGAZIONE (condivisa con l'unione delle campagne, campagna.py) ===
+INTESTAZIONE_CSV = "sistema,replica,phi_finale,tempo_collasso\n"
+
+
+def riga_csv(sistema, res):
+    """Riga di dati_analisi.csv per una replica"""
+    return f"{sistema},{res['replica_id']},{res['phi_finale']},{res['tempo_collasso']}\n"
+
+
+def statistiche_sistema(phi_stat, tempo_stat, num_repliche=NUM_REPLICHE):
+    """Statistiche di un sistema dagli aggregati in streaming di Φ finale e tempo di collasso"""
+    stat = {
+        'phi_medio': phi_stat.media,
+        'phi_std': phi_stat.std,
+        'phi_min': phi_stat.minimo,
+        'phi_max': phi_stat.massimo,
+        'phi_cv': phi_stat.cv,  # Coefficiente di variazione %
+        'tempo_medio': tempo_stat.media,
+        'tempo_std': tempo_stat.std,
+        'num_repliche': num_repliche,
+        'phi_quantili': phi_stat.quantili(),
+        'tempo_quantili': tempo_stat.quantili()
+    }
+    if phi_stat.valori is not None:
+        stat['phi_valori'] = phi_stat.valori
+        stat['tempo_valori'] = tempo_stat.valori
+    return stat
+
+
+def risultati_robustezza(statistiche, aggregati, timestamp, tempo_esecuzione, num_repliche=NUM_REPLICHE):
+    """Contenuto di RISULTATI_COMPLETI.json (senza gli intervalli bootstrap)"""
+    eq = statistiche['equity']
+    ex = statistiche['extractive']
+    return {
+        'timestamp': timestamp,
+        'num_repliche': num_repliche,
+        'tempo_esecuzione': tempo_esecuzione,
+        'statistiche': statistiche,
+        'confronto': {
+            'differenza_phi': eq['phi_medio'] - ex['phi_medio'],
+            'rapporto_varianze': rapporto_varianze(aggregati['extractive'], aggregati['equity']),
+            'rapporto_cv': ex['phi_cv'] / eq['phi_cv']
+        },
+        'verifica_ipotesi': {
+            'equity_alto': 0.98 < eq['phi_medio'] < 1.0,
+            'equity_stabile': eq['phi_cv'] < 5,
+            'extractive_basso': 0.2 < ex['phi_medio'] < 0.35,
+            'extractive_variabile': ex['phi_cv'] > 20,
+            'collasso_2_3s': 2.0 < ex['tempo_medio'] < 2.6
+        }
+    }
+
+
+def intervalli_robustezza(archivio):
+    """Intervalli bootstrap e test di permutazione sui Φ finali archiviati (archivio chiuso)"""
+    colonne = archivio.leggi(['tipo', 'phi_finale'])
+    return confronto_sistemi(colonne['phi_finale'][colonne['tipo'] == 'equity'],
+                             colonne['phi_finale'][colonne['tipo'] == 'extractive'])
+
+
 # === ESECUZIONE PRINCIPALE ===
-def esegui_test_completo():
+def esegui_test_completo(flussi=None, cache=None, riprendi=None, valori_grezzi=False, strumenti=None,
+                         precisione='float64', scrittura_asincrona=True):
+    """
+    riprendi: cartella di un'esecuzione interrotta; si simulano solo le repliche mancanti
+    valori_grezzi: se True scrive anche le liste phi_valori/tempo_valori nel JSON
+    strumenti: Strumentazione opzionale; il rapporto è scritto accanto ai risultati
+    precisione: 'float64' o 'float32' per gli ensemble (vedi precisione.py)
+    scrittura_asincrona: checkpoint e archivio scritti da un thread (vedi scrittura.py)
+    """
+    print("🚀 TEST ROBUSTEZZA COMPLETO - 50 REPLICHE")
+    print("=" * 60)
+    
+    # Crea cartella risultati (solo qui: importare il modulo non tocca il disco)
+    data_ora = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    cartella = riprendi if riprendi is not None else f"RISULTATI_50_{data_ora}"
+    os.makedirs(cartella, exist_ok=True)
+    
+    print(f"📁 Cartella risultati: {cartella}")
+    print(f"🔁 Repliche per sistema: {NUM_REPLICHE}")
+    print(f"📊 Totale simulazioni: {NUM_REPLICHE * 2}")
+    
+    configurazione = {
+        'sistemi': SISTEMI,
+        'repliche': NUM_REPLICHE,
+        'flussi': flussi.seed if flussi is not None else None,
+    }
+    if precisione != 'float64':
+        configurazione['precisione'] = precisione
+    # Checkpoint e archivio non fermano le simulazioni sul disco: li scrive un thread
+    scrittore = ScrittoreAsincrono() if scrittura_asincrona else None
+    checkpoint = Checkpoint(f"{cartella}/checkpoint", configurazione=configurazione, scrittore=scrittore)
+    
     print("\n🔬 INIZIO TEST 50 REPLICHE...")
+    if len(checkpoint):
+        print(f"♻️  Ripresa da {cartella}: {len(checkpoint)} repliche già completate")
     tempo_inizio = time.time()
     
-    risultati_totali = {}
     statistiche = {}
+    aggregati = {}
+    # L'archivio si ricostruisce dai risultati: una ripresa non accoda duplicati
+    shutil.rmtree(f"{cartella}/archivio", ignore_errors=True)
+    archivio = ArchivioColonnare(f"{cartella}/archivio", scrittore=scrittore)
     
-    for sistema in SISTEMI:
-        print(f"\n{'='*40}")
-        print(f"📊 SISTEMA: {sistema.upper()}")
-        print(f"{'='*40}")
-        
-        risultati_sistema = []
-        phi_valori = []
-        tempo_valori = []
-        
-        # Progress bar
-        print("   Progresso: [", end="")
+    # Dati per analisi, scritti replica per replica
+    with open(f"{cartella}/dati_analisi.csv", 'w') as csv:
+        csv.write(INTESTAZIONE_CSV)
         
-        for replica in range(1, NUM_REPLICHE + 1):
-            # Mostra progresso ogni 10 repliche
-            if replica % (NUM_REPLICHE//10) == 0:
-                print("#", end="", flush=True)
+        for sistema in SISTEMI:
+            print(f"\n{'='*40}")
+            print(f"📊 SISTEMA: {sistema.upper()}")
+            print(f"{'='*40}")
             
-            # Esegui replica
-            sis = SistemaPhiAvanzato(sistema, replica)
-            res = sis.evolve()
+            # Statistiche aggiornate a ogni blocco: memoria costante nel numero di repliche
+            phi_stat = StatisticheOnline(valori_grezzi=valori_grezzi)
+            tempo_stat = StatisticheOnline(valori_grezzi=valori_grezzi)
             
-            risultati_sistema.append(res)
-            phi_valori.append(res['phi_finale'])
-            tempo_valori.append(res['tempo_collasso'])
+            # Progress bar
+            print("   Progresso: [", end="")
             
-            # Salva ogni replica in file separato
-            with open(f"{cartella_risultati}/raw/{sistema}_rep_{replica:03d}.json", 'w') as f:
-                json.dump(res, f, indent=2)
-        
-        print("] COMPLETATO")
-        
-        # Calcola statistiche
-        phi_array = np.array(phi_valori)
-        tempo_array = np.array(tempo_valori)
-        
-        stat = {
-            'phi_medio': float(np.mean(phi_array)),
-            'phi_std': float(np.std(phi_array)),
-            'phi_min': float(np.min(phi_array)),
-            'phi_max': float(np.max(phi_array)),
-            'phi_cv': float(np.std(phi_array) / np.mean(phi_array) * 100),  # Coefficiente di variazione %
-            'tempo_medio': float(np.mean(tempo_array)),
-            'tempo_std': float(np.std(tempo_array)),
-            'num_repliche': NUM_REPLICHE,
-            'phi_valori': [float(x) for x in phi_valori],
-            'tempo_valori': [float(x) for x in tempo_valori]
-        }
-        
-        risultati_totali[sistema] = risultati_sistema
-        statistiche[sistema] = stat
+            # Le repliche evolvono insieme come array (R, N), a blocchi salvati nel checkpoint;
+            # ogni blocco aggiorna statistiche, archivio e CSV e poi viene scartato
+            def simula():
+                replica_ids = range(1, NUM_REPLICHE + 1)
+                ripresi = [r for r in replica_ids if checkpoint.completato(sistema, None, r)]
+                mancanti = checkpoint.mancanti(sistema, None, replica_ids)
+                for inizio in range(0, len(ripresi), BLOCCO_CHECKPOINT):
+                    with fase(strumenti, 'checkpoint', sistema=sistema):
+                        risultati = checkpoint.leggi(sistema, None, ripresi[inizio:inizio + BLOCCO_CHECKPOINT])
+                    yield risultati
+                for inizio in range(0, len(mancanti), BLOCCO_CHECKPOINT):
+                    blocco = mancanti[inizio:inizio + BLOCCO_CHECKPOINT]
+                    ensemble = EnsemblePhiAvanzato(sistema, blocco, flussi=flussi, precisione=precisione)
+                    risultati = ensemble.evolve(strumenti=strumenti)
+                    with fase(strumenti, 'checkpoint', sistema=sistema):
+                        checkpoint.salva(sistema, None, risultati)
+                    yield risultati
+            
+            if cache is None:
+                blocchi = simula()
+            else:
+                parametri = {'sistema': sistema, 'repliche': NUM_REPLICHE, 'flussi': flussi}
+                if precisione != 'float64':
+                    parametri['precisione'] = precisione
+                blocchi = cache.ottieni_a_blocchi(EnsemblePhiAvanzato, parametri, simula)
+            
+            fatte = segnate = 0
+            for risultati in blocchi:
+                with fase(strumenti, 'statistiche_csv_archivio', sistema=sistema):
+                    phi_stat.aggiungi_molti([res['phi_finale'] for res in risultati])
+                    tempo_stat.aggiungi_molti([res['tempo_collasso'] for res in risultati])
+                    
+                    for res in risultati:
+                        # Una riga per replica nell'archivio colonnare (scritto a blocchi)
+                        archivio.aggiungi(res)
+                        csv.write(riga_csv(sistema, res))
+                
+                # Mostra progresso ogni 10% delle repliche
+                fatte += len(risultati)
+                while segnate < fatte * 10 // NUM_REPLICHE:
+                    print("#", end="", flush=True)
+                    segnate += 1
+            
+            print("] COMPLETATO")
+            
+            # Calcola statistiche
+            stat = statistiche_sistema(phi_stat, tempo_stat)
+            
+            statistiche[sistema] = stat
+            aggregati[sistema] = phi_stat
+            
+            print(f"\n   📈 STATISTICHE:")
+            print(f"      Φ medio: {stat['phi_medio']:.4f} ± {stat['phi_std']:.4f}")
+            print(f"      CV(Φ): {stat['phi_cv']:.2f}%")
+            print(f"      Range: [{stat['phi_min']:.4f}, {stat['phi_max']:.4f}]")
+            print(f"      Tempo medio: {stat['tempo_medio']:.2f}s ± {stat['tempo_std']:.2f}s")
         
-        print(f"\n   📈 STATISTICHE:")
-        print(f"      Φ medio: {stat['phi_medio']:.4f} ± {stat['phi_std']:.4f}")
-        print(f"      CV(Φ): {stat['phi_cv']:.2f}%")
-        print(f"      Range: [{stat['phi_min']:.4f}, {stat['phi_max']:.4f}]")
-        print(f"      Tempo medio: {stat['tempo_medio']:.2f}s ± {stat['tempo_std']:.2f}s")
-    
     # === ANALISI FINALE ===
     tempo_totale = time.time() - tempo_inizio
     
@@ -219,7 +345,7 @@ def esegui_test_completo():
     print(f"   Equity:    Φ = {eq['phi_medio']:.4f} ± {eq['phi_std']:.4f} (CV: {eq['phi_cv']:.2f}%)")
     print(f"   Extractive: Φ = {ex['phi_medio']:.4f} ± {ex['phi_std']:.4f} (CV: {ex['phi_cv']:.2f}%)")
     print(f"   ΔΦ = {eq['phi_medio'] - ex['phi_medio']:.4f}")
-    print(f"   Rapporto varianze: {ex['phi_std']**2 / eq['phi_std']**2:.1f}x")
+    print(f"   Rapporto varianze: {rapporto_varianze(aggregati['extractive'], aggregati['equity']):.1f}x")
     
     print(f"\n⏱️  TEMPI:")
     print(f"   Equity:    {eq['tempo_medio']:.2f}s ± {eq['tempo_std']:.2f}s")
@@ -235,41 +361,72 @@ def esegui_test_completo():
     print(f"\n⏰ Tempo totale esecuzione: {tempo_totale:.1f} secondi")
     
     # === SALVA RISULTATI COMPLETI ===
-    risultati_completi = {
-        'timestamp': data_ora,
-        'num_repliche': NUM_REPLICHE,
-        'tempo_esecuzione': tempo_totale,
-        'statistiche': statistiche,
-        'confronto': {
-            'differenza_phi': eq['phi_medio'] - ex['phi_medio'],
-            'rapporto_varianze': ex['phi_std']**2 / eq['phi_std']**2,
-            'rapporto_cv': ex['phi_cv'] / eq['phi_cv']
-        },
-        'verifica_ipotesi': {
-            'equity_alto': 0.98 < eq['phi_medio'] < 1.0,
-            'equity_stabile': eq['phi_cv'] < 5,
-            'extractive_basso': 0.2 < ex['phi_medio'] < 0.35,
-            'extractive_variabile': ex['phi_cv'] > 20,
-            'collasso_2_3s': 2.0 < ex['tempo_medio'] < 2.6
-        }
-    }
+    risultati_completi = risultati_robustezza(statistiche, aggregati, data_ora, tempo_totale)
     
-    with open(f"{cartella_risultati}/RISULTATI_COMPLETI.json", 'w') as f:
-        json.dump(risultati_completi, f, indent=2)
+    with fase(strumenti, 'statistiche_csv_archivio'):
+        archivio.chiudi()
+        if scrittore is not None:
+            scrittore.chiudi()
+    if scrittore is not None:
+        print(f"\n💾 Scrittura asincrona: {scrittore.file_scritti} file in {scrittore.lotti} lotti, "
+              f"attesa per coda piena {scrittore.attesa:.2f}s")
     
-    # Salva dati per analisi
-    with open(f"{cartella_risultati}/dati_analisi.csv", 'w') as f:
-        f.write("sistema,replica,phi_finale,tempo_collasso\n")
-        for sistema in SISTEMI:
-            for i, res in enumerate(risultati_totali[sistema]):
-                f.write(f"{sistema},{i+1},{res['phi_finale']},{res['tempo_collasso']}\n")
+    # Intervalli bootstrap e test di permutazione sui valori archiviati
+    with fase(strumenti, 'bootstrap'):
+        intervalli = intervalli_robustezza(archivio)
+    risultati_completi['intervalli_confidenza'] = intervalli
+    ic_delta, ic_var = intervalli['differenza_phi'], intervalli['rapporto_varianze']
+    print(f"\n🎲 INTERVALLI BOOTSTRAP (95%, {ic_delta['ricampionamenti']} ricampionamenti):")
+    print(f"   ΔΦ = {ic_delta['stima']:.4f} [{ic_delta['inferiore']:.4f}, {ic_delta['superiore']:.4f}], "
+          f"p = {intervalli['permutazione']['differenza_phi']['p_valore']:.2g}")
+    print(f"   Rapporto varianze = {ic_var['stima']:.1f}x [{ic_var['inferiore']:.1f}, {ic_var['superiore']:.1f}], "
+          f"p = {intervalli['permutazione']['rapporto_varianze']['p_valore']:.2g}")
+    
+    with fase(strumenti, 'json'):
+        with open(f"{cartella}/RISULTATI_COMPLETI.json", 'w') as f:
+            json.dump(risultati_completi, f, indent=2)
+        registra_esecuzione(cartella)  # INDICE_RISULTATI.json, letto da phi-grafici
     
     print(f"\n💾 RISULTATI SALVATI IN:")
-    print(f"   {cartella_risultati}/RISULTATI_COMPLETI.json")
-    print(f"   {cartella_risultati}/dati_analisi.csv")
-    print(f"   {cartella_risultati}/raw/ (100 file JSON)")
+    print(f"   {cartella}/RISULTATI_COMPLETI.json")
+    print(f"   {cartella}/dati_analisi.csv")
+    print(f"   {cartella}/archivio/ ({len(archivio)} repliche, formato colonnare)")
+    if strumenti is not None:
+        strumenti.scrivi(cartella)
+        print(f"   {cartella}/strumentazione.json, strumentazione.prom")
     print(f"\n✅ TEST 50 REPLICHE COMPLETATO CON SUCCESSO!")
     print("=" * 60)
 
+def main():
+    parser = argparse.ArgumentParser(description="Test robustezza Φ con 50 repliche")
+    parser.add_argument("--philox", type=int, default=None, metavar="SEED",
+                        help="flussi Philox per replica con questo seed radice")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="CARTELLA",
+                        help="riusa i risultati già calcolati (cartella di default se omessa)")
+    parser.add_argument("--invalida-cache", action="store_true",
+                        help="svuota la cache di questo test prima di eseguire")
+    parser.add_argument("--valori-grezzi", action="store_true",
+                        help="scrive anche le liste complete di Φ e tempi in RISULTATI_COMPLETI.json")
+    parser.add_argument("--riprendi", default=None, metavar="CARTELLA",
+                        help="riprende un'esecuzione interrotta dalla sua cartella risultati")
+    parser.add_argument("--strumenta", action="store_true",
+                        help="misura tempi per fase, passi di convergenza e memoria")
+    parser.add_argument("--precisione", choices=list(PRECISIONI), default='float64',
+                        help="precisione degli ensemble (float32: metà memoria, vedi phi-precisione)")
+    parser.add_argument("--scrittura-sincrona", action="store_true",
+                        help="scrive checkpoint e archivio nel ciclo principale invece che in un thread")
+    args = parser.parse_args()
+    flussi = FlussiRNG(args.philox) if args.philox is not None else None
+    cache = None
+    if args.cache is not None:
+        cache = CacheRisultati(args.cache) if args.cache else CacheRisultati()
+        if args.invalida_cache:
+            cache.invalida(EnsemblePhiAvanzato)
+    strumenti = Strumentazione() if args.strumenta else None
+    esegui_test_completo(flussi=flussi, cache=cache, riprendi=args.riprendi, valori_grezzi=args.valori_grezzi,
+                         strumenti=strumenti, precisione=args.precisione,
+                         scrittura_asincrona=not args.scrittura_sincrona)
+
+
 if __name__ == "__main__":
-    esegui_test_completo()
\ No newline at end of file
+    main()
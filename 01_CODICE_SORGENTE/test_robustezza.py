@@ -1,66 +1,65 @@
 # === test_robustezza.py ===
-print("🚀 TEST ROBUSTEZZA Φ-RISONANZA")
-print("=" * 50)
-
 import numpy as np
 import json
 import os
 from datetime import datetime
 
+from .flussi_rng import generatore_legacy
+from .ordine import ParametroOrdine
+from .traiettorie import registra_stato
+
 # === CONFIGURAZIONE ===
 NUM_REPLICHE = 5  # Prima 5, poi 50
 SISTEMI = ['equity', 'extractive']
 
-# Crea cartella risultati
-data_ora = datetime.now().strftime("%Y-%m-%d_%H-%M")
-cartella_risultati = f"risultati_{data_ora}"
-os.makedirs(cartella_risultati, exist_ok=True)
-
-print(f"📁 Cartella risultati: {cartella_risultati}")
-print(f"🔁 Repliche per sistema: {NUM_REPLICHE}")
-
 # === SISTEMA Φ (versione migliorata) ===
 class SistemaPhiRobustezza:
-    def __init__(self, tipo, seed=42):
+    def __init__(self, tipo, seed=42, flussi=None, replica_id=0):
         self.tipo = tipo
-        np.random.seed(seed)
+        # Flusso privato: niente stato globale
+        if flussi is None:
+            self.rng = generatore_legacy(seed)
+        else:
+            self.rng = flussi.generatore(tipo, None, replica_id)
         
         # Parametri fissi dai tuoi esperimenti
         self.N = 100  # nodi
         self.epsilon = 0.05
         
         # Stato iniziale
-        self.theta = np.random.uniform(0, 2*np.pi, self.N)
+        self.theta = self.rng.uniform(0, 2*np.pi, self.N)
         
         # Ampiezze: Equity vs Extractive
         if tipo == 'equity':
             self.A = np.ones(self.N) / self.N  # Tutte uguali
         else:  # extractive
             # Alcuni nodi dominanti (distribuzione esponenziale)
-            self.A = np.random.exponential(1.0, self.N)
+            self.A = self.rng.exponential(1.0, self.N)
             self.A = np.sort(self.A)[::-1]  # Ordina decrescente
             self.A = self.A / np.sum(self.A)  # Normalizza
+        
+        # Kernel di Φ: un esponenziale complesso in buffer riutilizzati
+        self._ordine = ParametroOrdine(self.A)
     
     def calcola_phi(self):
-        """Calcola parametro d'ordine Φ"""
-        # Media complessa pesata per ampiezza
-        somma_cos = np.sum(self.A * np.cos(self.theta))
-        somma_sin = np.sum(self.A * np.sin(self.theta))
-        
-        phi = np.sqrt(somma_cos**2 + somma_sin**2)
-        return phi
+        """Calcola parametro d'ordine Φ (kernel condiviso, buffer preallocati)"""
+        return self._ordine.phi(self.theta)
     
-    def evolve(self, max_time=5.0):
-        """Evolve sistema fino a stabilizzazione"""
+    def evolve(self, max_time=5.0, registratore=None, riga=0):
+        """Evolve sistema fino a stabilizzazione (registratore: RegistratoreTraiettorie opzionale)"""
         phi_iniziale = self.calcola_phi()
         
         # Simula evoluzione temporale (semplificata)
         t = 0.0
         dt = 0.1
+        passo = 0
+        
+        if registratore is not None:
+            registra_stato(registratore, riga, passo, t, self._ordine, self.theta)
         
         while t < max_time:
             # Piccole variazioni casuali alle fasi
-            variazione = self.epsilon * np.random.randn(self.N)
+            variazione = self.epsilon * self.rng.standard_normal(self.N)
             self.theta += variazione
             
             # Normalizza angoli tra 0 e 2π
@@ -73,14 +72,18 @@ class SistemaPhiRobustezza:
                 # Forza una leggera sincronizzazione
                 media_theta = np.mean(self.theta)
                 self.theta = self.theta * 0.9 + media_theta * 0.1
+            
+            passo += 1
+            if registratore is not None:
+                registra_stato(registratore, riga, passo, t, self._ordine, self.theta)
         
         phi_finale = self.calcola_phi()
         
         # Tempo di "collasso" simulato
         if self.tipo == 'equity':
-            tempo_collasso = 1.8 + np.random.rand() * 0.4  # ~1.8-2.2s
+            tempo_collasso = 1.8 + self.rng.random() * 0.4  # ~1.8-2.2s
         else:
-            tempo_collasso = 2.2 + np.random.rand() * 0.6  # ~2.2-2.8s
+            tempo_collasso = 2.2 + self.rng.random() * 0.6  # ~2.2-2.8s
         
         return {
             'tipo': self.tipo,
@@ -91,90 +94,106 @@ class SistemaPhiRobustezza:
         }
 
 # === ESECUZIONE TEST ===
-print("\n🔬 INIZIO TEST ROBUSTEZZA...")
+def main():
+    print("🚀 TEST ROBUSTEZZA Φ-RISONANZA")
+    print("=" * 50)
+    
+    # Crea cartella risultati (solo qui: importare il modulo non tocca il disco)
+    data_ora = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    cartella_risultati = f"risultati_{data_ora}"
+    os.makedirs(cartella_risultati, exist_ok=True)
+    
+    print(f"📁 Cartella risultati: {cartella_risultati}")
+    print(f"🔁 Repliche per sistema: {NUM_REPLICHE}")
+    
+    print("\n🔬 INIZIO TEST ROBUSTEZZA...")
 
-risultati_totali = {}
+    risultati_totali = {}
 
-for sistema in SISTEMI:
-    print(f"\n📊 SISTEMA: {sistema.upper()}")
-    print("   Replica |   Φ finale  | Tempo (s)")
-    print("   " + "-" * 30)
+    for sistema in SISTEMI:
+        print(f"\n📊 SISTEMA: {sistema.upper()}")
+        print("   Replica |   Φ finale  | Tempo (s)")
+        print("   " + "-" * 30)
     
-    risultati_sistema = []
+        risultati_sistema = []
     
-    for replica in range(1, NUM_REPLICHE + 1):
-        # Seed unico per ogni replica
-        seed = 1000 * (ord(sistema[0]) + replica)
+        for replica in range(1, NUM_REPLICHE + 1):
+            # Seed unico per ogni replica
+            seed = 1000 * (ord(sistema[0]) + replica)
         
-        # Crea e esegui sistema
-        sis = SistemaPhiRobustezza(sistema, seed=seed)
-        res = sis.evolve()
+            # Crea e esegui sistema
+            sis = SistemaPhiRobustezza(sistema, seed=seed)
+            res = sis.evolve()
         
-        # Salva risultati
-        risultati_sistema.append(res)
+            # Salva risultati
+            risultati_sistema.append(res)
         
-        # Mostra progresso
-        print(f"   {replica:7d} |    {res['phi_finale']:.4f}    |   {res['tempo_collasso']:.2f}")
+            # Mostra progresso
+            print(f"   {replica:7d} |    {res['phi_finale']:.4f}    |   {res['tempo_collasso']:.2f}")
         
-        # Salva file JSON per ogni replica
-        nome_file = f"{cartella_risultati}/{sistema}_replica_{replica:02d}.json"
-        with open(nome_file, 'w') as f:
-            json.dump(res, f, indent=2)
+            # Salva file JSON per ogni replica
+            nome_file = f"{cartella_risultati}/{sistema}_replica_{replica:02d}.json"
+            with open(nome_file, 'w') as f:
+                json.dump(res, f, indent=2)
     
-    # Calcola statistiche
-    phi_valori = [r['phi_finale'] for r in risultati_sistema]
-    tempo_valori = [r['tempo_collasso'] for r in risultati_sistema]
+        # Calcola statistiche
+        phi_valori = [r['phi_finale'] for r in risultati_sistema]
+        tempo_valori = [r['tempo_collasso'] for r in risultati_sistema]
     
-    stat = {
-        'phi_medio': float(np.mean(phi_valori)),
-        'phi_std': float(np.std(phi_valori)),
-        'phi_min': float(np.min(phi_valori)),
-        'phi_max': float(np.max(phi_valori)),
-        'tempo_medio': float(np.mean(tempo_valori)),
-        'tempo_std': float(np.std(tempo_valori)),
-        'num_repliche': NUM_REPLICHE
-    }
+        stat = {
+            'phi_medio': float(np.mean(phi_valori)),
+            'phi_std': float(np.std(phi_valori)),
+            'phi_min': float(np.min(phi_valori)),
+            'phi_max': float(np.max(phi_valori)),
+            'tempo_medio': float(np.mean(tempo_valori)),
+            'tempo_std': float(np.std(tempo_valori)),
+            'num_repliche': NUM_REPLICHE
+        }
     
-    risultati_totali[sistema] = stat
+        risultati_totali[sistema] = stat
     
-    print(f"\n   📈 STATISTICHE {sistema.upper()}:")
-    print(f"      Φ medio: {stat['phi_medio']:.4f} ± {stat['phi_std']:.4f}")
-    print(f"      Range Φ: {stat['phi_min']:.4f} - {stat['phi_max']:.4f}")
-    print(f"      Tempo medio: {stat['tempo_medio']:.2f}s ± {stat['tempo_std']:.2f}s")
+        print(f"\n   📈 STATISTICHE {sistema.upper()}:")
+        print(f"      Φ medio: {stat['phi_medio']:.4f} ± {stat['phi_std']:.4f}")
+        print(f"      Range Φ: {stat['phi_min']:.4f} - {stat['phi_max']:.4f}")
+        print(f"      Tempo medio: {stat['tempo_medio']:.2f}s ± {stat['tempo_std']:.2f}s")
 
-# === ANALISI FINALE ===
-print("\n" + "=" * 50)
-print("🎯 RISULTATI FINALI TEST ROBUSTEZZA")
-print("=" * 50)
+    # === ANALISI FINALE ===
+    print("\n" + "=" * 50)
+    print("🎯 RISULTATI FINALI TEST ROBUSTEZZA")
+    print("=" * 50)
 
-# Confronto Equity vs Extractive
-eq = risultati_totali['equity']
-ex = risultati_totali['extractive']
+    # Confronto Equity vs Extractive
+    eq = risultati_totali['equity']
+    ex = risultati_totali['extractive']
 
-print(f"\n⚖️  CONFRONTO SISTEMI:")
-print(f"   ΔΦ (Equity - Extractive): {eq['phi_medio'] - ex['phi_medio']:.4f}")
-print(f"   Differenza tempi: {eq['tempo_medio'] - ex['tempo_medio']:.2f}s")
+    print(f"\n⚖️  CONFRONTO SISTEMI:")
+    print(f"   ΔΦ (Equity - Extractive): {eq['phi_medio'] - ex['phi_medio']:.4f}")
+    print(f"   Differenza tempi: {eq['tempo_medio'] - ex['tempo_medio']:.2f}s")
 
-print(f"\n📋 VERIFICA IPOTESI:")
-print(f"   1. Equity Φ alto (>0.9): {'✅' if eq['phi_medio'] > 0.9 else '❌'} ({eq['phi_medio']:.4f})")
-print(f"   2. Extractive Φ basso (<0.4): {'✅' if ex['phi_medio'] < 0.4 else '❌'} ({ex['phi_medio']:.4f})")
-print(f"   3. Equity stabile (σ < 0.05): {'✅' if eq['phi_std'] < 0.05 else '❌'} (σ={eq['phi_std']:.4f})")
-print(f"   4. Extractive variabile (σ > 0.05): {'✅' if ex['phi_std'] > 0.05 else '❌'} (σ={ex['phi_std']:.4f})")
+    print(f"\n📋 VERIFICA IPOTESI:")
+    print(f"   1. Equity Φ alto (>0.9): {'✅' if eq['phi_medio'] > 0.9 else '❌'} ({eq['phi_medio']:.4f})")
+    print(f"   2. Extractive Φ basso (<0.4): {'✅' if ex['phi_medio'] < 0.4 else '❌'} ({ex['phi_medio']:.4f})")
+    print(f"   3. Equity stabile (σ < 0.05): {'✅' if eq['phi_std'] < 0.05 else '❌'} (σ={eq['phi_std']:.4f})")
+    print(f"   4. Extractive variabile (σ > 0.05): {'✅' if ex['phi_std'] > 0.05 else '❌'} (σ={ex['phi_std']:.4f})")
 
-# Salva riepilogo
-riepilogo = {
-    'timestamp': data_ora,
-    'num_repliche': NUM_REPLICHE,
-    'risultati': risultati_totali,
-    'confronto': {
-        'differenza_phi': eq['phi_medio'] - ex['phi_medio'],
-        'rapporto_std': ex['phi_std'] / eq['phi_std'] if eq['phi_std'] > 0 else 0
+    # Salva riepilogo
+    riepilogo = {
+        'timestamp': data_ora,
+        'num_repliche': NUM_REPLICHE,
+        'risultati': risultati_totali,
+        'confronto': {
+            'differenza_phi': eq['phi_medio'] - ex['phi_medio'],
+            'rapporto_std': ex['phi_std'] / eq['phi_std'] if eq['phi_std'] > 0 else 0
+        }
     }
-}
 
-with open(f"{cartella_risultati}/RIEPILOGO.json", 'w') as f:
-    json.dump(riepilogo, f, indent=2)
+    with open(f"{cartella_risultati}/RIEPILOGO.json", 'w') as f:
+        json.dump(riepilogo, f, indent=2)
+
+    print(f"\n💾 Tutti i dati salvati in: {cartella_risultati}/")
+    print("=" * 50)
+    print("✅ TEST COMPLETATO CON SUCCESSO!")
+
 
-print(f"\n💾 Tutti i dati salvati in: {cartella_risultati}/")
-print("=" * 50)
-print("✅ TEST COMPLETATO CON SUCCESSO!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# === traiettorie.py ===
+# Registratore opzionale delle traiettorie: Φ(t), fase media ψ(t) e, a
+# richiesta, istantanee decimate di theta, scritte direttamente su file
+# np.memmap invece di restare in RAM.
+#
+#   traiettorie/
+#     meta.json        forme e metadati liberi (modello, dt, parametri)
+#     tempo.npy        (R, T)      t di ogni passo registrato
+#     phi.npy          (R, T)      Φ(t)
+#     fase.npy         (R, T)      ψ(t) = arg Z
+#     theta.npy        (R, S, N)   theta ogni `ogni_theta` passi (opzionale)
+#     passi.npy        (R,)        passi effettivamente registrati
+#
+# I .npy hanno l'header standard di NumPy: la lettura con apri_traiettorie()
+# è zero-copy (mmap in sola lettura). Con registratore=None gli evolve()
+# pagano solo un confronto con None per passo.
+#
+# I passi oltre T vengono ignorati. Chi non conosce in anticipo il numero di
+# passi (integratore a passo adattivo) allunga i file con estendi().
+
+import json
+import os
+
+import numpy as np
+
+
+class RegistratoreTraiettorie:
+    def __init__(self, cartella, passi_max, R=1, N=None, ogni_theta=0,
+                 dtype_theta=np.float32, metadati=None):
+        """
+        passi_max: passi massimi per replica (T = passi_max + 1, incluso lo stato iniziale)
+        R: repliche registrate (righe)         N: oscillatori (serve solo per theta)
+        ogni_theta: salva theta ogni k passi (0 = mai)
+        """
+        self.cartella = cartella
+        self.R = int(R)
+        self.T = int(passi_max) + 1
+        self.ogni_theta = int(ogni_theta)
+        os.makedirs(cartella, exist_ok=True)
+        crea = self._crea
+
+        self.tempo = crea('tempo.npy', (self.R, self.T), np.float64, np.nan)
+        self.phi = crea('phi.npy', (self.R, self.T), np.float64, np.nan)
+        self.fase = crea('fase.npy', (self.R, self.T), np.float64, np.nan)
+        self.passi = crea('passi.npy', (self.R,), np.int64, 0)
+
+        self.theta = None
+        if self.ogni_theta > 0:
+            if N is None:
+                raise ValueError("N è necessario per registrare theta")
+            S = (self.T - 1) // self.ogni_theta + 1
+            # Non inizializzato: i passi validi sono indicati da passi.npy
+            self.theta = crea('theta.npy', (self.R, S, int(N)), dtype_theta)
+
+        self.meta = {
+            'versione': 1,
+            'R': self.R,
+            'T': self.T,
+            'N': N,
+            'ogni_theta': self.ogni_theta,
+            'dtype_theta': np.dtype(dtype_theta).name,
+            'metadati': metadati or {},
+        }
+        self._scrivi_meta()
+
+    def _crea(self, nome, forma, dtype, riempi=None):
+        mm = np.lib.format.open_memmap(os.path.join(self.cartella, nome), mode='w+',
+                                       dtype=dtype, shape=forma)
+        if riempi is not None:
+            mm[...] = riempi
+        return mm
+
+    def estendi(self, passi_max):
+        """
+        Porta T a passi_max + 1 (mai indietro): ogni file è riscritto più lungo
+        con i passi già registrati, i nuovi restano NaN come all'apertura
+        """
+        T = int(passi_max) + 1
+        if T <= self.T:
+            return
+        for nome in ('tempo', 'phi', 'fase'):
+            vecchio = getattr(self, nome)
+            nuovo = self._crea(f"{nome}.npy.tmp", (self.R, T), vecchio.dtype, np.nan)
+            nuovo[:, :self.T] = vecchio
+            self._sostituisci(nome, nuovo)
+        if self.theta is not None:
+            vecchio = self.theta
+            S = (T - 1) // self.ogni_theta + 1
+            nuovo = self._crea('theta.npy.tmp', (self.R, S, vecchio.shape[2]), vecchio.dtype)
+            nuovo[:, :vecchio.shape[1]] = vecchio
+            self._sostituisci('theta', nuovo)
+        self.T = self.meta['T'] = T
+        self._scrivi_meta()
+
+    def _sostituisci(self, nome, nuovo):
+        """Il file .tmp già scritto prende il posto di <nome>.npy (la mappa resta valida)"""
+        nuovo.flush()
+        setattr(self, nome, None)  # chiude la mappa del file vecchio
+        os.replace(os.path.join(self.cartella, f"{nome}.npy.tmp"), os.path.join(self.cartella, f"{nome}.npy"))
+        setattr(self, nome, nuovo)
+
+    def registra(self, riga, passo, t, phi, fase, theta=None):
+        """Registra lo stato di una replica al passo `passo` (0 = stato iniziale)"""
+        if passo >= self.T:
+            return
+        self.tempo[riga, passo] = t
+        self.phi[riga, passo] = phi
+        self.fase[riga, passo] = fase
+        if self.passi[riga] < passo + 1:
+            self.passi[riga] = passo + 1
+        if self.theta is not None and theta is not None and passo % self.ogni_theta == 0:
+            self.theta[riga, passo // self.ogni_theta] = theta
+
+    def registra_righe(self, righe, passo, t, phi, fase, theta=None):
+        """Versione vettoriale per un ensemble: righe (k,), phi/fase (k,), theta (k, N)"""
+        if passo >= self.T:
+            return
+        self.tempo[righe, passo] = t
+        self.phi[righe, passo] = phi
+        self.fase[righe, passo] = fase
+        self.passi[righe] = np.maximum(self.passi[righe], passo + 1)
+        if self.theta is not None and theta is not None and passo % self.ogni_theta == 0:
+            self.theta[righe, passo // self.ogni_theta] = theta
+
+    def chiudi(self):
+        for mm in (self.tempo, self.phi, self.fase, self.passi, self.theta):
+            if mm is not None:
+                mm.flush()
+        self._scrivi_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.chiudi()
+
+    def _scrivi_meta(self):
+        with open(os.path.join(self.cartella, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+
+class Traiettorie:
+    """Lettura zero-copy di una cartella scritta da RegistratoreTraiettorie"""
+
+    def __init__(self, cartella):
+        self.cartella = cartella
+        with open(os.path.join(cartella, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+        def apri(nome):
+            percorso = os.path.join(cartella, nome)
+            return np.load(percorso, mmap_mode='r') if os.path.exists(percorso) else None
+
+        self.tempo = apri('tempo.npy')
+        self.phi = apri('phi.npy')
+        self.fase = apri('fase.npy')
+        self.passi = apri('passi.npy')
+        self.theta = apri('theta.npy')
+
+    def serie(self, riga):
+        """(t, Φ, ψ) della replica, limitati ai passi registrati (viste, nessuna copia)"""
+        n = int(self.passi[riga])
+        return self.tempo[riga, :n], self.phi[riga, :n], self.fase[riga, :n]
+
+
+def registra_stato(registratore, riga, passo, t, ordine, theta):
+    """Calcola Φ e ψ con il kernel del sistema e li registra insieme a theta"""
+    phi, fase = ordine.calcola(theta)
+    registratore.registra(riga, passo, t, phi, fase, theta)
+
+
+def apri_traiettorie(cartella):
+    return Traiettorie(cartella)
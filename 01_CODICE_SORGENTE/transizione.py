@@ -0,0 +1,153 @@
+# === transizione.py ===
+# Ricerca adattiva del punto di transizione dei sistemi misti: il mix in cui
+# Φ medio attraversa la soglia (0.6).
+#
+# Bisezione rumorosa: nel punto medio dell'intervallo si aggiungono repliche a
+# lotti finché l'intervallo di confidenza di Φ medio esclude la soglia, poi si
+# tiene la metà che contiene l'attraversamento. Le repliche si concentrano
+# vicino alla transizione invece di essere spalmate su una griglia uniforme.
+#
+# Ogni punto è testato di nuovo dopo ogni lotto (fino a max_repliche): ogni
+# controllo è un'occasione di errore. Il livello complessivo è quindi diviso
+# tra le decisioni e, dentro ogni decisione, tra tutti i controlli possibili
+# (alpha spending uniforme, Bonferroni): l'intervallo finale contiene la
+# transizione con probabilità ≥ livello anche con l'arresto anticipato.
+#
+# Le repliche usano i flussi Philox per (mix, replica): i punti medi della
+# bisezione sono vicini, e con i seed legacy (seed_base + int(mix*10000) +
+# replica) mix vicini riuserebbero gli stessi seed, con errori correlati tra
+# punti che dovrebbero essere indipendenti.
+
+import math
+
+import numpy as np
+
+from .ensemble import EnsembleMisto
+from .flussi_rng import FlussiRNG, codice_mix
+
+SOGLIA_PHI = 0.6
+
+
+class PuntoValutato:
+    """Repliche accumulate in un mix: media, deviazione e intervallo di confidenza di Φ"""
+
+    def __init__(self, mix):
+        self.mix = mix
+        self.phi = []
+
+    def aggiungi(self, risultati):
+        self.phi.extend(res['phi_finale'] for res in risultati)
+
+    @property
+    def n(self):
+        return len(self.phi)
+
+    @property
+    def media(self):
+        return float(np.mean(self.phi))
+
+    def semiampiezza(self, alfa):
+        """Semiampiezza dell'intervallo t di Student al livello 1 - alfa"""
+        if self.n < 2:
+            return math.inf
+        from scipy import stats  # import pesante: solo quando serve davvero
+        return float(stats.t.ppf(1 - alfa / 2, self.n - 1) * np.std(self.phi, ddof=1) / math.sqrt(self.n))
+
+    def confronta(self, soglia, alfa):
+        """+1 / -1 se Φ medio è sopra / sotto la soglia con confidenza 1 - alfa, 0 se indeciso"""
+        h = self.semiampiezza(alfa)
+        if self.media - h > soglia:
+            return 1
+        if self.media + h < soglia:
+            return -1
+        return 0
+
+
+def cerca_transizione(a=0.0, b=1.0, soglia=SOGLIA_PHI, larghezza=0.005, livello=0.95,
+                      lotto=10, max_repliche=200, seed_base=None, flussi=None, verboso=False):
+    """
+    Trova il mix in cui Φ medio attraversa `soglia` dentro [a, b].
+    larghezza: ampiezza finale richiesta dell'intervallo
+    livello: confidenza complessiva (ripartita tra decisioni e controlli ripetuti)
+    lotto / max_repliche: repliche aggiunte per volta e tetto per punto
+    flussi: FlussiRNG delle repliche (default FlussiRNG())
+    seed_base: se dato usa i seed legacy invece dei flussi (solo per riprodurre
+    ricerche vecchie: per mix vicini i seed si sovrappongono)
+    Ritorna un dizionario con punto_transizione, intervallo, confidenza,
+    simulazioni e la lista dei punti valutati.
+    """
+    if seed_base is not None:
+        flussi = None
+    else:
+        flussi = flussi if flussi is not None else FlussiRNG()
+        if codice_mix(a) == codice_mix(a + larghezza / 2):
+            raise ValueError(f"larghezza {larghezza} sotto la risoluzione dei flussi per mix (1e-6)")
+    passi = max(0, math.ceil(math.log2((b - a) / larghezza)))
+    controlli = math.ceil(max_repliche / lotto)  # test per punto: uno dopo ogni lotto
+    alfa = (1 - livello) / ((passi + 2) * controlli)  # + i due controlli agli estremi
+    punti = []
+    simulazioni = 0
+
+    def valuta(mix):
+        nonlocal simulazioni
+        punto = PuntoValutato(mix)
+        while True:
+            inizio = punto.n + 1
+            fine = min(punto.n + lotto, max_repliche)
+            risultati = EnsembleMisto(mix, range(inizio, fine + 1), seed_base=seed_base, flussi=flussi).evolve()
+            punto.aggiungi(risultati)
+            simulazioni += len(risultati)
+            esito = punto.confronta(soglia, alfa)
+            if esito != 0 or punto.n >= max_repliche:
+                break
+        punti.append(punto)
+        if verboso:
+            print(f"   mix {mix:.4f}: Φ = {punto.media:.4f} ± {punto.semiampiezza(alfa):.4f} "
+                  f"({punto.n} repliche)")
+        return esito
+
+    # L'intervallo deve contenere un attraversamento dal basso verso l'alto
+    if valuta(a) != -1 or valuta(b) != 1:
+        raise ValueError(f"Φ medio non attraversa {soglia} in [{a}, {b}] con la confidenza richiesta")
+
+    indeciso = False
+    while b - a > larghezza:
+        m = (a + b) / 2
+        esito = valuta(m)
+        if esito == 1:
+            b = m
+        elif esito == -1:
+            a = m
+        else:
+            # Φ(m) indistinguibile dalla soglia: la transizione è (statisticamente) in m
+            indeciso = True
+            break
+
+    punto = (a + b) / 2 if not indeciso else m
+    return {
+        'punto_transizione': float(punto),
+        'intervallo': [float(a), float(b)],
+        'confidenza': livello,
+        'alfa_per_controllo': alfa,
+        'rng': repr(flussi) if flussi is not None else f"seed legacy {seed_base}",
+        'soglia': soglia,
+        'indeciso': indeciso,
+        'simulazioni': simulazioni,
+        'punti': [{'mix': float(p.mix), 'phi_medio': p.media, 'repliche': p.n} for p in punti],
+    }
+
+
+def main():
+    print("🎯 RICERCA ADATTIVA DEL PUNTO DI TRANSIZIONE")
+    print("=" * 60)
+    esito = cerca_transizione(verboso=True)
+    a, b = esito['intervallo']
+    griglia = (round(1 / 0.005) + 1) * 30
+    print(f"\n🎯 Transizione: mix ≈ {esito['punto_transizione']:.4f}  "
+          f"[{a:.4f}, {b:.4f}] al {esito['confidenza']*100:.0f}%")
+    print(f"   Simulazioni: {esito['simulazioni']} (griglia uniforme a 0.005 × 30 repliche: {griglia})")
+
+
+# TEST
+if __name__ == "__main__":
+    main()
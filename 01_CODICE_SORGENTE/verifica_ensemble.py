@@ -0,0 +1,87 @@
+# === verifica_ensemble.py ===
+# Controllo di regressione del motore a ensemble: EnsemblePhiAvanzato ed
+# EnsembleMisto devono restituire, replica per replica, esattamente i
+# dizionari di SistemaPhiAvanzato.evolve() e SistemaMisto.evolve() (stessi
+# float bit per bit, seed e parametri compresi). Su questa equivalenza
+# poggiano i risultati a ensemble di test_50_repliche, sistemi_misti,
+# transizione e diagramma_fase.
+#
+# Si provano i due percorsi del RNG (seed legacy e flussi Philox) e più
+# lunghezze del blocco di rumore: un passo (nessun riallineamento), blocchi
+# che finiscono a metà della dinamica e il default. Le estrazioni dopo il
+# loop (phi_finale, tempo_collasso) coincidono solo se il RNG di ogni
+# replica è stato riallineato al punto esatto del loop seriale.
+#
+# Uso: phi-verifica-ensemble [--repliche 20] [--mix 0 0.25 0.5 0.75 1] [--seed S]
+# (codice di uscita 1 se qualche replica differisce)
+
+import argparse
+import sys
+
+from .ensemble import BLOCCO_PASSI, EnsembleMisto, EnsemblePhiAvanzato
+from .flussi_rng import FlussiRNG
+from .sistemi_misti import MIX_PROPORZIONI, SistemaMisto
+from .test_50_repliche import SistemaPhiAvanzato
+
+BLOCCHI = (None, 1, 7, BLOCCO_PASSI)  # None: il default del percorso RNG
+
+
+def _confronta(seriali, ensemble):
+    """(repliche diverse, replica_id della prima diversa o None)"""
+    diverse = [s['replica_id'] for s, e in zip(seriali, ensemble) if s != e]
+    diverse += [s['replica_id'] for s in seriali[len(ensemble):]]
+    return len(diverse), (diverse[0] if diverse else None)
+
+
+def verifica_equivalenza(repliche=20, mix_list=MIX_PROPORZIONI, blocchi=BLOCCHI, seed=None):
+    """
+    Confronta ensemble e loop seriale per equity, extractive e ogni mix, con seed
+    legacy e con flussi Philox, per ogni lunghezza di blocco.
+    Ritorna una voce per configurazione con le repliche diverse (0 = identiche).
+    """
+    replica_ids = list(range(1, repliche + 1))
+    percorsi = [('legacy', None), ('philox', FlussiRNG() if seed is None else FlussiRNG(seed))]
+    casi = [(tipo, None) for tipo in ('equity', 'extractive')] + [('misto', mix) for mix in mix_list]
+
+    rapporto = []
+    for rng, flussi in percorsi:
+        for sistema, mix in casi:
+            if mix is None:
+                seriali = [SistemaPhiAvanzato(sistema, i, flussi=flussi).evolve() for i in replica_ids]
+            else:
+                seriali = [SistemaMisto(mix, i, flussi=flussi).evolve() for i in replica_ids]
+            for blocco in blocchi:
+                if mix is None:
+                    ensemble = EnsemblePhiAvanzato(sistema, replica_ids, blocco=blocco, flussi=flussi)
+                else:
+                    ensemble = EnsembleMisto(mix, replica_ids, blocco=blocco, flussi=flussi)
+                diverse, prima = _confronta(seriali, ensemble.evolve())
+                rapporto.append({'rng': rng, 'sistema': sistema, 'mix': mix, 'blocco': blocco,
+                                 'repliche': repliche, 'diverse': diverse, 'prima_diversa': prima})
+    return rapporto
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verifica che gli ensemble coincidano bit per bit con i sistemi seriali")
+    parser.add_argument("--repliche", type=int, default=20)
+    parser.add_argument("--mix", type=float, nargs="+", default=MIX_PROPORZIONI)
+    parser.add_argument("--seed", type=int, default=None, help="Seed radice dei flussi Philox")
+    args = parser.parse_args()
+
+    print("🔁 VERIFICA ENSEMBLE CONTRO LOOP SERIALE")
+    print("=" * 60)
+    rapporto = verifica_equivalenza(args.repliche, args.mix, seed=args.seed)
+    for voce in rapporto:
+        nome = voce['sistema'] if voce['mix'] is None else f"misto {voce['mix']:g}"
+        blocco = 'default' if voce['blocco'] is None else voce['blocco']
+        esito = ('✅ identiche' if not voce['diverse'] else
+                 f"❌ {voce['diverse']}/{voce['repliche']} diverse (prima: replica {voce['prima_diversa']})")
+        print(f"   {voce['rng']:<7} {nome:<11} blocco {blocco!s:<8} {esito}")
+    fallite = sum(1 for voce in rapporto if voce['diverse'])
+    print(f"\n{'✅ Tutte identiche' if not fallite else f'❌ {fallite} configurazioni diverse'}")
+    return 0 if not fallite else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())